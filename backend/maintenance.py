@@ -0,0 +1,112 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+import typer
+from dotenv import load_dotenv
+
+# Load environment variables before the services read them
+load_dotenv(Path(__file__).parent / '.env')
+
+from services.database_service import db_service
+from services.storage_service import storage_service
+from services.storage_gc import GC_GRACE_SECONDS, collect_garbage
+from services.audio_probe import AUDIO_BACKFILL_CONCURRENCY, audio_probe
+from services.transcoder import transcoder
+from services.cover_images import cover_images
+
+app = typer.Typer(help="YantraTune maintenance jobs")
+
+@app.callback()
+def main():
+    """Run with a job name, e.g. ``python maintenance.py storage-gc``"""
+
+@app.command("storage-gc")
+def storage_gc(
+    apply: bool = typer.Option(False, "--apply", help="Delete unreferenced objects instead of only reporting them"),
+    grace_hours: float = typer.Option(GC_GRACE_SECONDS / 3600, help="Skip objects created or reused this recently"),
+    as_json: bool = typer.Option(False, "--json", help="Print the full report, including every orphaned path"),
+):
+    """Find storage objects no song, album, artist or playlist references"""
+    async def run():
+        try:
+            return await collect_garbage(db_service, storage_service, apply=apply, grace_seconds=grace_hours * 3600)
+        finally:
+            await storage_service.close()
+
+    report = asyncio.run(run())
+    if as_json:
+        typer.echo(json.dumps(report, indent=2))
+        return
+    for bucket, result in report["buckets"].items():
+        typer.echo(
+            f"{bucket}: {result['objects']} objects, {len(result['orphaned'])} unreferenced "
+            f"({result['orphaned_bytes']} bytes), {result['deleted']} deleted"
+        )
+    if not apply:
+        typer.echo("Dry run; pass --apply to delete")
+
+@app.command("probe-audio")
+def probe_audio(
+    force: bool = typer.Option(False, "--force", help="Re-probe songs that already have audio properties"),
+    limit: Optional[int] = typer.Option(None, help="Stop after this many songs"),
+    concurrency: int = typer.Option(AUDIO_BACKFILL_CONCURRENCY, help="Songs downloaded and probed at once"),
+):
+    """Backfill duration, codec, bitrate and sample rate for existing songs"""
+    counts = asyncio.run(audio_probe.backfill(db_service, force=force, limit=limit, concurrency=concurrency))
+    typer.echo(
+        f"{counts['scanned']} songs scanned, {counts['updated']} updated, "
+        f"{counts['unrecognised']} unrecognised, {counts['failed']} failed"
+    )
+
+@app.command("transcode")
+def transcode(
+    force: bool = typer.Option(False, "--force", help="Re-transcode songs that already have renditions"),
+    limit: Optional[int] = typer.Option(None, help="Stop after this many songs"),
+):
+    """Produce bitrate renditions and HLS playlists for songs that lack them"""
+    if not transcoder.enabled:
+        typer.echo("Transcoding is not available (ffmpeg not found or TRANSCODE_ENABLED=false)")
+        raise typer.Exit(1)
+
+    async def run():
+        try:
+            return await transcoder.backfill(force=force, limit=limit)
+        finally:
+            await storage_service.close()
+
+    counts = asyncio.run(run())
+    typer.echo(f"{counts['scanned']} songs scanned, {counts['done']} transcoded, {counts['failed']} failed")
+
+@app.command("waveforms")
+def waveforms(
+    force: bool = typer.Option(False, "--force", help="Recompute songs that already have a waveform"),
+    limit: Optional[int] = typer.Option(None, help="Stop after this many songs"),
+):
+    """Compute waveform peaks for songs that lack them"""
+    if not transcoder.enabled:
+        typer.echo("Waveforms need ffmpeg (not found or TRANSCODE_ENABLED=false)")
+        raise typer.Exit(1)
+    counts = asyncio.run(transcoder.backfill_waveforms(force=force, limit=limit))
+    typer.echo(f"{counts['scanned']} songs scanned, {counts['done']} computed, {counts['failed']} failed")
+
+@app.command("covers")
+def covers(
+    force: bool = typer.Option(False, "--force", help="Regenerate images that already have variants"),
+    limit: Optional[int] = typer.Option(None, help="Stop after this many rows"),
+):
+    """Generate resized cover and avatar variants and blurhashes for existing rows"""
+    async def run():
+        try:
+            return await cover_images.backfill(db_service, force=force, limit=limit)
+        finally:
+            await storage_service.close()
+            cover_images.close()
+
+    counts = asyncio.run(run())
+    typer.echo(f"{counts['scanned']} rows scanned, {counts['updated']} updated, {counts['failed']} failed")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    app()
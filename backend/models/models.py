@@ -1,14 +1,25 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, date
 import uuid
 
 # Base models for database entities
 
+class ImageVariants(BaseModel):
+    """Resized encodings of an uploaded image"""
+    width: int
+    height: int
+    blurhash: Optional[str] = None  # placeholder to show while loading
+    # format -> srcset attribute value, e.g. {"webp": "https://.../a.webp 160w, https://.../b.webp 320w"}
+    srcset: Dict[str, str] = {}
+
 class ArtistBase(BaseModel):
     name: str
     bio: Optional[str] = None
     avatar_url: Optional[str] = None
+    # From the avatar's ImageVariants
+    avatar_srcset: Optional[Dict[str, str]] = None
+    avatar_blurhash: Optional[str] = None
 
 class ArtistCreate(ArtistBase):
     pass
@@ -17,6 +28,8 @@ class ArtistUpdate(BaseModel):
     name: Optional[str] = None
     bio: Optional[str] = None
     avatar_url: Optional[str] = None
+    avatar_srcset: Optional[Dict[str, str]] = None
+    avatar_blurhash: Optional[str] = None
 
 class Artist(ArtistBase):
     id: str
@@ -27,6 +40,9 @@ class AlbumBase(BaseModel):
     title: str
     artist_id: str
     cover_url: Optional[str] = None
+    # From the cover's ImageVariants
+    cover_srcset: Optional[Dict[str, str]] = None
+    cover_blurhash: Optional[str] = None
     release_date: Optional[date] = None
 
 class AlbumCreate(AlbumBase):
@@ -36,6 +52,8 @@ class AlbumUpdate(BaseModel):
     title: Optional[str] = None
     artist_id: Optional[str] = None
     cover_url: Optional[str] = None
+    cover_srcset: Optional[Dict[str, str]] = None
+    cover_blurhash: Optional[str] = None
     release_date: Optional[date] = None
 
 class Album(AlbumBase):
@@ -44,6 +62,22 @@ class Album(AlbumBase):
     updated_at: datetime
     artist: Optional[Artist] = None
 
+class AudioInfo(BaseModel):
+    """Stream properties probed from an uploaded audio file"""
+    duration_ms: Optional[int] = None
+    container: Optional[str] = None
+    codec: Optional[str] = None
+    bitrate: Optional[int] = None  # bits per second
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+class Rendition(BaseModel):
+    """One transcoded bitrate of a song"""
+    bitrate: int  # kbps
+    codec: str
+    url: str  # progressive file
+    playlist_url: Optional[str] = None  # HLS media playlist
+
 class SongBase(BaseModel):
     title: str
     artist_id: str
@@ -52,6 +86,19 @@ class SongBase(BaseModel):
     genre: Optional[str] = None
     audio_url: Optional[str] = None
     cover_url: Optional[str] = None
+    # From the cover's ImageVariants
+    cover_srcset: Optional[Dict[str, str]] = None
+    cover_blurhash: Optional[str] = None
+    # Probed from the audio file; duration is derived from duration_ms when known
+    duration_ms: Optional[int] = None
+    container: Optional[str] = None
+    codec: Optional[str] = None
+    bitrate: Optional[int] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    # Filled in by the transcoding job; hls_url is the master playlist
+    hls_url: Optional[str] = None
+    renditions: Optional[List[Rendition]] = None
 
 class SongCreate(SongBase):
     pass
@@ -64,6 +111,16 @@ class SongUpdate(BaseModel):
     genre: Optional[str] = None
     audio_url: Optional[str] = None
     cover_url: Optional[str] = None
+    cover_srcset: Optional[Dict[str, str]] = None
+    cover_blurhash: Optional[str] = None
+    duration_ms: Optional[int] = None
+    container: Optional[str] = None
+    codec: Optional[str] = None
+    bitrate: Optional[int] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    hls_url: Optional[str] = None
+    renditions: Optional[List[Rendition]] = None
 
 class Song(SongBase):
     id: str
@@ -75,6 +132,9 @@ class Song(SongBase):
 class PlaylistBase(BaseModel):
     name: str
     cover_url: Optional[str] = None
+    # From the cover's ImageVariants
+    cover_srcset: Optional[Dict[str, str]] = None
+    cover_blurhash: Optional[str] = None
     description: Optional[str] = None
 
 class PlaylistCreate(PlaylistBase):
@@ -83,6 +143,8 @@ class PlaylistCreate(PlaylistBase):
 class PlaylistUpdate(BaseModel):
     name: Optional[str] = None
     cover_url: Optional[str] = None
+    cover_srcset: Optional[Dict[str, str]] = None
+    cover_blurhash: Optional[str] = None
     description: Optional[str] = None
 
 class Playlist(PlaylistBase):
@@ -91,6 +153,8 @@ class Playlist(PlaylistBase):
     updated_at: datetime
     songs: Optional[List[Song]] = []
     song_count: Optional[int] = 0
+    # Total of the songs' probed durations; only set when the songs are loaded
+    duration_ms: Optional[int] = None
 
 class PlaylistSongBase(BaseModel):
     playlist_id: str
@@ -131,11 +195,68 @@ class SearchResultsResponse(BaseModel):
     albums: List[Album]
     playlists: List[Playlist]
 
+class BatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+
+class SongBatchResponse(BaseModel):
+    songs: List[Song]
+    missing: List[str]
+
+class ArtistBatchResponse(BaseModel):
+    artists: List[Artist]
+    missing: List[str]
+
+class AlbumBatchResponse(BaseModel):
+    albums: List[Album]
+    missing: List[str]
+
+class Suggestion(BaseModel):
+    type: str  # song, artist, album, playlist
+    id: str
+    label: str
+
+# Import models
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportResult(BaseModel):
+    entity: str
+    received: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError] = []
+    seconds: float
+    rows_per_second: float
+
 # Upload models
 class UploadResponse(BaseModel):
     filename: str
     url: str
     message: str
+    audio: Optional[AudioInfo] = None
+    image: Optional[ImageVariants] = None
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    length: int = Field(..., gt=0)
+
+class UploadSession(UploadSessionCreate):
+    id: str
+    offset: int
+    expires_at: datetime
+
+class TranscodeJob(BaseModel):
+    id: str
+    song_id: str
+    status: str  # queued, running, done, failed
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    renditions: List[Rendition] = []
+    hls_url: Optional[str] = None
 
 # User preference models
 class UserBase(BaseModel):
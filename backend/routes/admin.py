@@ -1,7 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from models.models import StatsResponse, AdminLog
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from models.models import StatsResponse, AdminLog, ImportResult
 from services.database_service import db_service
+from services.search_index import search_index
+from services.suggest_index import suggest_index
+from services.audit_log import audit_log
+from services.storage_service import storage_service
+from services.media_cache import media_cache
+from services.audio_probe import audio_probe
+from services.transcoder import transcoder
+from services.cover_images import cover_images
+from services.catalog_import import CatalogImporter, iter_records
+from services.catalog_export import export_stream
+from services.pagination import parse_after, next_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,13 +32,96 @@ async def get_dashboard_stats():
 
 @router.get("/logs", response_model=List[AdminLog])
 async def get_admin_logs(
+    response: Response,
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    after: Optional[str] = Query(default=None, description="Cursor from X-Next-Cursor (empty to start); overrides offset")
 ):
     """Get admin activity logs"""
     try:
-        logs = await db_service.get_admin_logs(limit=limit, offset=offset)
+        cursor = parse_after(after)
+        logs = await db_service.get_admin_logs(limit=limit, offset=offset, after=cursor)
+        if cursor is not None and (next_page := next_cursor(logs, limit, column="timestamp")):
+            response.headers["X-Next-Cursor"] = next_page
         return logs
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching admin logs: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/metrics")
+async def get_service_metrics():
+    """Get data layer metrics (round trips, worker pool, cache, audit log queue, uploads, media cache, audio probing, transcoding)"""
+    try:
+        return {
+            **db_service.metrics(),
+            "audit_log": audit_log.metrics(),
+            "storage": storage_service.metrics(),
+            "media_cache": media_cache.metrics(),
+            "audio_probe": audio_probe.metrics(),
+            "transcoder": transcoder.metrics(),
+            "cover_images": cover_images.metrics(),
+        }
+    except Exception as e:
+        logger.error(f"Error fetching service metrics: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/search-index/rebuild")
+async def rebuild_search_index():
+    """Rebuild the in-memory search index and report its size and build time"""
+    if not search_index.enabled:
+        raise HTTPException(status_code=400, detail="Search index is disabled")
+    try:
+        await search_index.build(db_service)
+        return search_index.metrics()
+    except Exception as e:
+        logger.error(f"Error rebuilding search index: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/suggest-index/rebuild")
+async def rebuild_suggest_index():
+    """Rebuild the in-memory typeahead index and report its size and build time"""
+    if not suggest_index.enabled:
+        raise HTTPException(status_code=400, detail="Suggest index is disabled")
+    try:
+        await suggest_index.build(db_service)
+        return suggest_index.metrics()
+    except Exception as e:
+        logger.error(f"Error rebuilding suggest index: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/import", response_model=ImportResult)
+async def import_catalog(
+    request: Request,
+    entity: str = Query(..., pattern="^(artists|albums|songs|playlists|playlist_songs)$"),
+    format: Optional[str] = Query(default=None, pattern="^(ndjson|csv)$", description="Defaults to csv for text/csv bodies, else ndjson")
+):
+    """Bulk import catalog rows from a streamed NDJSON or CSV body"""
+    try:
+        if format is None:
+            format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+        importer = CatalogImporter(db_service, entity)
+        return await importer.run(iter_records(request.stream(), format))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import body must be UTF-8")
+    except Exception as e:
+        logger.error(f"Error importing {entity}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/export/{entity}")
+async def export_catalog(
+    entity: str = Path(..., pattern="^(artists|albums|songs|playlists|playlist_songs)$"),
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(default=False, description="Return a .gz file")
+):
+    """Stream every row of a catalog table as NDJSON or CSV"""
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    filename = f"{entity}.{format}"
+    if gzip:
+        media_type, filename = "application/gzip", f"{filename}.gz"
+    return StreamingResponse(
+        export_stream(db_service, entity, format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from models.models import Album, AlbumCreate, AlbumUpdate, AdminLogCreate
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
+from models.models import Album, AlbumCreate, AlbumUpdate, AdminLogCreate, BatchRequest, AlbumBatchResponse
 from services.database_service import db_service
+from services.audit_log import audit_log
+from services.pagination import parse_after, next_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,17 +12,34 @@ router = APIRouter(prefix="/albums", tags=["albums"])
 
 @router.get("/", response_model=List[Album])
 async def get_albums(
+    response: Response,
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    after: Optional[str] = Query(default=None, description="Cursor from X-Next-Cursor (empty to start); overrides offset")
 ):
     """Get all albums"""
     try:
-        albums = await db_service.get_albums(limit=limit, offset=offset)
+        cursor = parse_after(after)
+        albums = await db_service.get_albums(limit=limit, offset=offset, after=cursor)
+        if cursor is not None and (next_page := next_cursor(albums, limit)):
+            response.headers["X-Next-Cursor"] = next_page
         return albums
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching albums: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/batch", response_model=AlbumBatchResponse)
+async def get_albums_batch(request: BatchRequest):
+    """Get many albums by ID in one request; unknown IDs are listed in `missing`"""
+    try:
+        albums, missing = await db_service.get_albums_by_ids(request.ids)
+        return AlbumBatchResponse(albums=albums, missing=missing)
+    except Exception as e:
+        logger.error(f"Error batch fetching albums: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/{album_id}", response_model=Album)
 async def get_album(album_id: str):
     """Get a single album by ID"""
@@ -50,7 +69,7 @@ async def create_album(album: AlbumCreate):
             entity_id=new_album.id,
             entity_name=new_album.title
         )
-        await db_service.log_admin_action(log)
+        audit_log.log(log)
         
         return new_album
     except HTTPException:
@@ -63,24 +82,12 @@ async def create_album(album: AlbumCreate):
 async def update_album(album_id: str, album: AlbumUpdate):
     """Update an album (admin only)"""
     try:
-        existing_album = await db_service.get_album_by_id(album_id)
-        if not existing_album:
+        # Existence check, update and audit log run as one transaction
+        result = await db_service.admin_write("album", "update", album_id, album.model_dump(mode="json", exclude_none=True))
+        if not result:
             raise HTTPException(status_code=404, detail="Album not found")
         
-        updated_album = await db_service.update_album(album_id, album)
-        if not updated_album:
-            raise HTTPException(status_code=400, detail="Failed to update album")
-        
-        # Log the admin action
-        log = AdminLogCreate(
-            action="update",
-            entity_type="album",
-            entity_id=album_id,
-            entity_name=updated_album.title
-        )
-        await db_service.log_admin_action(log)
-        
-        return updated_album
+        return result[1]
     except HTTPException:
         raise
     except Exception as e:
@@ -91,23 +98,11 @@ async def update_album(album_id: str, album: AlbumUpdate):
 async def delete_album(album_id: str):
     """Delete an album (admin only)"""
     try:
-        existing_album = await db_service.get_album_by_id(album_id)
-        if not existing_album:
+        # Existence check, delete and audit log run as one transaction
+        result = await db_service.admin_write("album", "delete", album_id)
+        if not result:
             raise HTTPException(status_code=404, detail="Album not found")
         
-        success = await db_service.delete_album(album_id)
-        if not success:
-            raise HTTPException(status_code=400, detail="Failed to delete album")
-        
-        # Log the admin action
-        log = AdminLogCreate(
-            action="delete",
-            entity_type="album",
-            entity_id=album_id,
-            entity_name=existing_album.title
-        )
-        await db_service.log_admin_action(log)
-        
         return {"message": "Album deleted successfully"}
     except HTTPException:
         raise
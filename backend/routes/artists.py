@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from models.models import Artist, ArtistCreate, ArtistUpdate, AdminLogCreate
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
+from models.models import Artist, ArtistCreate, ArtistUpdate, AdminLogCreate, BatchRequest, ArtistBatchResponse
 from services.database_service import db_service
+from services.audit_log import audit_log
+from services.pagination import parse_after, next_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,17 +12,34 @@ router = APIRouter(prefix="/artists", tags=["artists"])
 
 @router.get("/", response_model=List[Artist])
 async def get_artists(
+    response: Response,
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    after: Optional[str] = Query(default=None, description="Cursor from X-Next-Cursor (empty to start); overrides offset")
 ):
     """Get all artists"""
     try:
-        artists = await db_service.get_artists(limit=limit, offset=offset)
+        cursor = parse_after(after)
+        artists = await db_service.get_artists(limit=limit, offset=offset, after=cursor)
+        if cursor is not None and (next_page := next_cursor(artists, limit)):
+            response.headers["X-Next-Cursor"] = next_page
         return artists
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching artists: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/batch", response_model=ArtistBatchResponse)
+async def get_artists_batch(request: BatchRequest):
+    """Get many artists by ID in one request; unknown IDs are listed in `missing`"""
+    try:
+        artists, missing = await db_service.get_artists_by_ids(request.ids)
+        return ArtistBatchResponse(artists=artists, missing=missing)
+    except Exception as e:
+        logger.error(f"Error batch fetching artists: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/{artist_id}", response_model=Artist)
 async def get_artist(artist_id: str):
     """Get a single artist by ID"""
@@ -50,7 +69,7 @@ async def create_artist(artist: ArtistCreate):
             entity_id=new_artist.id,
             entity_name=new_artist.name
         )
-        await db_service.log_admin_action(log)
+        audit_log.log(log)
         
         return new_artist
     except HTTPException:
@@ -63,24 +82,12 @@ async def create_artist(artist: ArtistCreate):
 async def update_artist(artist_id: str, artist: ArtistUpdate):
     """Update an artist (admin only)"""
     try:
-        existing_artist = await db_service.get_artist_by_id(artist_id)
-        if not existing_artist:
+        # Existence check, update and audit log run as one transaction
+        result = await db_service.admin_write("artist", "update", artist_id, artist.model_dump(mode="json", exclude_none=True))
+        if not result:
             raise HTTPException(status_code=404, detail="Artist not found")
         
-        updated_artist = await db_service.update_artist(artist_id, artist)
-        if not updated_artist:
-            raise HTTPException(status_code=400, detail="Failed to update artist")
-        
-        # Log the admin action
-        log = AdminLogCreate(
-            action="update",
-            entity_type="artist",
-            entity_id=artist_id,
-            entity_name=updated_artist.name
-        )
-        await db_service.log_admin_action(log)
-        
-        return updated_artist
+        return result[1]
     except HTTPException:
         raise
     except Exception as e:
@@ -91,23 +98,11 @@ async def update_artist(artist_id: str, artist: ArtistUpdate):
 async def delete_artist(artist_id: str):
     """Delete an artist (admin only)"""
     try:
-        existing_artist = await db_service.get_artist_by_id(artist_id)
-        if not existing_artist:
+        # Existence check, delete and audit log run as one transaction
+        result = await db_service.admin_write("artist", "delete", artist_id)
+        if not result:
             raise HTTPException(status_code=404, detail="Artist not found")
         
-        success = await db_service.delete_artist(artist_id)
-        if not success:
-            raise HTTPException(status_code=400, detail="Failed to delete artist")
-        
-        # Log the admin action
-        log = AdminLogCreate(
-            action="delete",
-            entity_type="artist",
-            entity_id=artist_id,
-            entity_name=existing_artist.name
-        )
-        await db_service.log_admin_action(log)
-        
         return {"message": "Artist deleted successfully"}
     except HTTPException:
         raise
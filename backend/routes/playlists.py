@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
 from models.models import Playlist, PlaylistCreate, PlaylistUpdate, AdminLogCreate
 from services.database_service import db_service
+from services.audit_log import audit_log
+from services.pagination import parse_after, next_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,19 +12,26 @@ router = APIRouter(prefix="/playlists", tags=["playlists"])
 
 @router.get("/", response_model=List[Playlist])
 async def get_playlists(
+    response: Response,
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
-    featured: bool = Query(default=False)
+    featured: bool = Query(default=False),
+    after: Optional[str] = Query(default=None, description="Cursor from X-Next-Cursor (empty to start); overrides offset")
 ):
     """Get all playlists"""
     try:
-        playlists = await db_service.get_playlists(limit=limit, offset=offset)
+        cursor = parse_after(after)
+        playlists = await db_service.get_playlists(limit=limit, offset=offset, after=cursor)
         
         # For simplicity, featured just returns the first few playlists
         if featured:
             playlists = playlists[:3]
+        elif cursor is not None and (next_page := next_cursor(playlists, limit)):
+            response.headers["X-Next-Cursor"] = next_page
             
         return playlists
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching playlists: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -56,7 +65,7 @@ async def create_playlist(playlist: PlaylistCreate):
             entity_id=new_playlist.id,
             entity_name=new_playlist.name
         )
-        await db_service.log_admin_action(log)
+        audit_log.log(log)
         
         return new_playlist
     except HTTPException:
@@ -69,24 +78,12 @@ async def create_playlist(playlist: PlaylistCreate):
 async def update_playlist(playlist_id: str, playlist: PlaylistUpdate):
     """Update a playlist (admin only)"""
     try:
-        existing_playlist = await db_service.get_playlist_by_id(playlist_id)
-        if not existing_playlist:
+        # Existence check, update and audit log run as one transaction
+        result = await db_service.admin_write("playlist", "update", playlist_id, playlist.model_dump(mode="json", exclude_none=True))
+        if not result:
             raise HTTPException(status_code=404, detail="Playlist not found")
         
-        updated_playlist = await db_service.update_playlist(playlist_id, playlist)
-        if not updated_playlist:
-            raise HTTPException(status_code=400, detail="Failed to update playlist")
-        
-        # Log the admin action
-        log = AdminLogCreate(
-            action="update",
-            entity_type="playlist",
-            entity_id=playlist_id,
-            entity_name=updated_playlist.name
-        )
-        await db_service.log_admin_action(log)
-        
-        return updated_playlist
+        return result[1]
     except HTTPException:
         raise
     except Exception as e:
@@ -97,23 +94,11 @@ async def update_playlist(playlist_id: str, playlist: PlaylistUpdate):
 async def delete_playlist(playlist_id: str):
     """Delete a playlist (admin only)"""
     try:
-        existing_playlist = await db_service.get_playlist_by_id(playlist_id)
-        if not existing_playlist:
+        # Existence check, delete and audit log run as one transaction
+        result = await db_service.admin_write("playlist", "delete", playlist_id)
+        if not result:
             raise HTTPException(status_code=404, detail="Playlist not found")
         
-        success = await db_service.delete_playlist(playlist_id)
-        if not success:
-            raise HTTPException(status_code=400, detail="Failed to delete playlist")
-        
-        # Log the admin action
-        log = AdminLogCreate(
-            action="delete",
-            entity_type="playlist",
-            entity_id=playlist_id,
-            entity_name=existing_playlist.name
-        )
-        await db_service.log_admin_action(log)
-        
         return {"message": "Playlist deleted successfully"}
     except HTTPException:
         raise
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List
+from models.models import Suggestion
+from services.database_service import db_service
+from services.suggest_index import suggest_index
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+@router.get("/suggest", response_model=List[Suggestion])
+async def suggest(
+    q: str = Query(..., min_length=1, description="Prefix typed so far"),
+    limit: int = Query(default=8, ge=1, le=20)
+):
+    """Lightweight typeahead suggestions across songs, artists, albums and playlists"""
+    try:
+        if suggest_index.ready:
+            return suggest_index.suggest(q, limit=limit)
+        return await db_service.suggest(q, limit=limit)
+    except Exception as e:
+        logger.error(f"Error fetching suggestions: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,32 +1,54 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File, Form, Request, Response
+from fastapi.responses import RedirectResponse
 from typing import List, Optional
-from models.models import Song, SongCreate, SongUpdate, AdminLogCreate
+from models.models import Song, SongCreate, SongUpdate, AdminLogCreate, BatchRequest, SongBatchResponse, TranscodeJob
 from services.database_service import db_service
+from services.audit_log import audit_log
 from services.storage_service import storage_service
+from services.upload_sessions import upload_sessions
+from services.search_index import search_index
+from services.media_cache import media_cache, etag_matches
+from services.audio_probe import audio_probe, song_fields
+from services.transcoder import transcoder
+from services.waveform import waveform_etag
+from services.cover_images import cover_images, image_fields
+from services.pagination import parse_after, next_cursor
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Audio objects never change under a URL, so clients may reuse them for a day
+STREAM_CACHE_CONTROL = "public, max-age=86400"
+# A waveform only changes if the audio does, so it is cached for a month
+WAVEFORM_CACHE_CONTROL = "public, max-age=2592000"
+
 router = APIRouter(prefix="/songs", tags=["songs"])
 
 @router.get("/", response_model=List[Song])
 async def get_songs(
+    response: Response,
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
     genre: Optional[str] = Query(default=None),
     recent: Optional[bool] = Query(default=False),
-    popular: Optional[bool] = Query(default=False)
+    popular: Optional[bool] = Query(default=False),
+    after: Optional[str] = Query(default=None, description="Cursor from X-Next-Cursor (empty to start); overrides offset")
 ):
     """Get all songs with optional filtering"""
     try:
-        songs = await db_service.get_songs(limit=limit, offset=offset, genre=genre)
+        cursor = parse_after(after)
+        songs = await db_service.get_songs(limit=limit, offset=offset, genre=genre, after=cursor)
         
         # For simplicity, recent and popular just return the same results for now
         # In a real app, you'd have play_count, last_played fields etc.
         if recent or popular:
             songs = songs[:5]  # Return top 5 for featured sections
+        elif cursor is not None and (next_page := next_cursor(songs, limit)):
+            response.headers["X-Next-Cursor"] = next_page
             
         return songs
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching songs: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -38,12 +60,25 @@ async def search_songs(
 ):
     """Search songs by title, artist, album, or genre"""
     try:
+        # Served from the in-memory index once it is built, otherwise from the database
+        if search_index.ready:
+            return search_index.search(q, limit=limit)
         results = await db_service.search(query=q, limit=limit)
         return results
     except Exception as e:
         logger.error(f"Error searching songs: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/batch", response_model=SongBatchResponse)
+async def get_songs_batch(request: BatchRequest):
+    """Get many songs by ID in one request; unknown IDs are listed in `missing`"""
+    try:
+        songs, missing = await db_service.get_songs_by_ids(request.ids)
+        return SongBatchResponse(songs=songs, missing=missing)
+    except Exception as e:
+        logger.error(f"Error batch fetching songs: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/{song_id}", response_model=Song)
 async def get_song(song_id: str):
     """Get a single song by ID"""
@@ -58,6 +93,24 @@ async def get_song(song_id: str):
         logger.error(f"Error fetching song {song_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.api_route("/{song_id}/stream", methods=["GET", "HEAD"])
+async def stream_song(song_id: str, request: Request):
+    """Stream a song's audio from the local media cache, with Range and ETag support"""
+    try:
+        song = await db_service.get_song_by_id(song_id)
+        if not song or not song.audio_url:
+            raise HTTPException(status_code=404, detail="Song not found")
+        entry = await media_cache.get(song.audio_url)
+        if entry is None:
+            # Too large to cache locally; let the client fetch it from the bucket
+            return RedirectResponse(song.audio_url, status_code=307)
+        return await media_cache.respond(entry, request, STREAM_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming song {song_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.post("/", response_model=Song)
 async def create_song(song: SongCreate):
     """Create a new song (admin only)"""
@@ -74,7 +127,7 @@ async def create_song(song: SongCreate):
             entity_id=new_song.id,
             entity_name=new_song.title
         )
-        await db_service.log_admin_action(log)
+        audit_log.log(log)
         
         return new_song
     except HTTPException:
@@ -90,34 +143,53 @@ async def create_song_with_files(
     album_id: str = Form(None),
     duration: str = Form(None),
     genre: str = Form(None),
-    audio_file: UploadFile = File(...),
-    cover_image: UploadFile = File(None)
+    audio_file: UploadFile = File(None),
+    cover_image: UploadFile = File(None),
+    audio_upload_id: str = Form(None)
 ):
     """Create a new song with file uploads (admin only)"""
+    # Local copy of the original for the transcoding job
+    source = None
     try:
-        # Upload audio file
-        audio_url = await storage_service.upload_audio_file(audio_file)
+        # Upload audio file, or finish a resumable upload session; either way the
+        # local copy is probed first, so the real duration never needs a download
+        if audio_upload_id:
+            audio_info = await audio_probe.probe_path(upload_sessions.part_path(audio_upload_id))
+            source = await transcoder.stage_path(upload_sessions.part_path(audio_upload_id))
+            audio_url = await upload_sessions.finalize(audio_upload_id)
+        elif audio_file and audio_file.filename:
+            audio_info = await audio_probe.probe_upload(audio_file)
+            source = await transcoder.stage_upload(audio_file)
+            audio_url = await storage_service.upload_audio_file(audio_file)
+        else:
+            raise HTTPException(status_code=400, detail="Either audio_file or audio_upload_id is required")
         
-        # Upload cover image if provided
-        cover_url = None
+        # Upload cover image if provided, with its resized variants
+        cover_url, cover = None, None
         if cover_image and cover_image.filename:
-            cover_url = await storage_service.upload_cover_image(cover_image)
+            cover_url, cover = await cover_images.upload(cover_image)
         
         # Create song object
         song_data = SongCreate(
             title=title,
             artist_id=artist_id,
             album_id=album_id,
-            duration=duration,
             genre=genre,
             audio_url=audio_url,
-            cover_url=cover_url
+            cover_url=cover_url,
+            **image_fields(cover),
+            **song_fields(audio_info, duration)
         )
         
         # Create the song in database
         new_song = await db_service.create_song(song_data)
         if not new_song:
             raise HTTPException(status_code=400, detail="Failed to create song")
+
+        # Renditions are produced in the background; the job now owns the staged copy
+        if source:
+            transcoder.submit(new_song.id, source, duration_ms=new_song.duration_ms)
+            source = None
         
         # Log the admin action
         log = AdminLogCreate(
@@ -126,7 +198,7 @@ async def create_song_with_files(
             entity_id=new_song.id,
             entity_name=new_song.title
         )
-        await db_service.log_admin_action(log)
+        audit_log.log(log)
         
         return new_song
     except HTTPException:
@@ -134,60 +206,92 @@ async def create_song_with_files(
     except Exception as e:
         logger.error(f"Error creating song with files: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        transcoder.discard(source)
+
+@router.get("/{song_id}/waveform")
+async def get_song_waveform(song_id: str, request: Request):
+    """A song's waveform as interleaved int8 (min, max) pairs, one pair per bucket"""
+    try:
+        peaks = await db_service.get_waveform(song_id)
+        if peaks is None:
+            raise HTTPException(status_code=404, detail="Waveform not found")
+        etag = waveform_etag(peaks)
+        headers = {"ETag": etag, "Cache-Control": WAVEFORM_CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=peaks, headers=headers, media_type="application/octet-stream")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching waveform for song {song_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/{song_id}/transcode", response_model=TranscodeJob)
+async def get_transcode_job(song_id: str):
+    """Get the status of a song's latest transcoding job"""
+    job = transcoder.get_job(song_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No transcoding job for this song")
+    return job
+
+@router.post("/{song_id}/transcode", response_model=TranscodeJob, status_code=202)
+async def transcode_song(song_id: str):
+    """Queue a (re)transcode of a song from its stored audio (admin only)"""
+    if not transcoder.enabled:
+        raise HTTPException(status_code=503, detail="Transcoding is not available")
+    try:
+        song = await db_service.get_song_by_id(song_id)
+        if not song or not song.audio_url:
+            raise HTTPException(status_code=404, detail="Song not found")
+        job = transcoder.submit(song.id, song.audio_url, owned=False, duration_ms=song.duration_ms)
+        if job.status == "failed":
+            raise HTTPException(status_code=503, detail=job.error)
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing transcode for song {song_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.put("/{song_id}", response_model=Song)
 async def update_song(song_id: str, song: SongUpdate):
     """Update a song (admin only)"""
     try:
-        # Check if song exists
-        existing_song = await db_service.get_song_by_id(song_id)
-        if not existing_song:
+        # Existence check, update and audit log run as one transaction; a new
+        # audio_url also clears the audio properties derived from the old file
+        result = await db_service.admin_write("song", "update", song_id, song.model_dump(mode="json", exclude_none=True))
+        if not result:
             raise HTTPException(status_code=404, detail="Song not found")
         
-        # Update the song
-        updated_song = await db_service.update_song(song_id, song)
-        if not updated_song:
-            raise HTTPException(status_code=400, detail="Failed to update song")
-        
-        # Log the admin action
-        log = AdminLogCreate(
-            action="update",
-            entity_type="song",
-            entity_id=song_id,
-            entity_name=updated_song.title
-        )
-        await db_service.log_admin_action(log)
-        
-        return updated_song
+        old, updated = result
+        if updated.audio_url != old.audio_url:
+            await _rederive_audio(updated)
+        return updated
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error updating song {song_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+async def _rederive_audio(song: Song):
+    """Drop the old file's waveform and transcode the new one, which stores a new waveform"""
+    try:
+        await db_service.delete_waveform(song.id)
+    except Exception as e:
+        logger.error(f"Error deleting waveform of song {song.id}: {e}")
+    if transcoder.enabled:
+        transcoder.submit(song.id, song.audio_url, owned=False, duration_ms=song.duration_ms)
+
 @router.delete("/{song_id}")
 async def delete_song(song_id: str):
     """Delete a song (admin only)"""
     try:
-        # Check if song exists
-        existing_song = await db_service.get_song_by_id(song_id)
-        if not existing_song:
+        # Existence check, delete and audit log run as one transaction
+        result = await db_service.admin_write("song", "delete", song_id)
+        if not result:
             raise HTTPException(status_code=404, detail="Song not found")
         
-        # Delete the song
-        success = await db_service.delete_song(song_id)
-        if not success:
-            raise HTTPException(status_code=400, detail="Failed to delete song")
-        
-        # Log the admin action
-        log = AdminLogCreate(
-            action="delete",
-            entity_type="song",
-            entity_id=song_id,
-            entity_name=existing_song.title
-        )
-        await db_service.log_admin_action(log)
-        
         return {"message": "Song deleted successfully"}
     except HTTPException:
         raise
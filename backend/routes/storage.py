@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Request
+import asyncio
+import logging
+from services.storage_service import storage_service
+from services.media_cache import file_entry, media_cache
+
+logger = logging.getLogger(__name__)
+
+# The cache lifetime Supabase gives uploaded objects
+STORAGE_CACHE_CONTROL = "public, max-age=3600"
+
+router = APIRouter(prefix="/storage", tags=["storage"])
+
+@router.api_route("/{bucket}/{path:path}", methods=["GET", "HEAD"])
+async def get_object(bucket: str, path: str, request: Request):
+    """Serve an object from the local storage backend, with Range and ETag support"""
+    try:
+        file = storage_service.backend.file_path(bucket, path)
+        if file is None:
+            raise HTTPException(status_code=404, detail="Object not found")
+        entry = await asyncio.to_thread(file_entry, str(file))
+        return await media_cache.respond(entry, request, STORAGE_CACHE_CONTROL)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error serving object {bucket}/{path}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
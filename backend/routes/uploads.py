@@ -1,21 +1,31 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Header, Request, Response
+from typing import Any, Awaitable, Callable, Dict, List
+import asyncio
 import os
 from services.storage_service import storage_service
-from models.models import UploadResponse
+from services.upload_sessions import upload_sessions
+from services.audio_probe import audio_probe
+from services.cover_images import cover_images
+from models.models import UploadResponse, UploadSession, UploadSessionCreate
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
+# Files a batch request uploads at once, and the time limit for each file
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", "4"))
+UPLOAD_TIMEOUT = float(os.environ.get("UPLOAD_TIMEOUT", "120"))
+
 @router.post("/audio", response_model=UploadResponse)
 async def upload_audio_file(file: UploadFile = File(...)):
     """Upload an audio file to Supabase storage"""
     try:
+        audio_info = await audio_probe.probe_upload(file)
         file_url = await storage_service.upload_audio_file(file)
         
         return UploadResponse(
             filename=file.filename,
             url=file_url,
-            message="Audio file uploaded successfully"
+            message="Audio file uploaded successfully",
+            audio=audio_info
         )
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -24,14 +34,15 @@ async def upload_audio_file(file: UploadFile = File(...)):
 
 @router.post("/image", response_model=UploadResponse)
 async def upload_cover_image(file: UploadFile = File(...)):
-    """Upload a cover image to Supabase storage"""
+    """Upload a cover image to Supabase storage, with resized WebP/AVIF variants and a blurhash"""
     try:
-        file_url = await storage_service.upload_cover_image(file)
+        file_url, image = await cover_images.upload(file)
         
         return UploadResponse(
             filename=file.filename,
             url=file_url,
-            message="Cover image uploaded successfully"
+            message="Cover image uploaded successfully",
+            image=image
         )
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -41,21 +52,94 @@ async def upload_cover_image(file: UploadFile = File(...)):
 @router.post("/multiple-images", response_model=List[UploadResponse])
 async def upload_multiple_images(files: List[UploadFile] = File(...)):
     """Upload multiple cover images to Supabase storage"""
-    results = []
-    
-    for file in files:
-        try:
-            file_url = await storage_service.upload_cover_image(file)
-            results.append(UploadResponse(
-                filename=file.filename,
-                url=file_url,
-                message="Cover image uploaded successfully"
-            ))
-        except Exception as e:
-            results.append(UploadResponse(
+    return await _upload_batch(files, _store_image, "Cover image")
+
+@router.post("/multiple-audio", response_model=List[UploadResponse])
+async def upload_multiple_audio(files: List[UploadFile] = File(...)):
+    """Upload multiple audio files to Supabase storage"""
+    return await _upload_batch(files, _store_audio, "Audio file")
+
+async def _store_image(file: UploadFile) -> Dict[str, Any]:
+    file_url, image = await cover_images.upload(file)
+    return {"url": file_url, "image": image}
+
+async def _store_audio(file: UploadFile) -> Dict[str, Any]:
+    return {"url": await storage_service.upload_audio_file(file)}
+
+async def _upload_batch(files: List[UploadFile], upload: Callable[[UploadFile], Awaitable[Dict[str, Any]]], kind: str) -> List[UploadResponse]:
+    """Upload up to UPLOAD_CONCURRENCY files at a time; results keep request order.
+
+    ``upload`` returns the UploadResponse fields for a stored file, at least its url.
+    """
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+    async def upload_one(file: UploadFile) -> UploadResponse:
+        async with semaphore:
+            try:
+                fields = await asyncio.wait_for(upload(file), UPLOAD_TIMEOUT)
+                return UploadResponse(
+                    filename=file.filename,
+                    message=f"{kind} uploaded successfully",
+                    **fields
+                )
+            except asyncio.TimeoutError:
+                message = f"Upload failed: timed out after {UPLOAD_TIMEOUT:g}s"
+            except Exception as e:
+                message = f"Upload failed: {str(e)}"
+            return UploadResponse(
                 filename=file.filename,
                 url="",
-                message=f"Upload failed: {str(e)}"
-            ))
-    
-    return results
\ No newline at end of file
+                message=message
+            )
+
+    return await asyncio.gather(*(upload_one(file) for file in files))
+
+# Resumable uploads: create a session, PATCH the body in pieces at Upload-Offset
+# (HEAD reports where to resume after a dropped connection), then finalize
+@router.post("/sessions", response_model=UploadSession, status_code=201)
+async def create_upload_session(session: UploadSessionCreate, response: Response):
+    """Start a resumable audio upload"""
+    created = upload_sessions.create(session)
+    response.headers["Location"] = f"/api/uploads/sessions/{created.id}"
+    response.headers["Upload-Offset"] = "0"
+    return created
+
+@router.get("/sessions/{session_id}", response_model=UploadSession)
+async def get_upload_session(session_id: str):
+    """Get the offset and length of a resumable upload"""
+    return upload_sessions.get(session_id)
+
+@router.head("/sessions/{session_id}")
+async def head_upload_session(session_id: str):
+    """Report the offset to resume a resumable upload from"""
+    session = upload_sessions.get(session_id)
+    return Response(status_code=200, headers={
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.length),
+        "Cache-Control": "no-store"
+    })
+
+@router.patch("/sessions/{session_id}", status_code=204)
+async def append_upload_session(session_id: str, request: Request, upload_offset: int = Header(..., alias="Upload-Offset")):
+    """Append the request body to a resumable upload at Upload-Offset"""
+    session = await upload_sessions.append(session_id, upload_offset, request.stream())
+    return Response(status_code=204, headers={"Upload-Offset": str(session.offset)})
+
+@router.post("/sessions/{session_id}/finalize", response_model=UploadResponse)
+async def finalize_upload_session(session_id: str):
+    """Move a completed resumable upload into storage"""
+    session = upload_sessions.get(session_id)
+    audio_info = await audio_probe.probe_path(upload_sessions.part_path(session_id))
+    file_url = await upload_sessions.finalize(session_id)
+    return UploadResponse(
+        filename=session.filename,
+        url=file_url,
+        message="Audio file uploaded successfully",
+        audio=audio_info
+    )
+
+@router.delete("/sessions/{session_id}")
+async def cancel_upload_session(session_id: str):
+    """Abandon a resumable upload and delete its partial file"""
+    upload_sessions.delete(session_id)
+    return {"message": "Upload session deleted successfully"}
@@ -7,7 +7,16 @@ import logging
 from pathlib import Path
 
 # Import route modules
-from routes import songs, artists, albums, playlists, admin, uploads, users
+from routes import songs, artists, albums, playlists, admin, uploads, users, search, storage
+from services.database_service import db_service
+from services.search_index import search_index
+from services.suggest_index import suggest_index
+from services.audit_log import audit_log
+from services.storage_service import storage_service
+from services.media_cache import media_cache
+from services.audio_probe import audio_probe
+from services.transcoder import transcoder
+from services.cover_images import cover_images
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -36,6 +45,8 @@ api_router.include_router(playlists.router)
 api_router.include_router(admin.router)
 api_router.include_router(uploads.router)
 api_router.include_router(users.router)
+api_router.include_router(search.router)
+api_router.include_router(storage.router)
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -46,6 +57,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -55,6 +67,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def build_search_index():
+    # Built in the background; search falls back to the database until it is ready
+    search_index.start_background_build(db_service)
+
+@app.on_event("startup")
+async def build_suggest_index():
+    # Typeahead queries the database until this is ready
+    suggest_index.start_background_build(db_service)
+
+@app.on_event("startup")
+async def start_audit_log():
+    # Also replays rows spilled to disk by a previous run
+    audit_log.start()
+
+@app.on_event("startup")
+async def start_transcoder():
+    await transcoder.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Write queued audit rows before the database executor goes away
+    await audit_log.stop()
+    await transcoder.stop()
+    await storage_service.close()
+    await media_cache.close()
     client.close()
+    audio_probe.close()
+    cover_images.close()
+    db_service.close()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import Any, BinaryIO, Dict, Optional, Union
+import httpx
+import mutagen
+from fastapi import UploadFile
+from models.models import AudioInfo, SongUpdate
+from services.concurrency import BlockingExecutor
+from services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+# Probing parses container headers in Python, so it runs on its own small pool
+AUDIO_PROBE_WORKERS = int(os.environ.get("AUDIO_PROBE_WORKERS", "4"))
+# Songs downloaded and probed at once by the backfill job
+AUDIO_BACKFILL_CONCURRENCY = int(os.environ.get("AUDIO_BACKFILL_CONCURRENCY", "4"))
+AUDIO_BACKFILL_TIMEOUT = float(os.environ.get("AUDIO_BACKFILL_TIMEOUT", "120"))
+
+# mutagen file type -> (container, codec when the stream info does not name one)
+CONTAINERS = {
+    "MP3": ("mp3", "mp3"),
+    "EasyMP3": ("mp3", "mp3"),
+    "FLAC": ("flac", "flac"),
+    "MP4": ("mp4", "aac"),
+    "EasyMP4": ("mp4", "aac"),
+    "OggVorbis": ("ogg", "vorbis"),
+    "OggOpus": ("ogg", "opus"),
+    "OggFLAC": ("ogg", "flac"),
+    "OggSpeex": ("ogg", "speex"),
+    "WAVE": ("wav", "pcm"),
+    "AIFF": ("aiff", "pcm"),
+    "ASF": ("asf", "wma"),
+    "AAC": ("aac", "aac"),
+}
+
+def probe_file(source: Union[str, BinaryIO]) -> Optional[AudioInfo]:
+    """Read stream properties from a path or seekable file; None if the format is not recognised"""
+    try:
+        audio = mutagen.File(source)
+    except mutagen.MutagenError as e:
+        logger.warning(f"Could not parse audio file: {e}")
+        return None
+    if audio is None or audio.info is None or not audio.info.length:
+        return None
+
+    info = audio.info
+    container, codec = CONTAINERS.get(type(audio).__name__, (type(audio).__name__.lower(), None))
+    # MP4 names its codec, e.g. "mp4a.40.2" (AAC LC) or "alac"
+    mp4_codec = getattr(info, "codec", None)
+    if isinstance(mp4_codec, str) and mp4_codec:
+        codec = "aac" if mp4_codec.startswith("mp4a.40") else mp4_codec
+    return AudioInfo(
+        duration_ms=round(info.length * 1000),
+        container=container,
+        codec=codec,
+        bitrate=getattr(info, "bitrate", None) or None,
+        sample_rate=getattr(info, "sample_rate", None) or None,
+        channels=getattr(info, "channels", None) or None,
+    )
+
+def format_duration(duration_ms: int) -> str:
+    """Display form of a duration, e.g. "3:20" or "1:02:03\""""
+    minutes, seconds = divmod(round(duration_ms / 1000), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def song_fields(info: Optional[AudioInfo], duration: Optional[str] = None) -> Dict[str, Any]:
+    """Song columns for a probe result; the typed-in duration is kept only when probing failed"""
+    if info is None or info.duration_ms is None:
+        return {"duration": duration}
+    return {**info.model_dump(), "duration": format_duration(info.duration_ms)}
+
+class AudioProbe:
+    """Probes uploaded audio off the event loop.
+
+    Uploads are probed from the local spool (or resumable session file)
+    before they are sent to storage, so the file is never read back from
+    the bucket. Only existing songs are downloaded, by ``backfill``.
+    """
+
+    def __init__(self, max_workers: int = AUDIO_PROBE_WORKERS):
+        self.executor = BlockingExecutor(max_workers=max_workers, name="audio-probe")
+        self.probed = 0
+        self.unrecognised = 0
+        self.seconds = 0.0
+
+    async def _run(self, source) -> Optional[AudioInfo]:
+        started = time.perf_counter()
+        info = await self.executor.run(probe_file, source)
+        self.seconds += time.perf_counter() - started
+        if info is None:
+            self.unrecognised += 1
+        else:
+            self.probed += 1
+        return info
+
+    async def probe_upload(self, file: UploadFile) -> Optional[AudioInfo]:
+        await file.seek(0)
+        try:
+            return await self._run(file.file)
+        finally:
+            await file.seek(0)
+
+    async def probe_path(self, path: str) -> Optional[AudioInfo]:
+        return await self._run(path)
+
+    async def backfill(self, db, force: bool = False, limit: Optional[int] = None,
+                       concurrency: int = AUDIO_BACKFILL_CONCURRENCY) -> Dict[str, int]:
+        """Download and probe songs that have no ``duration_ms`` yet (every song with ``force``)"""
+        semaphore = asyncio.Semaphore(concurrency)
+        counts = {"scanned": 0, "updated": 0, "unrecognised": 0, "failed": 0}
+
+        async with httpx.AsyncClient(timeout=AUDIO_BACKFILL_TIMEOUT, follow_redirects=True) as http:
+            async def one(row: Dict[str, Any]):
+                async with semaphore:
+                    try:
+                        info = await self._probe_url(http, row["audio_url"])
+                        if info is None:
+                            counts["unrecognised"] += 1
+                            return
+                        if await db.update_song(row["id"], SongUpdate(**song_fields(info))) is None:
+                            raise RuntimeError("update failed")
+                        counts["updated"] += 1
+                    except Exception as e:
+                        counts["failed"] += 1
+                        logger.error(f"Error probing song {row['id']}: {e}")
+
+            async for rows in db.iter_table("songs", page_size=100, null_column=None if force else "duration_ms"):
+                rows = [row for row in rows if row.get("audio_url")]
+                if limit is not None:
+                    rows = rows[:limit - counts["scanned"]]
+                counts["scanned"] += len(rows)
+                await asyncio.gather(*(one(row) for row in rows))
+                if limit is not None and counts["scanned"] >= limit:
+                    break
+        logger.info(f"Audio backfill: {counts}")
+        return counts
+
+    async def _probe_url(self, http: httpx.AsyncClient, url: str) -> Optional[AudioInfo]:
+        local = storage_service.local_path(url)
+        if local is not None:
+            return await self.probe_path(local)
+        # Some formats keep their index at the end, so the whole object is fetched to a temp file
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(url.split("?")[0])[1]) as tmp:
+            async with http.stream("GET", url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    await asyncio.to_thread(tmp.write, chunk)
+            await asyncio.to_thread(tmp.flush)
+            return await self.probe_path(tmp.name)
+
+    def metrics(self) -> dict:
+        return {
+            "probed": self.probed,
+            "unrecognised": self.unrecognised,
+            "seconds": round(self.seconds, 3),
+            "executor": self.executor.metrics(),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+# Singleton instance
+audio_probe = AudioProbe()
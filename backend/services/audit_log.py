@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from models.models import AdminLogCreate
+from services.database_service import db_service
+
+logger = logging.getLogger(__name__)
+
+AUDIT_LOG_QUEUE_SIZE = int(os.environ.get("AUDIT_LOG_QUEUE_SIZE", "10000"))
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get("AUDIT_LOG_BATCH_SIZE", "100"))
+# Seconds a partial batch may wait before it is written
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get("AUDIT_LOG_FLUSH_INTERVAL", "1.0"))
+# Append-only NDJSON file for batches the database rejected; empty disables spilling
+AUDIT_LOG_SPILL_PATH = os.environ.get(
+    "AUDIT_LOG_SPILL_PATH", str(Path(__file__).parent.parent / "audit_log_spill.ndjson")
+)
+
+class AuditLogWriter:
+    """Bounded queue of admin log rows, bulk-inserted by a background task.
+
+    ``log`` never waits on the database: rows are queued (or counted as
+    dropped when the queue is full) and written in batches of up to
+    ``batch_size`` once a batch fills or ``flush_interval`` passes. Batches
+    that fail to insert are appended to the spill file and replayed on the
+    next start; ``stop`` drains the queue before shutdown.
+    """
+
+    def __init__(
+        self,
+        insert: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        queue_size: int = AUDIT_LOG_QUEUE_SIZE,
+        batch_size: int = AUDIT_LOG_BATCH_SIZE,
+        flush_interval: float = AUDIT_LOG_FLUSH_INTERVAL,
+        spill_path: Optional[str] = AUDIT_LOG_SPILL_PATH,
+    ):
+        self._insert = insert
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.failures = 0
+        self.last_flush_seconds: Optional[float] = None
+
+    def _get_queue(self) -> asyncio.Queue:
+        # Created lazily so the queue belongs to the running loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    def log(self, log: AdminLogCreate) -> bool:
+        """Queue an audit row; returns False if it was dropped because the queue is full"""
+        row = log.model_dump()
+        # Stamp now so batching delay does not shift the recorded time
+        row["timestamp"] = datetime.now(timezone.utc).isoformat()
+        try:
+            self._get_queue().put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Audit log queue full, dropped {log.action} {log.entity_type} {log.entity_id}")
+            return False
+        self.enqueued += 1
+        return True
+
+    # Lifecycle
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        """Stop the background task and write everything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        """Write all queued rows now"""
+        queue = self._get_queue()
+        while not queue.empty():
+            batch = [queue.get_nowait() for _ in range(min(self.batch_size, queue.qsize()))]
+            await self._write(batch)
+
+    async def _run(self):
+        await self._replay_spill()
+        queue = self._get_queue()
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Rows already taken off the queue still get written
+                await self._write(batch)
+                raise
+            await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            await self._insert(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Error writing {len(batch)} audit log rows: {e}")
+            await self._spill(batch)
+        finally:
+            self.last_flush_seconds = time.perf_counter() - started
+
+    # Spill file
+    async def _spill(self, batch: List[Dict[str, Any]]):
+        if self.spill_path is None:
+            self.dropped += len(batch)
+            return
+        try:
+            await asyncio.to_thread(self._append_spill, batch)
+            self.spilled += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.error(f"Error spilling audit log rows to {self.spill_path}: {e}")
+
+    def _append_spill(self, batch: List[Dict[str, Any]]):
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for row in batch:
+                f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _replay_spill(self):
+        """Re-insert rows spilled by earlier runs; failures are spilled again.
+
+        The spill file is first renamed to a unique ``.replay-*`` name, and
+        replay files left behind by a run that stopped mid-replay are retried
+        along with it, oldest first.
+        """
+        if self.spill_path is None:
+            return
+        if self.spill_path.exists():
+            try:
+                self.spill_path.replace(self.spill_path.with_name(f"{self.spill_path.name}.replay-{time.time_ns()}"))
+            except OSError as e:
+                logger.error(f"Error moving audit log spill file aside: {e}")
+        for replaying in sorted(self.spill_path.parent.glob(f"{self.spill_path.name}.replay*")):
+            try:
+                text = await asyncio.to_thread(replaying.read_text, encoding="utf-8")
+                rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+            except Exception as e:
+                logger.error(f"Error reading audit log spill file {replaying}: {e}")
+                continue
+            for i in range(0, len(rows), self.batch_size):
+                await self._write(rows[i:i + self.batch_size])
+            self.replayed += len(rows)
+            replaying.unlink(missing_ok=True)
+            logger.info(f"Replayed {len(rows)} spilled audit log rows from {replaying.name}")
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "failures": self.failures,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+# Singleton instance
+audit_log = AuditLogWriter(db_service.insert_admin_logs)
@@ -0,0 +1,133 @@
+import sys
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(value: Any) -> int:
+    """Rough byte size of a cached value, used for the cache's memory budget"""
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "tags", "size")
+
+    def __init__(self, value: Any, expires_at: float, tags: Set[str], size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+        self.size = size
+
+class TTLCache:
+    """Bounded in-process LRU cache with per-entry TTLs and tag invalidation.
+
+    Every entry carries a set of tags (e.g. ``artist:<id>``) so a write can
+    evict all keys that embed the changed entity. ``generation`` increases on
+    every invalidation; ``set`` drops values loaded before the latest
+    invalidation so a slow read cannot re-insert stale data.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self.size_bytes = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry.value
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = (), generation: Optional[int] = None):
+        if not self.enabled or ttl <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        entry = _Entry(value, time.monotonic() + ttl, set(tags), estimate_size(value))
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.size_bytes += entry.size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: str):
+        self.generation += 1
+        if key in self._entries:
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Evict every entry carrying any of ``tags``; returns the number evicted"""
+        self.generation += 1
+        keys = set()
+        for tag in tags:
+            keys |= self._tags.get(tag, set())
+        for key in keys:
+            self._remove(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._tags.clear()
+        self.size_bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size_bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
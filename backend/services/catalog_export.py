@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per keyset page; only one page is held in memory at a time
+EXPORT_PAGE_SIZE = int(os.environ.get("EXPORT_PAGE_SIZE", "1000"))
+
+# Export entity name -> table sort column
+EXPORT_TABLES = {
+    "artists": "created_at",
+    "albums": "created_at",
+    "songs": "created_at",
+    "playlists": "created_at",
+    "playlist_songs": "created_at",
+}
+
+def _ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+
+def _csv_value(value: Any) -> Any:
+    # JSONB columns go out as JSON text rather than Python reprs
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+class _CsvEncoder:
+    """Encodes pages of rows as CSV, taking the header from the first page"""
+
+    def __init__(self):
+        self.fields: Optional[List[str]] = None
+
+    def __call__(self, rows: List[Dict[str, Any]]) -> bytes:
+        buffer = io.StringIO()
+        if self.fields is None:
+            self.fields = list(rows[0].keys())
+            writer = csv.DictWriter(buffer, fieldnames=self.fields, extrasaction="ignore")
+            writer.writeheader()
+        else:
+            writer = csv.DictWriter(buffer, fieldnames=self.fields, extrasaction="ignore")
+        writer.writerows({name: _csv_value(value) for name, value in row.items()} for row in rows)
+        return buffer.getvalue().encode("utf-8")
+
+async def export_stream(db, entity: str, fmt: str = "ndjson", compress: bool = False,
+                        page_size: int = EXPORT_PAGE_SIZE) -> AsyncIterator[bytes]:
+    """Stream a table as NDJSON or CSV bytes, optionally gzip-compressed"""
+    encode = _ndjson if fmt == "ndjson" else _CsvEncoder()
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    exported = 0
+    try:
+        async for rows in db.iter_table(entity, page_size=page_size, column=EXPORT_TABLES[entity]):
+            data = encode(rows)
+            exported += len(rows)
+            if gzip is not None:
+                data = gzip.compress(data)
+            if data:
+                yield data
+    except Exception as e:
+        # The status line is already sent, so a failure can only truncate the body;
+        # the gzip trailer is withheld so compressed dumps fail their integrity check
+        logger.error(f"Error exporting {entity} after {exported} rows: {e}")
+        raise
+    if gzip is not None:
+        yield gzip.flush()
+    logger.info(f"Exported {exported} {entity}")
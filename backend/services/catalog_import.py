@@ -0,0 +1,242 @@
+import csv
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union, get_args, get_origin
+from pydantic import ValidationError
+from models.models import (
+    ArtistCreate, AlbumCreate, SongCreate, PlaylistCreate, PlaylistSongCreate,
+    ImportResult, ImportRowError
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", "500"))
+# Per-row errors returned in the response; failures beyond this are only counted
+IMPORT_MAX_ERRORS = int(os.environ.get("IMPORT_MAX_ERRORS", "1000"))
+
+# Import entity name -> (DatabaseService entity type, create model)
+IMPORT_ENTITIES = {
+    "artists": ("artist", ArtistCreate),
+    "albums": ("album", AlbumCreate),
+    "songs": ("song", SongCreate),
+    "playlists": ("playlist", PlaylistCreate),
+    "playlist_songs": ("playlist_song", PlaylistSongCreate),
+}
+
+Record = Union[Dict[str, Any], Exception]
+
+def _json_fields(model) -> set:
+    """Dict and list fields, which CSV carries as JSON text"""
+    fields = set()
+    for name, field in model.model_fields.items():
+        types = get_args(field.annotation) if get_origin(field.annotation) is Union else (field.annotation,)
+        if any(get_origin(t) in (dict, list) for t in types):
+            fields.add(name)
+    return fields
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering more than one line"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str = "ndjson") -> AsyncIterator[Tuple[int, Record]]:
+    """Yield (line number, record) pairs; unparseable rows come through as the exception"""
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if line_no == 1:
+            line = line.lstrip("\ufeff")
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Expected a JSON object")
+                yield line_no, record
+            except ValueError as e:
+                yield line_no, e
+            continue
+
+        # CSV: a quoted field may span lines, so wait until the quotes balance
+        pending.append(line)
+        text = "\n".join(pending)
+        if text.count('"') % 2:
+            continue
+        start = line_no - len(pending) + 1
+        pending = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        # Empty CSV cells mean "not set"
+        yield start, {name: value for name, value in zip(header, values) if value != ""}
+    if pending:
+        yield line_no - len(pending) + 1, ValueError("Unterminated quoted field")
+
+class CatalogImporter:
+    """Chunked bulk import of one entity type with natural-key resolution.
+
+    Rows may reference parents by id (``artist_id``) or by natural key:
+    ``artist`` (name), ``album`` (title, within the row's artist),
+    ``playlist`` (name) and ``song`` (title, with ``artist``). Keys are
+    resolved once per chunk with batched lookups and remembered for the rest
+    of the import, including parents created earlier in the same run. Each
+    chunk is one multi-row insert; if it fails, its rows are retried one by
+    one so a bad row is reported without losing the rest.
+    """
+
+    def __init__(self, db, entity: str, chunk_size: int = IMPORT_CHUNK_SIZE, max_errors: int = IMPORT_MAX_ERRORS):
+        self.db = db
+        self.entity = entity
+        self.entity_type, self.model = IMPORT_ENTITIES[entity]
+        self._json_fields = _json_fields(self.model)
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        # ("artist", name), ("album", artist_id, title), ("song", artist_id, title), ("playlist", name) -> id
+        self._ids: Dict[tuple, str] = {}
+        self._checked: set = set()
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[ImportRowError] = []
+
+    async def run(self, records: AsyncIterator[Tuple[int, Record]]) -> ImportResult:
+        started = time.perf_counter()
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        async for line, record in records:
+            self.received += 1
+            if isinstance(record, Exception):
+                self._error(line, record)
+                continue
+            chunk.append((line, record))
+            if len(chunk) >= self.chunk_size:
+                await self._flush(chunk)
+                chunk = []
+        if chunk:
+            await self._flush(chunk)
+
+        seconds = time.perf_counter() - started
+        logger.info(f"Imported {self.inserted}/{self.received} {self.entity} in {seconds:.2f}s ({self.failed} failed)")
+        return ImportResult(
+            entity=self.entity,
+            received=self.received,
+            inserted=self.inserted,
+            failed=self.failed,
+            errors=sorted(self.errors, key=lambda e: e.line),
+            seconds=round(seconds, 3),
+            rows_per_second=round(self.inserted / seconds, 1) if seconds > 0 else 0.0
+        )
+
+    def _error(self, line: int, error: Exception):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            if isinstance(error, ValidationError):
+                message = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+            else:
+                message = str(error)
+            self.errors.append(ImportRowError(line=line, error=message))
+
+    async def _flush(self, chunk: List[Tuple[int, Dict[str, Any]]]):
+        try:
+            await self._resolve([record for _, record in chunk])
+        except Exception as e:
+            for line, _ in chunk:
+                self._error(line, e)
+            return
+
+        rows: List[Tuple[int, Dict[str, Any]]] = []
+        for line, record in chunk:
+            try:
+                rows.append((line, self._build(record)))
+            except (ValueError, ValidationError) as e:
+                self._error(line, e)
+        if not rows:
+            return
+
+        try:
+            self._remember(await self.db.import_rows(self.entity_type, [row for _, row in rows]))
+            self.inserted += len(rows)
+        except Exception as e:
+            logger.warning(f"Import chunk of {len(rows)} {self.entity} failed, retrying row by row: {e}")
+            for line, row in rows:
+                try:
+                    self._remember(await self.db.import_rows(self.entity_type, [row]))
+                    self.inserted += 1
+                except Exception as row_error:
+                    self._error(line, row_error)
+
+    # Natural keys
+    async def _resolve(self, records: List[Dict[str, Any]]):
+        """Look up every natural key in the chunk that is not known yet"""
+        if self.entity_type in ("album", "song", "playlist_song"):
+            await self._lookup("artist", "artists", "name", {r["artist"] for r in records if r.get("artist") and not r.get("artist_id")})
+        if self.entity_type == "song":
+            await self._lookup("album", "albums", "title", {r["album"] for r in records if r.get("album") and not r.get("album_id")})
+        if self.entity_type == "playlist_song":
+            await self._lookup("playlist", "playlists", "name", {r["playlist"] for r in records if r.get("playlist") and not r.get("playlist_id")})
+            await self._lookup("song", "songs", "title", {r["song"] for r in records if r.get("song") and not r.get("song_id")})
+
+    async def _lookup(self, kind: str, table: str, column: str, values: set):
+        missing = [value for value in values if (kind, value) not in self._checked]
+        if not missing:
+            return
+        columns = f"id, {column}" if kind in ("artist", "playlist") else f"id, {column}, artist_id"
+        for row in await self.db.lookup_rows(table, column, missing, columns):
+            self._remember_row(kind, row)
+        self._checked.update((kind, value) for value in missing)
+
+    def _remember_row(self, kind: str, row: Dict[str, Any]):
+        if kind in ("artist", "playlist"):
+            key = (kind, row["name"])
+        else:
+            key = (kind, row["artist_id"], row["title"])
+        # Names are not unique; the oldest row wins
+        self._ids.setdefault(key, row["id"])
+
+    def _remember(self, created: List[Any]):
+        if self.entity_type in ("artist", "album", "song", "playlist"):
+            for item in created:
+                self._remember_row(self.entity_type, item.model_dump())
+
+    def _id(self, record: Dict[str, Any], field: str, key: tuple) -> Optional[str]:
+        if record.get(f"{field}_id"):
+            return record[f"{field}_id"]
+        if not record.get(field):
+            return None
+        found = self._ids.get(key)
+        if found is None:
+            raise ValueError(f"Unknown {field} '{record[field]}'")
+        return found
+
+    def _build(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve references and validate a record into an insertable row"""
+        fields = {name: record[name] for name in self.model.model_fields if name in record}
+        for name in self._json_fields & fields.keys():
+            if isinstance(fields[name], str):
+                fields[name] = json.loads(fields[name])
+        if self.entity_type in ("album", "song"):
+            fields["artist_id"] = self._id(record, "artist", ("artist", record.get("artist")))
+        if self.entity_type == "song":
+            fields["album_id"] = self._id(record, "album", ("album", fields["artist_id"], record.get("album")))
+        if self.entity_type == "playlist_song":
+            artist_id = self._id(record, "artist", ("artist", record.get("artist")))
+            fields["playlist_id"] = self._id(record, "playlist", ("playlist", record.get("playlist")))
+            fields["song_id"] = self._id(record, "song", ("song", artist_id, record.get("song")))
+        return self.model(**fields).model_dump(mode="json", exclude_none=True)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class BlockingExecutor:
+    """Run blocking calls (e.g. supabase-py ``.execute()``) off the event loop.
+
+    Calls are handed to a dedicated thread pool, and a semaphore caps how many
+    may be in flight at once so a slow backend applies backpressure instead of
+    growing an unbounded queue of waiting threads. With ``processes`` the pool
+    is a process pool instead, for CPU-bound work that holds the GIL; ``fn``
+    and its arguments must then be picklable.
+    """
+
+    def __init__(self, max_workers: int = 16, max_concurrency: Optional[int] = None, name: str = "blocking",
+                 processes: bool = False):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.name = name
+        self.processes = processes
+        if processes:
+            # Spawned rather than forked: the server process has live threads and sockets
+            self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.completed = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore belongs to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` in the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        async with self._get_semaphore():
+            self.in_flight += 1
+            try:
+                return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def metrics(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "processes": self.processes,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+        }
+
+    def shutdown(self, wait: bool = True):
+        logger.info(f"Shutting down {self.name} executor")
+        self._pool.shutdown(wait=wait)
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one in-flight backend call.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and share its result or exception.
+    The task is shielded, so a cancelled caller does not cancel the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.collapsed += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def metrics(self) -> dict:
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._inflight),
+        }
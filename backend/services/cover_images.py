@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from fastapi import UploadFile
+from models.models import AlbumUpdate, ArtistUpdate, ImageVariants, PlaylistUpdate, SongUpdate
+from services.concurrency import BlockingExecutor
+from services.image_variants import COVER_QUALITY, COVER_WIDTHS, FORMATS, render_variants, supported_formats
+from services.storage_service import MAX_IMAGE_UPLOAD_BYTES, storage_service
+
+logger = logging.getLogger(__name__)
+
+# Decoding and resizing hold the GIL, so they run in worker processes
+COVER_WORKERS = int(os.environ.get("COVER_WORKERS", "2"))
+# Scratch space for staged originals and rendered derivatives
+COVER_DIR = os.environ.get("COVER_DIR", str(Path(__file__).parent.parent / "covers"))
+# Derivatives of one image uploaded at once
+COVER_UPLOAD_CONCURRENCY = int(os.environ.get("COVER_UPLOAD_CONCURRENCY", "4"))
+COVER_BACKFILL_TIMEOUT = float(os.environ.get("COVER_BACKFILL_TIMEOUT", "60"))
+
+# Table -> (image column prefix, update model, db_service update method)
+COVER_TABLES = {
+    "albums": ("cover", AlbumUpdate, "update_album"),
+    "songs": ("cover", SongUpdate, "update_song"),
+    "playlists": ("cover", PlaylistUpdate, "update_playlist"),
+    "artists": ("avatar", ArtistUpdate, "update_artist"),
+}
+
+def image_fields(variants: Optional[ImageVariants], prefix: str = "cover") -> Dict[str, Any]:
+    """Row columns for derived images, e.g. cover_srcset and cover_blurhash"""
+    if variants is None:
+        return {}
+    return {f"{prefix}_srcset": variants.srcset, f"{prefix}_blurhash": variants.blurhash}
+
+class CoverImages:
+    """Builds responsive derivatives of cover images.
+
+    Each image is decoded once in a worker process, which writes every
+    configured width in every supported format plus a blurhash. The files
+    are uploaded like any other image, so they are content-addressed and
+    re-uploading a cover stores nothing new. Failures are logged and
+    yield None: the original cover is always usable on its own.
+    """
+
+    def __init__(self, storage, workers: int = COVER_WORKERS, directory: str = COVER_DIR):
+        self.storage = storage
+        self.directory = Path(directory)
+        self.formats = supported_formats()
+        self.executor = BlockingExecutor(max_workers=workers, name="cover-images", processes=True)
+        self.derived = 0
+        self.failed = 0
+        self.files = 0
+        self.seconds = 0.0
+
+    async def upload(self, file: UploadFile) -> Tuple[str, Optional[ImageVariants]]:
+        """Store an uploaded cover and derive its images concurrently; returns (url, variants)"""
+        if not file.content_type or not file.content_type.startswith("image/"):
+            # Rejected by storage; nothing to render
+            return await self.storage.upload_cover_image(file), None
+        # The worker reads its own copy, so the original can stream from the spool meanwhile
+        staged = self.directory / f"{uuid.uuid4()}.src"
+
+        def copy():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(staged, "wb") as out:
+                shutil.copyfileobj(file.file, out, 1024 * 1024)
+
+        await file.seek(0)
+        try:
+            await asyncio.to_thread(copy)
+            await file.seek(0)
+            url, variants = await asyncio.gather(
+                self.storage.upload_cover_image(file), self.derive_path(str(staged)), return_exceptions=True
+            )
+        finally:
+            await asyncio.to_thread(staged.unlink, True)
+        if isinstance(url, BaseException):
+            raise url
+        return url, variants if isinstance(variants, ImageVariants) else None
+
+    async def derive_path(self, source: str) -> Optional[ImageVariants]:
+        workdir = self.directory / str(uuid.uuid4())
+        started = time.perf_counter()
+        try:
+            result = await self.executor.run(render_variants, source, str(workdir), COVER_WIDTHS, self.formats, COVER_QUALITY)
+            semaphore = asyncio.Semaphore(COVER_UPLOAD_CONCURRENCY)
+
+            async def upload(name: str, width: int, path: str) -> str:
+                async with semaphore:
+                    return await self.storage.upload_local_file(
+                        path, os.path.basename(path), FORMATS[name][3],
+                        bucket="cover-images", max_bytes=MAX_IMAGE_UPLOAD_BYTES
+                    )
+
+            urls = await asyncio.gather(*(upload(*entry) for entry in result["files"]))
+            srcset: Dict[str, str] = {}
+            for (name, width, _), url in zip(result["files"], urls):
+                srcset[name] = f"{srcset[name]}, {url} {width}w" if name in srcset else f"{url} {width}w"
+            self.derived += 1
+            self.files += len(urls)
+            self.seconds += time.perf_counter() - started
+            return ImageVariants(width=result["width"], height=result["height"], blurhash=result["blurhash"], srcset=srcset)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error deriving cover images: {e}")
+            return None
+        finally:
+            await asyncio.to_thread(shutil.rmtree, workdir, True)
+
+    async def backfill(self, db, force: bool = False, limit: Optional[int] = None) -> Dict[str, int]:
+        """Derive images for catalog rows that have a cover but no srcset (every row with ``force``)"""
+        semaphore = asyncio.Semaphore(self.executor.max_workers)
+        counts = {"scanned": 0, "updated": 0, "failed": 0}
+        # Songs usually share their album's cover, so each URL is rendered once per run
+        derived: Dict[str, asyncio.Task] = {}
+
+        async with httpx.AsyncClient(timeout=COVER_BACKFILL_TIMEOUT, follow_redirects=True) as http:
+            async def derive_url(url: str) -> Optional[ImageVariants]:
+                async with semaphore:
+                    local = self.storage.local_path(url)
+                    if local is not None:
+                        return await self.derive_path(local)
+                    with tempfile.NamedTemporaryFile(dir=self.directory) as tmp:
+                        try:
+                            async with http.stream("GET", url) as response:
+                                response.raise_for_status()
+                                async for chunk in response.aiter_bytes():
+                                    await asyncio.to_thread(tmp.write, chunk)
+                            await asyncio.to_thread(tmp.flush)
+                        except httpx.HTTPError as e:
+                            logger.error(f"Error downloading cover {url}: {e}")
+                            return None
+                        return await self.derive_path(tmp.name)
+
+            async def one(table: str, row: Dict[str, Any]):
+                prefix, update_model, update = COVER_TABLES[table]
+                url = row[f"{prefix}_url"]
+                if url not in derived:
+                    derived[url] = asyncio.ensure_future(derive_url(url))
+                variants = await derived[url]
+                try:
+                    if variants is None:
+                        raise RuntimeError("could not derive images")
+                    changes = update_model(**image_fields(variants, prefix))
+                    if await getattr(db, update)(row["id"], changes) is None:
+                        raise RuntimeError("update failed")
+                    counts["updated"] += 1
+                except Exception as e:
+                    counts["failed"] += 1
+                    logger.error(f"Error updating cover of {table} {row['id']}: {e}")
+
+            await asyncio.to_thread(self.directory.mkdir, parents=True, exist_ok=True)
+            for table, (prefix, _, _) in COVER_TABLES.items():
+                async for rows in db.iter_table(table, page_size=100, null_column=None if force else f"{prefix}_srcset"):
+                    rows = [row for row in rows if row.get(f"{prefix}_url")]
+                    if limit is not None:
+                        rows = rows[:limit - counts["scanned"]]
+                    counts["scanned"] += len(rows)
+                    await asyncio.gather(*(one(table, row) for row in rows))
+                    if limit is not None and counts["scanned"] >= limit:
+                        break
+                if limit is not None and counts["scanned"] >= limit:
+                    break
+        logger.info(f"Cover backfill: {counts}")
+        return counts
+
+    def metrics(self) -> dict:
+        return {
+            "formats": self.formats,
+            "widths": COVER_WIDTHS,
+            "derived": self.derived,
+            "failed": self.failed,
+            "files": self.files,
+            "seconds": round(self.seconds, 3),
+            "executor": self.executor.metrics(),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+# Singleton instance
+cover_images = CoverImages(storage_service)
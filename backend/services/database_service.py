@@ -1,40 +1,258 @@
 from database.supabase_client import get_supabase_client, get_supabase_admin
 from models.models import *
-from typing import List, Optional, Dict, Any
+from services.concurrency import BlockingExecutor, SingleFlight
+from services.cache_service import TTLCache
+from services.search_index import search_index
+from services.suggest_index import SUGGEST_SOURCES, SuggestIndex, suggest_index
+from services.text_utils import tokenize
+from services.pagination import Cursor, FIRST_PAGE, keyset_filter
+from postgrest.types import ReturnMethod
+from typing import AsyncIterator, List, Optional, Dict, Any, Set, Tuple
+import asyncio
 import logging
+import os
+import time
+import uuid
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# supabase-py is synchronous, so every query runs on a bounded worker pool
+DB_MAX_WORKERS = int(os.environ.get("DB_MAX_WORKERS", "16"))
+DB_MAX_CONCURRENCY = int(os.environ.get("DB_MAX_CONCURRENCY", str(DB_MAX_WORKERS)))
+# Seconds the admin dashboard counts may be served from memory (0 disables)
+STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", "10"))
+
+# Read-through catalog cache; CATALOG_CACHE_MAX_ENTRIES=0 disables it
+CATALOG_CACHE_MAX_ENTRIES = int(os.environ.get("CATALOG_CACHE_MAX_ENTRIES", "10000"))
+CATALOG_CACHE_MAX_BYTES = int(os.environ.get("CATALOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTLS = {
+    "artist": float(os.environ.get("CACHE_TTL_ARTIST", "300")),
+    "album": float(os.environ.get("CACHE_TTL_ALBUM", "300")),
+    "song": float(os.environ.get("CACHE_TTL_SONG", "120")),
+    "playlist": float(os.environ.get("CACHE_TTL_PLAYLIST", "60")),
+}
+
+# Embeds shared by reads and by writes that return their row (return=representation)
+ALBUM_COLUMNS = "*, artist:artists(*)"
+SONG_COLUMNS = "*, artist:artists(*), album:albums(*)"
+PLAYLIST_COLUMNS = "*, playlist_songs(order_index, song:songs(*, artist:artists(*), album:albums(*)))"
+
+# (table, select) returned by bulk imports, hydrated like the single-row writes
+IMPORT_TABLES = {
+    "artist": ("artists", "*"),
+    "album": ("albums", ALBUM_COLUMNS),
+    "song": ("songs", SONG_COLUMNS),
+    "playlist": ("playlists", "*"),
+}
+# Values per in.(...) filter, keeping natural-key lookup URLs short
+LOOKUP_BATCH_SIZE = 100
+ENTITY_MODELS = {"artist": Artist, "album": Album, "song": Song, "playlist": Playlist}
+# List pages that can contain a deleted row, directly or through cascades
+DELETE_INVALIDATES = {
+    "artist": ("list:artist", "list:album", "list:song", "list:playlist"),
+    "album": ("list:album",),
+    # Playlist pages carry song counts, so they go too
+    "song": ("list:song", "list:playlist"),
+    "playlist": ("list:playlist",),
+}
+
+def _is_uuid(value: str) -> bool:
+    return _canonical_uuid(value) is not None
+
+def _canonical_uuid(value: str) -> Optional[str]:
+    """The lowercase hyphenated form ids come back from the database in, or None if not a UUID"""
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        return None
+
+def entity_tags(value: Any) -> Set[str]:
+    """Cache tags for a catalog value: its own id plus every entity it embeds"""
+    if isinstance(value, list):
+        tags = set()
+        for item in value:
+            tags |= entity_tags(item)
+        return tags
+    if isinstance(value, Artist):
+        return {f"artist:{value.id}"}
+    if isinstance(value, Album):
+        return {f"album:{value.id}", f"artist:{value.artist_id}"}
+    if isinstance(value, Song):
+        tags = {f"song:{value.id}", f"artist:{value.artist_id}"}
+        if value.album_id:
+            tags.add(f"album:{value.album_id}")
+        return tags
+    if isinstance(value, Playlist):
+        return {f"playlist:{value.id}"} | entity_tags(value.songs or [])
+    return set()
+
+def playlist_from_row(row: Dict[str, Any]) -> Playlist:
+    """Build a Playlist from a row selected with PLAYLIST_COLUMNS"""
+    entries = sorted(row.pop('playlist_songs', None) or [], key=lambda ps: ps.get('order_index') or 0)
+    songs = [Song(**ps['song']) for ps in entries if ps.get('song')]
+    return Playlist(**row, songs=songs, song_count=len(songs), duration_ms=sum(song.duration_ms or 0 for song in songs))
+
+def playlist_from_count_row(row: Dict[str, Any]) -> Playlist:
+    """Build a Playlist from a row selected with a ``playlist_songs(count)`` embed"""
+    counts = row.pop('playlist_songs', None) or [{}]
+    return Playlist(**row, song_count=counts[0].get('count', 0))
+
+# (table, select, row -> model) for scanning whole entity tables, hydrated like the list calls
+CATALOG_TABLES = {
+    "artist": ("artists", "*", lambda row: Artist(**row)),
+    "album": ("albums", ALBUM_COLUMNS, lambda row: Album(**row)),
+    "song": ("songs", SONG_COLUMNS, lambda row: Song(**row)),
+    "playlist": ("playlists", "*, playlist_songs(count)", playlist_from_count_row),
+}
+
 class DatabaseService:
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: int = DB_MAX_WORKERS,
+        max_concurrency: int = DB_MAX_CONCURRENCY,
+        cache: Optional[TTLCache] = None,
+    ):
         self.supabase = get_supabase_client()
         self.supabase_admin = get_supabase_admin()
+        self.executor = BlockingExecutor(max_workers=max_workers, max_concurrency=max_concurrency, name="supabase")
+        self.round_trips = 0
+        self.stats_ttl = STATS_CACHE_TTL
+        self._stats_cache: Optional[Tuple[float, StatsResponse]] = None
+        self.cache = cache if cache is not None else TTLCache(CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_MAX_BYTES)
+        self.cache_ttls = dict(CACHE_TTLS)
+        self.singleflight = SingleFlight()
+
+    async def _execute(self, query):
+        """Execute a PostgREST query builder without blocking the event loop"""
+        self.round_trips += 1
+        return await self.executor.run(query.execute)
+
+    async def _read(self, key: str, entity: str, loader, list_page: bool = False):
+        """Serve a read from the cache, falling back to ``loader`` on a miss.
+
+        Concurrent misses for the same key share one backend call. Flights are
+        keyed by cache generation too, so a reader arriving after a write never
+        joins a load that started before it. ``None`` results are not cached.
+        List pages are additionally tagged ``list:<entity>`` so creates and
+        deletes can drop every page at once.
+        """
+        hit, value = self.cache.get(key)
+        if hit:
+            return value
+        generation = self.cache.generation
+
+        async def load():
+            # Only the leader caches, with the generation its load started in
+            value = await loader()
+            if value is not None:
+                tags = entity_tags(value)
+                if list_page:
+                    tags.add(f"list:{entity}")
+                self.cache.set(key, value, ttl=self.cache_ttls[entity], tags=tags, generation=generation)
+            return value
+
+        return await self.singleflight.do(f"{key}@{generation}", load)
+
+    @staticmethod
+    def _page(query, limit: int, offset: int, after: Optional[Cursor], column: str = "created_at"):
+        """Apply keyset pagination when a cursor is given, else the legacy offset range"""
+        if after is None:
+            return query.range(offset, offset + limit - 1)
+        if after != FIRST_PAGE:
+            query = query.or_(keyset_filter(column, after))
+        return query.order(column, desc=True).order("id", desc=True).limit(limit)
+
+    def _invalidate(self, *tags: str):
+        self.cache.invalidate_tags(*tags)
+
+    def _indexed(self, entity_type: str, value):
+        """Feed a freshly written entity to the in-memory search and suggest indexes"""
+        if value is not None:
+            search_index.upsert(entity_type, value)
+            suggest_index.upsert(entity_type, value)
+        return value
+
+    def _unindexed(self, entity_type: str, entity_id: str):
+        search_index.remove(entity_type, entity_id)
+        suggest_index.remove(entity_type, entity_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "round_trips": self.round_trips,
+            "executor": self.executor.metrics(),
+            "cache": self.cache.metrics(),
+            "singleflight": self.singleflight.metrics(),
+            "search_index": search_index.metrics(),
+            "suggest_index": suggest_index.metrics(),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def _get_many(self, entity: str, table: str, columns: str, ids: List[str], build) -> Tuple[List[Any], List[str]]:
+        """Load many rows by id: cache hits first, then one ``in.(...)`` query for the rest.
+
+        Returns the found entities in request order (duplicates collapsed,
+        including differently written forms of one UUID) and the requested
+        ids that do not exist. Database errors propagate.
+        """
+        wanted = list(dict.fromkeys(ids))
+        keys = {entity_id: _canonical_uuid(entity_id) for entity_id in wanted}
+        unique = [key for key in dict.fromkeys(keys.values()) if key is not None]
+        found: Dict[str, Any] = {}
+        to_fetch = []
+        for key in unique:
+            hit, value = self.cache.get(f"{entity}:{key}")
+            if hit:
+                found[key] = value
+            else:
+                to_fetch.append(key)
+
+        if to_fetch:
+            generation = self.cache.generation
+            result = await self._execute(self.supabase.table(table).select(columns).in_("id", to_fetch))
+            for row in result.data:
+                value = build(row)
+                found[value.id] = value
+                self.cache.set(f"{entity}:{value.id}", value, ttl=self.cache_ttls[entity], tags=entity_tags(value), generation=generation)
+
+        return [found[key] for key in unique if key in found], [i for i in wanted if keys[i] not in found]
 
     # Artists
-    async def get_artists(self, limit: int = 100, offset: int = 0) -> List[Artist]:
-        try:
-            result = self.supabase.table("artists").select("*").range(offset, offset + limit - 1).execute()
+    async def get_artists(self, limit: int = 100, offset: int = 0, after: Optional[Cursor] = None) -> List[Artist]:
+        async def load():
+            result = await self._execute(self._page(self.supabase.table("artists").select("*"), limit, offset, after))
             return [Artist(**artist) for artist in result.data]
+
+        try:
+            return await self._read(f"artists:{limit}:{offset}:{after}", "artist", load, list_page=True)
         except Exception as e:
             logger.error(f"Error fetching artists: {e}")
             return []
 
     async def get_artist_by_id(self, artist_id: str) -> Optional[Artist]:
-        try:
-            result = self.supabase.table("artists").select("*").eq("id", artist_id).execute()
+        async def load():
+            result = await self._execute(self.supabase.table("artists").select("*").eq("id", artist_id))
             if result.data:
                 return Artist(**result.data[0])
             return None
+
+        try:
+            return await self._read(f"artist:{artist_id}", "artist", load)
         except Exception as e:
             logger.error(f"Error fetching artist {artist_id}: {e}")
             return None
 
+    async def get_artists_by_ids(self, artist_ids: List[str]) -> Tuple[List[Artist], List[str]]:
+        return await self._get_many("artist", "artists", "*", artist_ids, lambda row: Artist(**row))
+
     async def create_artist(self, artist: ArtistCreate) -> Optional[Artist]:
         try:
-            result = self.supabase_admin.table("artists").insert(artist.model_dump()).execute()
+            result = await self._execute(self.supabase_admin.table("artists").insert(artist.model_dump()))
+            self._invalidate("list:artist")
             if result.data:
-                return Artist(**result.data[0])
+                return self._indexed("artist", Artist(**result.data[0]))
             return None
         except Exception as e:
             logger.error(f"Error creating artist: {e}")
@@ -45,26 +263,20 @@ class DatabaseService:
             update_data = {k: v for k, v in artist.model_dump().items() if v is not None}
             update_data['updated_at'] = datetime.utcnow().isoformat()
             
-            result = self.supabase_admin.table("artists").update(update_data).eq("id", artist_id).execute()
+            result = await self._execute(self.supabase_admin.table("artists").update(update_data).eq("id", artist_id))
+            # Albums, songs and playlists embedding this artist are tagged with it too
+            self._invalidate(f"artist:{artist_id}", "list:artist")
             if result.data:
-                return Artist(**result.data[0])
+                return self._indexed("artist", Artist(**result.data[0]))
             return None
         except Exception as e:
             logger.error(f"Error updating artist {artist_id}: {e}")
             return None
 
-    async def delete_artist(self, artist_id: str) -> bool:
-        try:
-            self.supabase_admin.table("artists").delete().eq("id", artist_id).execute()
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting artist {artist_id}: {e}")
-            return False
-
     # Albums  
-    async def get_albums(self, limit: int = 100, offset: int = 0) -> List[Album]:
-        try:
-            result = self.supabase.table("albums").select("*, artist:artists(*)").range(offset, offset + limit - 1).execute()
+    async def get_albums(self, limit: int = 100, offset: int = 0, after: Optional[Cursor] = None) -> List[Album]:
+        async def load():
+            result = await self._execute(self._page(self.supabase.table("albums").select(ALBUM_COLUMNS), limit, offset, after))
             albums = []
             for album_data in result.data:
                 album_dict = {**album_data}
@@ -72,23 +284,32 @@ class DatabaseService:
                     album_dict['artist'] = Artist(**album_dict['artist'])
                 albums.append(Album(**album_dict))
             return albums
+
+        try:
+            return await self._read(f"albums:{limit}:{offset}:{after}", "album", load, list_page=True)
         except Exception as e:
             logger.error(f"Error fetching albums: {e}")
             return []
 
     async def get_album_by_id(self, album_id: str) -> Optional[Album]:
-        try:
-            result = self.supabase.table("albums").select("*, artist:artists(*)").eq("id", album_id).execute()
+        async def load():
+            result = await self._execute(self.supabase.table("albums").select(ALBUM_COLUMNS).eq("id", album_id))
             if result.data:
                 album_data = result.data[0]
                 if album_data.get('artist'):
                     album_data['artist'] = Artist(**album_data['artist'])
                 return Album(**album_data)
             return None
+
+        try:
+            return await self._read(f"album:{album_id}", "album", load)
         except Exception as e:
             logger.error(f"Error fetching album {album_id}: {e}")
             return None
 
+    async def get_albums_by_ids(self, album_ids: List[str]) -> Tuple[List[Album], List[str]]:
+        return await self._get_many("album", "albums", ALBUM_COLUMNS, album_ids, lambda row: Album(**row))
+
     async def create_album(self, album: AlbumCreate) -> Optional[Album]:
         try:
             album_data = album.model_dump()
@@ -96,9 +317,10 @@ class DatabaseService:
             if album_data.get('release_date'):
                 album_data['release_date'] = album_data['release_date'].isoformat()
             
-            result = self.supabase_admin.table("albums").insert(album_data).execute()
+            result = await self._execute(self.supabase_admin.table("albums").insert(album_data).select(ALBUM_COLUMNS))
+            self._invalidate("list:album")
             if result.data:
-                return await self.get_album_by_id(result.data[0]['id'])
+                return self._indexed("album", Album(**result.data[0]))
             return None
         except Exception as e:
             logger.error(f"Error creating album: {e}")
@@ -109,31 +331,27 @@ class DatabaseService:
             update_data = {k: v for k, v in album.model_dump().items() if v is not None}
             update_data['updated_at'] = datetime.utcnow().isoformat()
             
-            result = self.supabase_admin.table("albums").update(update_data).eq("id", album_id).execute()
+            result = await self._execute(self.supabase_admin.table("albums").update(update_data).eq("id", album_id).select(ALBUM_COLUMNS))
+            self._invalidate(f"album:{album_id}", "list:album")
             if result.data:
-                return await self.get_album_by_id(album_id)
+                return self._indexed("album", Album(**result.data[0]))
             return None
         except Exception as e:
             logger.error(f"Error updating album {album_id}: {e}")
             return None
 
-    async def delete_album(self, album_id: str) -> bool:
-        try:
-            self.supabase_admin.table("albums").delete().eq("id", album_id).execute()
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting album {album_id}: {e}")
-            return False
-
     # Songs
-    async def get_songs(self, limit: int = 100, offset: int = 0, genre: Optional[str] = None) -> List[Song]:
-        try:
-            query = self.supabase.table("songs").select("*, artist:artists(*), album:albums(*)")
+    async def get_songs(self, limit: int = 100, offset: int = 0, genre: Optional[str] = None, after: Optional[Cursor] = None) -> List[Song]:
+        async def load():
+            query = self.supabase.table("songs").select(SONG_COLUMNS)
             
             if genre:
                 query = query.eq("genre", genre)
                 
-            result = query.range(offset, offset + limit - 1).order("created_at", desc=True).execute()
+            if after is not None:
+                result = await self._execute(self._page(query, limit, offset, after))
+            else:
+                result = await self._execute(query.range(offset, offset + limit - 1).order("created_at", desc=True))
             
             songs = []
             for song_data in result.data:
@@ -144,13 +362,16 @@ class DatabaseService:
                     song_dict['album'] = Album(**song_dict['album'])
                 songs.append(Song(**song_dict))
             return songs
+
+        try:
+            return await self._read(f"songs:{limit}:{offset}:{genre or ''}:{after}", "song", load, list_page=True)
         except Exception as e:
             logger.error(f"Error fetching songs: {e}")
             return []
 
     async def get_song_by_id(self, song_id: str) -> Optional[Song]:
-        try:
-            result = self.supabase.table("songs").select("*, artist:artists(*), album:albums(*)").eq("id", song_id).execute()
+        async def load():
+            result = await self._execute(self.supabase.table("songs").select(SONG_COLUMNS).eq("id", song_id))
             if result.data:
                 song_data = result.data[0]
                 if song_data.get('artist'):
@@ -159,15 +380,22 @@ class DatabaseService:
                     song_data['album'] = Album(**song_data['album'])
                 return Song(**song_data)
             return None
+
+        try:
+            return await self._read(f"song:{song_id}", "song", load)
         except Exception as e:
             logger.error(f"Error fetching song {song_id}: {e}")
             return None
 
+    async def get_songs_by_ids(self, song_ids: List[str]) -> Tuple[List[Song], List[str]]:
+        return await self._get_many("song", "songs", SONG_COLUMNS, song_ids, lambda row: Song(**row))
+
     async def create_song(self, song: SongCreate) -> Optional[Song]:
         try:
-            result = self.supabase_admin.table("songs").insert(song.model_dump()).execute()
+            result = await self._execute(self.supabase_admin.table("songs").insert(song.model_dump()).select(SONG_COLUMNS))
+            self._invalidate("list:song")
             if result.data:
-                return await self.get_song_by_id(result.data[0]['id'])
+                return self._indexed("song", Song(**result.data[0]))
             return None
         except Exception as e:
             logger.error(f"Error creating song: {e}")
@@ -178,74 +406,48 @@ class DatabaseService:
             update_data = {k: v for k, v in song.model_dump().items() if v is not None}
             update_data['updated_at'] = datetime.utcnow().isoformat()
             
-            result = self.supabase_admin.table("songs").update(update_data).eq("id", song_id).execute()
+            result = await self._execute(self.supabase_admin.table("songs").update(update_data).eq("id", song_id).select(SONG_COLUMNS))
+            self._invalidate(f"song:{song_id}", "list:song")
             if result.data:
-                return await self.get_song_by_id(song_id)
+                return self._indexed("song", Song(**result.data[0]))
             return None
         except Exception as e:
             logger.error(f"Error updating song {song_id}: {e}")
             return None
 
-    async def delete_song(self, song_id: str) -> bool:
-        try:
-            self.supabase_admin.table("songs").delete().eq("id", song_id).execute()
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting song {song_id}: {e}")
-            return False
-
     # Playlists
-    async def get_playlists(self, limit: int = 100, offset: int = 0) -> List[Playlist]:
+    async def get_playlists(self, limit: int = 100, offset: int = 0, after: Optional[Cursor] = None) -> List[Playlist]:
+        async def load():
+            # Song counts come back as an aggregate embed, so the page costs one round trip
+            result = await self._execute(self._page(self.supabase.table("playlists").select("*, playlist_songs(count)"), limit, offset, after))
+            return [playlist_from_count_row(playlist_data) for playlist_data in result.data]
+
         try:
-            # First get playlists
-            result = self.supabase.table("playlists").select("*").range(offset, offset + limit - 1).execute()
-            
-            playlists = []
-            for playlist_data in result.data:
-                # Get song count for each playlist
-                song_count_result = self.supabase.table("playlist_songs").select("id").eq("playlist_id", playlist_data['id']).execute()
-                playlist_data['song_count'] = len(song_count_result.data)
-                playlists.append(Playlist(**playlist_data))
-            
-            return playlists
+            return await self._read(f"playlists:{limit}:{offset}:{after}", "playlist", load, list_page=True)
         except Exception as e:
             logger.error(f"Error fetching playlists: {e}")
             return []
 
     async def get_playlist_by_id(self, playlist_id: str) -> Optional[Playlist]:
+        async def load():
+            # Playlist and its ordered songs come back as one nested row
+            result = await self._execute(self.supabase.table("playlists").select(PLAYLIST_COLUMNS).eq("id", playlist_id))
+            if result.data:
+                return playlist_from_row(result.data[0])
+            return None
+
         try:
-            # Get playlist
-            playlist_result = self.supabase.table("playlists").select("*").eq("id", playlist_id).execute()
-            if not playlist_result.data:
-                return None
-            
-            playlist_data = playlist_result.data[0]
-            
-            # Get playlist songs with song details
-            songs_result = self.supabase.table("playlist_songs").select("*, song:songs(*, artist:artists(*), album:albums(*))").eq("playlist_id", playlist_id).order("order_index").execute()
-            
-            songs = []
-            for ps in songs_result.data:
-                song_data = ps['song']
-                if song_data.get('artist'):
-                    song_data['artist'] = Artist(**song_data['artist'])
-                if song_data.get('album'):
-                    song_data['album'] = Album(**song_data['album'])
-                songs.append(Song(**song_data))
-            
-            playlist_data['songs'] = songs
-            playlist_data['song_count'] = len(songs)
-            
-            return Playlist(**playlist_data)
+            return await self._read(f"playlist:{playlist_id}", "playlist", load)
         except Exception as e:
             logger.error(f"Error fetching playlist {playlist_id}: {e}")
             return None
 
     async def create_playlist(self, playlist: PlaylistCreate) -> Optional[Playlist]:
         try:
-            result = self.supabase_admin.table("playlists").insert(playlist.model_dump()).execute()
+            result = await self._execute(self.supabase_admin.table("playlists").insert(playlist.model_dump()).select(PLAYLIST_COLUMNS))
+            self._invalidate("list:playlist")
             if result.data:
-                return await self.get_playlist_by_id(result.data[0]['id'])
+                return self._indexed("playlist", playlist_from_row(result.data[0]))
             return None
         except Exception as e:
             logger.error(f"Error creating playlist: {e}")
@@ -256,28 +458,59 @@ class DatabaseService:
             update_data = {k: v for k, v in playlist.model_dump().items() if v is not None}
             update_data['updated_at'] = datetime.utcnow().isoformat()
             
-            result = self.supabase_admin.table("playlists").update(update_data).eq("id", playlist_id).execute()
+            result = await self._execute(self.supabase_admin.table("playlists").update(update_data).eq("id", playlist_id).select(PLAYLIST_COLUMNS))
+            self._invalidate(f"playlist:{playlist_id}", "list:playlist")
             if result.data:
-                return await self.get_playlist_by_id(playlist_id)
+                return self._indexed("playlist", playlist_from_row(result.data[0]))
             return None
         except Exception as e:
             logger.error(f"Error updating playlist {playlist_id}: {e}")
             return None
 
-    async def delete_playlist(self, playlist_id: str) -> bool:
-        try:
-            self.supabase_admin.table("playlists").delete().eq("id", playlist_id).execute()
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting playlist {playlist_id}: {e}")
-            return False
+    # Audited admin writes
+    async def admin_write(
+        self,
+        entity_type: str,
+        action: str,
+        entity_id: str,
+        changes: Optional[Dict[str, Any]] = None,
+        admin_name: str = "Admin",
+    ) -> Optional[Tuple[Any, Any]]:
+        """Update or delete a catalog row and log it in one transactional round trip.
+
+        Runs the admin_write function from supabase_schema.sql. Returns
+        (old, new) models, with new None for deletes, or None when the row
+        does not exist. Errors propagate; the transaction leaves no partial write.
+        """
+        if not _is_uuid(entity_id):
+            return None
+        result = await self._execute(self.supabase_admin.rpc("admin_write", {
+            "p_entity": entity_type,
+            "p_action": action,
+            "p_id": entity_id,
+            "p_changes": changes or {},
+            "p_admin_name": admin_name,
+        }))
+        if not result.data:
+            return None
+
+        model = ENTITY_MODELS[entity_type]
+        old = model(**result.data["old"])
+        new = model(**result.data["new"]) if result.data.get("new") else None
+        if action == "update":
+            self._invalidate(f"{entity_type}:{entity_id}", f"list:{entity_type}")
+            self._indexed(entity_type, new)
+        else:
+            self._invalidate(f"{entity_type}:{entity_id}", *DELETE_INVALIDATES[entity_type])
+            self._unindexed(entity_type, entity_id)
+        return old, new
 
     # Playlist Songs
     async def add_song_to_playlist(self, playlist_id: str, song_id: str, order_index: Optional[int] = None) -> bool:
         try:
             if order_index is None:
                 # Get current max order_index
-                result = self.supabase.table("playlist_songs").select("order_index").eq("playlist_id", playlist_id).order("order_index", desc=True).limit(1).execute()
+                result = await self._execute(self.supabase.table("playlist_songs").select("order_index").eq("playlist_id", playlist_id).order("order_index", desc=True).limit(1))
                 order_index = (result.data[0]['order_index'] if result.data else 0) + 1
 
             playlist_song = PlaylistSongCreate(
@@ -286,7 +519,8 @@ class DatabaseService:
                 order_index=order_index
             )
             
-            self.supabase_admin.table("playlist_songs").insert(playlist_song.model_dump()).execute()
+            await self._execute(self.supabase_admin.table("playlist_songs").insert(playlist_song.model_dump()))
+            self._invalidate(f"playlist:{playlist_id}", "list:playlist")
             return True
         except Exception as e:
             logger.error(f"Error adding song {song_id} to playlist {playlist_id}: {e}")
@@ -294,18 +528,157 @@ class DatabaseService:
 
     async def remove_song_from_playlist(self, playlist_id: str, song_id: str) -> bool:
         try:
-            self.supabase_admin.table("playlist_songs").delete().eq("playlist_id", playlist_id).eq("song_id", song_id).execute()
+            await self._execute(self.supabase_admin.table("playlist_songs").delete().eq("playlist_id", playlist_id).eq("song_id", song_id))
+            self._invalidate(f"playlist:{playlist_id}", "list:playlist")
             return True
         except Exception as e:
             logger.error(f"Error removing song {song_id} from playlist {playlist_id}: {e}")
             return False
 
+    # Bulk import
+    async def lookup_rows(self, table: str, column: str, values: List[str], columns: str = "*") -> List[Dict[str, Any]]:
+        """Rows whose ``column`` equals any of ``values``, oldest first; errors propagate"""
+        # in.(...) cannot carry quotes or backslashes, so those values are looked up with eq
+        plain = [v for v in values if '"' not in v and '\\' not in v]
+        queries = [
+            self._execute(self.supabase_admin.table(table).select(columns).in_(column, plain[i:i + LOOKUP_BATCH_SIZE]).order("created_at"))
+            for i in range(0, len(plain), LOOKUP_BATCH_SIZE)
+        ]
+        queries += [
+            self._execute(self.supabase_admin.table(table).select(columns).eq(column, v).order("created_at"))
+            for v in values if '"' in v or '\\' in v
+        ]
+        results = await asyncio.gather(*queries)
+        return [row for result in results for row in result.data]
+
+    async def import_rows(self, entity_type: str, rows: List[Dict[str, Any]]) -> List[Any]:
+        """Insert rows in one multi-row statement and return the created models; errors propagate"""
+        if entity_type == "playlist_song":
+            result = await self._execute(self.supabase_admin.table("playlist_songs").insert(rows))
+            self._invalidate("list:playlist", *{f"playlist:{row['playlist_id']}" for row in rows})
+            return [PlaylistSong(**row) for row in result.data]
+
+        table, columns = IMPORT_TABLES[entity_type]
+        result = await self._execute(self.supabase_admin.table(table).insert(rows).select(columns))
+        self._invalidate(f"list:{entity_type}")
+        model = ENTITY_MODELS[entity_type]
+        return [self._indexed(entity_type, model(**row)) for row in result.data]
+
+    # Export
+    async def iter_table(self, table: str, page_size: int = 1000, column: str = "created_at",
+                         null_column: Optional[str] = None, columns: str = "*") -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the rows of ``table`` one keyset page at a time, newest first; errors propagate.
+
+        ``null_column`` limits the scan to rows where that column is NULL (e.g. rows awaiting a backfill).
+        """
+        after = FIRST_PAGE
+        while True:
+            query = self.supabase.table(table).select(columns)
+            if null_column is not None:
+                query = query.is_(null_column, "null")
+            result = await self._execute(self._page(query, page_size, 0, after, column=column))
+            if result.data:
+                yield result.data
+            if len(result.data) < page_size:
+                return
+            last = result.data[-1]
+            after = (last[column], last["id"])
+
+    async def iter_entities(self, entity_type: str, page_size: int = 1000) -> AsyncIterator[List[Any]]:
+        """Yield every ``entity_type`` model one keyset page at a time, bypassing the cache; errors propagate"""
+        table, columns, build = CATALOG_TABLES[entity_type]
+        async for rows in self.iter_table(table, page_size=page_size, columns=columns):
+            yield [build(row) for row in rows]
+
+    # Waveforms
+    async def get_waveform(self, song_id: str) -> Optional[bytes]:
+        """A song's peaks blob, or None; errors propagate"""
+        if not _is_uuid(song_id):
+            return None
+        result = await self._execute(self.supabase.table("song_waveforms").select("peaks").eq("song_id", song_id).limit(1))
+        # PostgREST returns bytea as a "\\x"-prefixed hex string
+        return bytes.fromhex(result.data[0]["peaks"][2:]) if result.data else None
+
+    async def save_waveform(self, song_id: str, peaks: bytes, sample_rate: int):
+        """Insert or replace a song's peaks blob; errors propagate"""
+        await self._execute(self.supabase_admin.table("song_waveforms").upsert({
+            "song_id": song_id,
+            "peaks": "\\x" + peaks.hex(),
+            "buckets": len(peaks) // 2,
+            "sample_rate": sample_rate,
+            "created_at": datetime.utcnow().isoformat(),
+        }, on_conflict="song_id", returning=ReturnMethod.minimal))
+
+    async def delete_waveform(self, song_id: str):
+        """Remove a song's peaks blob, e.g. once its audio is replaced; errors propagate"""
+        await self._execute(self.supabase_admin.table("song_waveforms").delete().eq("song_id", song_id))
+
+    async def get_waveform_song_ids(self, song_ids: List[str]) -> Set[str]:
+        """Which of ``song_ids`` already have a waveform; errors propagate"""
+        rows = await self.lookup_rows("song_waveforms", "song_id", song_ids, "song_id")
+        return {row["song_id"] for row in rows}
+
+    # Content-addressed media index
+    async def get_media_object(self, bucket: str, sha256: str) -> Optional[Dict[str, Any]]:
+        """Return the stored object with this content hash, or None; errors propagate"""
+        result = await self._execute(
+            self.supabase_admin.table("media_objects").select("*").eq("bucket", bucket).eq("sha256", sha256).limit(1)
+        )
+        return result.data[0] if result.data else None
+
+    async def record_media_object(self, row: Dict[str, Any]):
+        """Insert or refresh (``last_used_at``) an index row; errors propagate"""
+        await self._execute(
+            self.supabase_admin.table("media_objects").upsert(row, on_conflict="bucket,sha256", returning=ReturnMethod.minimal)
+        )
+
+    async def get_media_objects(self, bucket: str) -> List[Dict[str, Any]]:
+        """Every index row of a bucket (path and last use), for garbage collection; errors propagate"""
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            result = await self._execute(
+                self.supabase_admin.table("media_objects").select("path, last_used_at")
+                .eq("bucket", bucket).order("sha256").range(offset, offset + 999)
+            )
+            rows.extend(result.data)
+            if len(result.data) < 1000:
+                return rows
+            offset += 1000
+
+    async def delete_media_objects(self, bucket: str, paths: List[str]):
+        """Drop index rows for deleted objects; errors propagate"""
+        for start in range(0, len(paths), LOOKUP_BATCH_SIZE):
+            await self._execute(
+                self.supabase_admin.table("media_objects").delete(returning=ReturnMethod.minimal)
+                .eq("bucket", bucket).in_("path", paths[start:start + LOOKUP_BATCH_SIZE])
+            )
+
     # Search
     async def search(self, query: str, limit: int = 50) -> SearchResultsResponse:
         try:
-            # Search songs
-            songs_result = self.supabase.table("songs").select("*, artist:artists(*), album:albums(*)").or_(f"title.ilike.%{query}%,genre.ilike.%{query}%").limit(limit).execute()
-            
+            # search_catalog (supabase_schema.sql) ranks all four entity types in one round trip
+            result = await self._execute(self.supabase.rpc("search_catalog", {"search_query": query, "result_limit": limit}))
+            data = result.data or {}
+            return SearchResultsResponse(
+                songs=[Song(**song) for song in data.get('songs', [])],
+                artists=[Artist(**artist) for artist in data.get('artists', [])],
+                albums=[Album(**album) for album in data.get('albums', [])],
+                playlists=[Playlist(**playlist) for playlist in data.get('playlists', [])]
+            )
+        except Exception as e:
+            logger.warning(f"search_catalog RPC failed for '{query}', falling back to ILIKE search: {e}")
+            return await self._search_ilike(query, limit)
+
+    async def _search_ilike(self, query: str, limit: int = 50) -> SearchResultsResponse:
+        try:
+            songs_result, artists_result, albums_result, playlists_result = await asyncio.gather(
+                self._execute(self.supabase.table("songs").select(SONG_COLUMNS).or_(f"title.ilike.%{query}%,genre.ilike.%{query}%").limit(limit)),
+                self._execute(self.supabase.table("artists").select("*").ilike("name", f"%{query}%").limit(limit)),
+                self._execute(self.supabase.table("albums").select(ALBUM_COLUMNS).ilike("title", f"%{query}%").limit(limit)),
+                self._execute(self.supabase.table("playlists").select("*").or_(f"name.ilike.%{query}%,description.ilike.%{query}%").limit(limit)),
+            )
+
             songs = []
             for song_data in songs_result.data:
                 if song_data.get('artist'):
@@ -314,20 +687,14 @@ class DatabaseService:
                     song_data['album'] = Album(**song_data['album'])
                 songs.append(Song(**song_data))
 
-            # Search artists
-            artists_result = self.supabase.table("artists").select("*").ilike("name", f"%{query}%").limit(limit).execute()
             artists = [Artist(**artist) for artist in artists_result.data]
 
-            # Search albums
-            albums_result = self.supabase.table("albums").select("*, artist:artists(*)").ilike("title", f"%{query}%").limit(limit).execute()
             albums = []
             for album_data in albums_result.data:
                 if album_data.get('artist'):
                     album_data['artist'] = Artist(**album_data['artist'])
                 albums.append(Album(**album_data))
 
-            # Search playlists
-            playlists_result = self.supabase.table("playlists").select("*").or_(f"name.ilike.%{query}%,description.ilike.%{query}%").limit(limit).execute()
             playlists = [Playlist(**playlist) for playlist in playlists_result.data]
 
             return SearchResultsResponse(
@@ -340,20 +707,60 @@ class DatabaseService:
             logger.error(f"Error searching for '{query}': {e}")
             return SearchResultsResponse(songs=[], artists=[], albums=[], playlists=[])
 
+    async def suggest(self, prefix: str, limit: int = 8) -> List[Suggestion]:
+        """Word-prefix suggestions straight from the database (used until the suggest index is built).
+
+        ILIKE narrows each table to candidates; a throwaway SuggestIndex then
+        matches and ranks them, so results agree with the in-memory index.
+        """
+        try:
+            words = tokenize(prefix)
+            if not words:
+                return []
+            pattern = "%" + "%".join(words) + "%"
+            results = await asyncio.gather(*[
+                # Extra candidates, since some only contain the words mid-word
+                self._execute(self.supabase.table(table).select(f"id, {column}").ilike(column, pattern).limit(limit * 5))
+                for table, column, _ in SUGGEST_SOURCES.values()
+            ])
+            candidates = SuggestIndex(enabled=True)
+            for (entity_type, (_, column, _)), result in zip(SUGGEST_SOURCES.items(), results):
+                for row in result.data:
+                    candidates.add(entity_type, row['id'], row[column])
+            return candidates.suggest(prefix, limit=limit)
+        except Exception as e:
+            logger.error(f"Error fetching suggestions for '{prefix}': {e}")
+            return []
+
     # Stats
+    async def _count(self, table: str) -> int:
+        # HEAD request with count=exact: Postgres counts, no rows are transferred
+        result = await self._execute(self.supabase.table(table).select("id", count="exact", head=True))
+        return result.count or 0
+
     async def get_stats(self) -> StatsResponse:
+        if self._stats_cache and self._stats_cache[0] > time.monotonic():
+            return self._stats_cache[1]
         try:
-            songs_count = len(self.supabase.table("songs").select("id").execute().data)
-            artists_count = len(self.supabase.table("artists").select("id").execute().data)
-            albums_count = len(self.supabase.table("albums").select("id").execute().data)
-            playlists_count = len(self.supabase.table("playlists").select("id").execute().data)
+            songs_count, artists_count, albums_count, playlists_count = await self.singleflight.do(
+                "stats",
+                lambda: asyncio.gather(
+                    self._count("songs"),
+                    self._count("artists"),
+                    self._count("albums"),
+                    self._count("playlists"),
+                ),
+            )
 
-            return StatsResponse(
+            stats = StatsResponse(
                 total_songs=songs_count,
                 total_artists=artists_count,
                 total_albums=albums_count,
                 total_playlists=playlists_count
             )
+            if self.stats_ttl > 0:
+                self._stats_cache = (time.monotonic() + self.stats_ttl, stats)
+            return stats
         except Exception as e:
             logger.error(f"Error getting stats: {e}")
             return StatsResponse(total_songs=0, total_artists=0, total_albums=0, total_playlists=0)
@@ -361,7 +768,7 @@ class DatabaseService:
     # Admin Logs
     async def log_admin_action(self, log: AdminLogCreate) -> Optional[AdminLog]:
         try:
-            result = self.supabase_admin.table("admin_logs").insert(log.model_dump()).execute()
+            result = await self._execute(self.supabase_admin.table("admin_logs").insert(log.model_dump()))
             if result.data:
                 return AdminLog(**result.data[0])
             return None
@@ -369,9 +776,18 @@ class DatabaseService:
             logger.error(f"Error logging admin action: {e}")
             return None
 
-    async def get_admin_logs(self, limit: int = 100, offset: int = 0) -> List[AdminLog]:
+    async def insert_admin_logs(self, rows: List[Dict[str, Any]]):
+        """Bulk-insert audit rows in one statement; errors propagate to the caller"""
+        await self._execute(self.supabase_admin.table("admin_logs").insert(rows, returning=ReturnMethod.minimal))
+
+    async def get_admin_logs(self, limit: int = 100, offset: int = 0, after: Optional[Cursor] = None) -> List[AdminLog]:
         try:
-            result = self.supabase.table("admin_logs").select("*").range(offset, offset + limit - 1).order("timestamp", desc=True).execute()
+            query = self.supabase.table("admin_logs").select("*")
+            if after is not None:
+                query = self._page(query, limit, offset, after, column="timestamp")
+            else:
+                query = query.range(offset, offset + limit - 1).order("timestamp", desc=True)
+            result = await self._execute(query)
             return [AdminLog(**log) for log in result.data]
         except Exception as e:
             logger.error(f"Error fetching admin logs: {e}")
@@ -0,0 +1,113 @@
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from PIL import Image, ImageOps, features
+
+# Widths generated for every cover; ones wider than the original are skipped
+COVER_WIDTHS = sorted(int(w) for w in os.environ.get("COVER_WIDTHS", "160,320,640,1280").split(","))
+# Encodings to generate; ones this Pillow build cannot write are skipped
+COVER_FORMATS = [f.strip() for f in os.environ.get("COVER_FORMATS", "avif,webp,jpeg").split(",")]
+COVER_QUALITY = int(os.environ.get("COVER_QUALITY", "75"))
+# Blurhash detail, components across and down
+BLURHASH_COMPONENTS = (4, 3)
+# Long side of the thumbnail the blurhash is computed from
+BLURHASH_SAMPLE_SIZE = 32
+
+# format -> (Pillow format, Pillow feature, extension, content type)
+FORMATS = {
+    "avif": ("AVIF", "avif", "avif", "image/avif"),
+    "webp": ("WEBP", "webp", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "jpg", "image/jpeg"),
+}
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+def supported_formats(formats: List[str] = COVER_FORMATS) -> List[str]:
+    return [f for f in formats if f in FORMATS and features.check(FORMATS[f][1])]
+
+def _base83(value: int, length: int) -> str:
+    return "".join(BASE83[value // 83 ** (length - 1 - i) % 83] for i in range(length))
+
+def _to_srgb(value: float) -> int:
+    v = min(max(value, 0.0), 1.0)
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+def blurhash_encode(pixels: np.ndarray, components: Tuple[int, int] = BLURHASH_COMPONENTS) -> str:
+    """Blurhash of an RGB uint8 array shaped (height, width, 3).
+
+    Each component's cosine basis is applied to every pixel at once with
+    ``einsum`` instead of the reference encoder's per-pixel loops.
+    """
+    cx, cy = components
+    height, width = pixels.shape[:2]
+    v = pixels.astype(np.float64) / 255
+    linear = np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+    basis_x = np.cos(np.pi * np.outer(np.arange(cx), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(cy), np.arange(height)) / height)
+    factors = np.einsum("jy,ix,yxc->jic", basis_y, basis_x, linear) * 2 / (width * height)
+    factors[0, 0] /= 2
+    # Rows first, as the reference encoder orders them
+    factors = factors.reshape(cx * cy, 3)
+    dc, ac = factors[0], factors[1:]
+
+    if len(ac):
+        quantised_max = max(0, min(82, math.floor(np.abs(ac).max() * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+    else:
+        quantised_max, maximum = 0, 1
+    scaled = ac / maximum
+    quantised = np.floor(np.clip(np.sign(scaled) * np.sqrt(np.abs(scaled)) * 9 + 9.5, 0, 18)).astype(int)
+
+    return (
+        _base83((cx - 1) + (cy - 1) * 9, 1)
+        + _base83(quantised_max, 1)
+        + _base83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+        + "".join(_base83(r * 19 * 19 + g * 19 + b, 2) for r, g, b in quantised)
+    )
+
+def render_variants(source: str, out_dir: str, widths: List[int] = COVER_WIDTHS,
+                    formats: List[str] = COVER_FORMATS, quality: int = COVER_QUALITY) -> Dict[str, Any]:
+    """Decode ``source`` once and write each width in each format to ``out_dir``.
+
+    Meant to run in a worker process. Returns the original size, the
+    blurhash and a (format, width, path) entry for every file written.
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as image:
+        original = image.size
+        # JPEGs can decode at a fraction of their size; the request is square
+        # so it is large enough whichever way EXIF rotates the image
+        image.draft("RGB", (widths[-1], widths[-1]))
+        decoded = image.size
+        image = ImageOps.exif_transpose(image)
+    if image.size != decoded:
+        # Rotated a quarter turn, so the reported size turns with it
+        original = original[::-1]
+    image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info else "RGB")
+    width, height = image.size
+
+    targets = [w for w in widths if w < width]
+    if width <= widths[-1]:
+        targets.append(width)
+    files = []
+    for target in targets:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS, reducing_gap=3.0
+        )
+        for name in formats:
+            pillow_format, _, extension, _ = FORMATS[name]
+            path = os.path.join(out_dir, f"{target}.{extension}")
+            frame = resized.convert("RGB") if name == "jpeg" else resized
+            options = {"optimize": True, "progressive": True} if name == "jpeg" else {}
+            frame.save(path, pillow_format, quality=quality, **options)
+            files.append((name, target, path))
+
+    scale = BLURHASH_SAMPLE_SIZE / max(width, height)
+    sample = image.convert("RGB").resize(
+        (max(1, round(width * scale)), max(1, round(height * scale))), Image.BILINEAR, reducing_gap=2.0
+    )
+    return {"width": original[0], "height": original[1], "blurhash": blurhash_encode(np.asarray(sample)), "files": files}
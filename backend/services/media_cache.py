@@ -0,0 +1,308 @@
+import asyncio
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from services.concurrency import SingleFlight
+from services.storage_service import MAX_AUDIO_UPLOAD_BYTES, storage_service
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_DIR = os.environ.get("MEDIA_CACHE_DIR", str(Path(__file__).parent.parent / "media_cache"))
+# Total bytes of audio kept on disk; least recently served objects are evicted first
+MEDIA_CACHE_MAX_BYTES = int(os.environ.get("MEDIA_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Larger objects are not cached; requests for them are redirected to the bucket
+MEDIA_CACHE_MAX_OBJECT_BYTES = int(os.environ.get("MEDIA_CACHE_MAX_OBJECT_BYTES", str(MAX_AUDIO_UPLOAD_BYTES)))
+MEDIA_CACHE_TIMEOUT = float(os.environ.get("MEDIA_CACHE_TIMEOUT", "60"))
+# Bytes read from disk per chunk when streaming a response
+MEDIA_STREAM_CHUNK_SIZE = 256 * 1024
+
+class CacheEntry:
+    __slots__ = ("key", "path", "size", "etag", "content_type")
+
+    def __init__(self, key: str, path: Path, size: int, etag: str, content_type: str):
+        self.key = key
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.content_type = content_type
+
+class MediaCache:
+    """Size-bounded on-disk LRU cache of storage objects, filled from their public URLs.
+
+    Each object is a ``<key>.bin`` data file plus a ``<key>.json`` sidecar
+    holding its ETag (the SHA-256 of the body) and content type; ``key`` is
+    the SHA-256 of the origin URL. Concurrent misses for the same URL share
+    one download, which is written to a temporary file and renamed into
+    place. Recency is kept in memory and mirrored to file mtimes, so the
+    LRU order survives restarts. Objects the storage backend keeps on this
+    machine are served in place instead of being copied.
+    """
+
+    def __init__(self, directory: str = MEDIA_CACHE_DIR, max_bytes: int = MEDIA_CACHE_MAX_BYTES,
+                 max_object_bytes: int = MEDIA_CACHE_MAX_OBJECT_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._loaded = False
+        self._fills = SingleFlight()
+        # Keys of objects over max_object_bytes, so they are not downloaded again
+        self._too_large: set = set()
+        self._http: Optional[httpx.AsyncClient] = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.bytes_filled = 0
+        self.bytes_served = 0
+        self.local = 0
+
+    def _get_http(self) -> httpx.AsyncClient:
+        # Created lazily so the client belongs to the running loop
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=MEDIA_CACHE_TIMEOUT, follow_redirects=True)
+        return self._http
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _load(self):
+        """Rebuild the index from disk, oldest mtime first, dropping incomplete entries"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        found = []
+        for meta_path in self.directory.glob("*.json"):
+            data_path = meta_path.with_suffix(".bin")
+            try:
+                meta = json.loads(meta_path.read_text())
+                stat = data_path.stat()
+            except (OSError, ValueError):
+                meta_path.unlink(missing_ok=True)
+                continue
+            found.append((stat.st_mtime, CacheEntry(meta_path.stem, data_path, stat.st_size, meta["etag"], meta["content_type"])))
+        for tmp in self.directory.glob("*.tmp"):
+            tmp.unlink(missing_ok=True)
+        for _, entry in sorted(found, key=lambda item: item[0]):
+            self._entries[entry.key] = entry
+            self.bytes += entry.size
+        self._loaded = True
+        self._evict()
+
+    async def get(self, url: str) -> Optional[CacheEntry]:
+        """The cache entry for ``url``, downloading it on a miss; None if it is too large to cache.
+
+        The entry comes back most recently used, so pass it to ``respond()``
+        straight away and it is the last one evicted before its file is opened.
+        """
+        local = storage_service.local_path(url)
+        if local is not None:
+            self.local += 1
+            return await asyncio.to_thread(file_entry, local)
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+        key = hashlib.sha256(url.encode()).hexdigest()
+        if key in self._too_large:
+            self.bypassed += 1
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            try:
+                await asyncio.to_thread(os.utime, entry.path)
+                found = True
+            except FileNotFoundError:
+                found = False
+            # Evicted or replaced while its mtime was being touched: treat as a miss
+            if self._entries.get(key) is entry:
+                if found:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return entry
+                # Deleted outside the cache; refill it
+                self._remove(key)
+        self.misses += 1
+        entry = await self._fills.do(key, lambda: self._fill(key, url))
+        if entry is None:
+            self.bypassed += 1
+        return entry
+
+    async def _fill(self, key: str, url: str) -> Optional[CacheEntry]:
+        data_path = self.directory / f"{key}.bin"
+        tmp_path = self.directory / f"{key}.{uuid.uuid4().hex}.tmp"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with self._get_http().stream("GET", url) as response:
+                if response.status_code != 200:
+                    logger.error(f"Media origin returned {response.status_code} for {url}")
+                    raise HTTPException(status_code=502, detail="Audio origin unavailable")
+                declared = response.headers.get("content-length")
+                if declared is not None and int(declared) > self.max_object_bytes:
+                    self._too_large.add(key)
+                    return None
+                content_type = response.headers.get("content-type", "application/octet-stream")
+                f = await asyncio.to_thread(open, tmp_path, "wb")
+                try:
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > self.max_object_bytes:
+                            self._too_large.add(key)
+                            return None
+                        digest.update(chunk)
+                        await asyncio.to_thread(f.write, chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+            entry = CacheEntry(key, data_path, size, f'"{digest.hexdigest()}"', content_type)
+            await asyncio.to_thread(
+                (self.directory / f"{key}.json").write_text,
+                json.dumps({"url": url, "etag": entry.etag, "content_type": content_type})
+            )
+            await asyncio.to_thread(os.replace, tmp_path, data_path)
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching media {url}: {e}")
+            raise HTTPException(status_code=502, detail="Audio origin unavailable")
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self.bytes_filled += size
+        self._remove(key)
+        self._entries[key] = entry
+        self.bytes += size
+        self._evict()
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.size
+            self.evictions += 1
+            # Open handles keep streaming from the unlinked file
+            entry.path.unlink(missing_ok=True)
+            entry.path.with_suffix(".json").unlink(missing_ok=True)
+
+    async def stream(self, entry: CacheEntry, start: int, length: int) -> AsyncIterator[bytes]:
+        """Open ``entry`` now and return an iterator of ``length`` bytes from ``start``.
+
+        The handle stays valid if the entry is evicted mid-response.
+        """
+        handle = await asyncio.to_thread(open, entry.path, "rb")
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                offset = start
+                end = start + length
+                while offset < end:
+                    chunk = await asyncio.to_thread(os.pread, handle.fileno(), min(MEDIA_STREAM_CHUNK_SIZE, end - offset), offset)
+                    if not chunk:
+                        break
+                    offset += len(chunk)
+                    self.bytes_served += len(chunk)
+                    yield chunk
+            finally:
+                handle.close()
+
+        return chunks()
+
+    async def respond(self, entry: CacheEntry, request: Request, cache_control: str) -> Response:
+        """The response for ``entry``: 304 on a matching ETag, 206 for a Range, else the whole body"""
+        headers = {"ETag": entry.etag, "Accept-Ranges": "bytes", "Cache-Control": cache_control}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+
+        # A stale If-Range means the client's partial copy is outdated: send everything
+        if_range = request.headers.get("if-range")
+        byte_range = parse_range(request.headers.get("range"), entry.size) if if_range in (None, entry.etag) else None
+        if byte_range is None:
+            status_code, start, length = 200, 0, entry.size
+        else:
+            start, end = byte_range
+            status_code, length = 206, end - start + 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+        headers["Content-Length"] = str(length)
+
+        if request.method == "HEAD":
+            return Response(status_code=status_code, headers=headers, media_type=entry.content_type)
+        if status_code == 200:
+            # Starlette hands the file to the server when it supports pathsend, else reads it in chunks
+            self.bytes_served += length
+            return FileResponse(entry.path, headers=headers, media_type=entry.content_type)
+        return StreamingResponse(
+            await self.stream(entry, start, length), status_code=status_code, headers=headers, media_type=entry.content_type
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "bytes_filled": self.bytes_filled,
+            "bytes_served": self.bytes_served,
+            "local": self.local,
+            "fills": self._fills.metrics(),
+        }
+
+def file_entry(path: str) -> CacheEntry:
+    """An entry for a file served in place; its ETag comes from the file's mtime and size"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Object not found")
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return CacheEntry(path, Path(path), stat.st_size, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', content_type)
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive (start, end).
+
+    Returns None to serve the whole body (no header, or a multi-range or
+    malformed one, which RFC 9110 lets servers ignore); raises 416 when the
+    range lies outside the object.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first == "":
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if end < start and start < size:
+                return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+# Singleton instance
+media_cache = MediaCache()
@@ -0,0 +1,63 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException
+
+Cursor = Tuple[str, str]  # (sort column value, id)
+
+# Keyset mode starting from the first row (``?after=`` with an empty value)
+FIRST_PAGE: Cursor = ("", "")
+
+def encode_cursor(sort_value: Any, row_id: str) -> str:
+    """Opaque, URL-safe cursor pointing just past the given row"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of ``encode_cursor``; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    # Both parts end up inside a PostgREST filter, so only accept well-formed values
+    try:
+        datetime.fromisoformat(sort_value)
+        uuid.UUID(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return sort_value, row_id
+
+def parse_after(after: Optional[str]) -> Optional[Cursor]:
+    """Turn the ``after`` query parameter into a cursor; None keeps offset mode"""
+    if after is None:
+        return None
+    if after == "":
+        return FIRST_PAGE
+    try:
+        return decode_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(column: str, after: Cursor, desc: bool = True) -> str:
+    """PostgREST ``or=`` expression selecting rows strictly after ``after``.
+
+    Expands ``(column, id) < (value, id)`` since PostgREST has no row
+    comparison; the ``(column DESC, id DESC)`` indexes in supabase_schema.sql
+    serve both branches.
+    """
+    value, row_id = after
+    op = "lt" if desc else "gt"
+    # Values are double-quoted because timestamps contain PostgREST's reserved '.' and ':'
+    return f'{column}.{op}."{value}",and({column}.eq."{value}",id.{op}.{row_id})'
+
+def next_cursor(items: List[Any], limit: int, column: str = "created_at") -> Optional[str]:
+    """Cursor for the page after ``items``, or None when this was the last page"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(getattr(last, column), last.id)
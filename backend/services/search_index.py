@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from models.models import SearchResultsResponse
+from services.cache_service import estimate_size
+from services.text_utils import normalize, tokenize
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_ENABLED = os.environ.get("SEARCH_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+SEARCH_INDEX_PAGE_SIZE = int(os.environ.get("SEARCH_INDEX_PAGE_SIZE", "1000"))
+
+DocKey = Tuple[str, str]
+
+# Fields indexed per entity type, mirroring what the database search matches on
+INDEXED_FIELDS = {
+    "song": lambda doc: [doc.title, doc.genre],
+    "artist": lambda doc: [doc.name],
+    "album": lambda doc: [doc.title],
+    "playlist": lambda doc: [doc.name, doc.description],
+}
+
+def _label(entity_type: str, doc: Any) -> str:
+    return doc.name if entity_type in ("artist", "playlist") else doc.title
+
+class SearchIndex:
+    """Prefix-aware in-memory inverted index over the catalog.
+
+    Each query term matches every indexed token it is a prefix of (exact
+    token matches rank higher); multiple terms are AND-ed. Documents are kept
+    as the same pydantic models the database layer returns, and embedded
+    artists/albums are refreshed in place when those entities change.
+    """
+
+    def __init__(self, enabled: bool = SEARCH_INDEX_ENABLED):
+        self.enabled = enabled
+        self.ready = False
+        self.building = False
+        self.build_seconds: Optional[float] = None
+        self.built_at: Optional[float] = None
+        self._reset()
+        self._pending: Optional[List[Tuple[str, tuple]]] = None
+
+    def _reset(self):
+        self._docs: Dict[DocKey, Any] = {}
+        self._doc_tokens: Dict[DocKey, Set[str]] = {}
+        self._postings: Dict[str, Set[DocKey]] = {}
+        self._tokens: List[str] = []
+        # ("artist", id) -> songs/albums embedding that artist, ("album", id) -> songs
+        self._refs: Dict[DocKey, Set[DocKey]] = {}
+        self._bulk = False
+
+    # Building
+    async def build(self, db) -> None:
+        """(Re)build the index from a keyset scan of the catalog, then swap it in.
+
+        Database errors abort the build, leaving the previous state (and
+        ``ready``) untouched, so search keeps using the database.
+        """
+        if not self.enabled or self.building:
+            return
+        self.building = True
+        self._pending = []
+        started = time.perf_counter()
+        try:
+            fresh = SearchIndex(enabled=True)
+            # Sorted structures are appended to and sorted once instead of insort per entry
+            fresh._bulk = True
+            for entity_type in INDEXED_FIELDS:
+                async for page in db.iter_entities(entity_type, page_size=SEARCH_INDEX_PAGE_SIZE):
+                    for doc in page:
+                        fresh._index(entity_type, doc)
+            fresh._tokens.sort()
+
+            self._docs, self._doc_tokens = fresh._docs, fresh._doc_tokens
+            self._postings, self._tokens, self._refs = fresh._postings, fresh._tokens, fresh._refs
+            # Replay writes that happened while the snapshot was being loaded
+            pending, self._pending = self._pending, None
+            for op, args in pending:
+                getattr(self, op)(*args)
+
+            self.build_seconds = time.perf_counter() - started
+            self.built_at = time.time()
+            self.ready = True
+            logger.info(f"Search index built: {len(self._docs)} documents in {self.build_seconds:.2f}s")
+        except Exception as e:
+            logger.error(f"Error building search index: {e}")
+        finally:
+            self._pending = None
+            self.building = False
+
+    def start_background_build(self, db) -> Optional[asyncio.Task]:
+        if not self.enabled:
+            return None
+        return asyncio.create_task(self.build(db))
+
+    # Incremental updates
+    def upsert(self, entity_type: str, doc: Any):
+        if not self.enabled:
+            return
+        if self._pending is not None:
+            self._pending.append(("upsert", (entity_type, doc)))
+        self._index(entity_type, doc)
+
+        # Refresh copies of this entity embedded in other documents
+        if entity_type == "artist":
+            for key in list(self._refs.get(("artist", doc.id), ())):
+                self._docs[key] = self._docs[key].model_copy(update={"artist": doc})
+        elif entity_type == "album":
+            embedded = doc.model_copy(update={"artist": None})
+            for key in list(self._refs.get(("album", doc.id), ())):
+                self._docs[key] = self._docs[key].model_copy(update={"album": embedded})
+
+    def remove(self, entity_type: str, entity_id: str):
+        if not self.enabled:
+            return
+        if self._pending is not None:
+            self._pending.append(("remove", (entity_type, entity_id)))
+        self._unindex((entity_type, entity_id))
+
+        dependents = list(self._refs.pop((entity_type, entity_id), ()))
+        if entity_type == "artist":
+            # Albums and songs cascade-delete with their artist
+            for key in dependents:
+                self._unindex(key)
+        elif entity_type == "album":
+            # Songs keep existing with album_id set to NULL
+            for key in dependents:
+                if key in self._docs:
+                    self._docs[key] = self._docs[key].model_copy(update={"album": None, "album_id": None})
+
+    def _index(self, entity_type: str, doc: Any):
+        key = (entity_type, doc.id)
+        self._unindex(key)
+        if entity_type == "playlist":
+            # Search results never include playlist tracks
+            doc = doc.model_copy(update={"songs": []})
+        self._docs[key] = doc
+
+        tokens = set()
+        for value in INDEXED_FIELDS[entity_type](doc):
+            tokens.update(tokenize(value))
+        self._doc_tokens[key] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                if self._bulk:
+                    self._tokens.append(token)
+                else:
+                    insort(self._tokens, token)
+            postings.add(key)
+
+        for ref in self._refs_of(entity_type, doc):
+            self._refs.setdefault(ref, set()).add(key)
+
+    def _unindex(self, key: DocKey):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for token in self._doc_tokens.pop(key, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(key)
+            if not postings:
+                del self._postings[token]
+                i = bisect_left(self._tokens, token)
+                if i < len(self._tokens) and self._tokens[i] == token:
+                    del self._tokens[i]
+        for ref in self._refs_of(key[0], doc):
+            keys = self._refs.get(ref)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._refs[ref]
+
+    @staticmethod
+    def _refs_of(entity_type: str, doc: Any) -> Iterable[DocKey]:
+        if entity_type == "song":
+            yield ("artist", doc.artist_id)
+            if doc.album_id:
+                yield ("album", doc.album_id)
+        elif entity_type == "album":
+            yield ("artist", doc.artist_id)
+
+    # Querying
+    def _expand(self, term: str) -> Iterable[str]:
+        i = bisect_left(self._tokens, term)
+        while i < len(self._tokens) and self._tokens[i].startswith(term):
+            yield self._tokens[i]
+            i += 1
+
+    def match(self, query: str) -> Dict[DocKey, float]:
+        """Score every document matching all query terms"""
+        scores: Optional[Dict[DocKey, float]] = None
+        for term in tokenize(query):
+            term_scores: Dict[DocKey, float] = {}
+            for token in self._expand(term):
+                weight = 2.0 if token == term else 1.0
+                for key in self._postings[token]:
+                    if weight > term_scores.get(key, 0.0):
+                        term_scores[key] = weight
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def search(self, query: str, limit: int = 50) -> SearchResultsResponse:
+        grouped: Dict[str, List[Tuple[float, str, Any]]] = {"song": [], "artist": [], "album": [], "playlist": []}
+        for key, score in self.match(query).items():
+            doc = self._docs[key]
+            grouped[key[0]].append((score, normalize(_label(key[0], doc)), doc))
+
+        def top(entity_type: str) -> list:
+            ranked = sorted(grouped[entity_type], key=lambda item: (-item[0], item[1]))
+            return [doc for _, _, doc in ranked[:limit]]
+
+        return SearchResultsResponse(
+            songs=top("song"),
+            artists=top("artist"),
+            albums=top("album"),
+            playlists=top("playlist")
+        )
+
+    # Reporting
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the index structures and stored documents"""
+        total = sys.getsizeof(self._docs) + sys.getsizeof(self._postings) + sys.getsizeof(self._tokens)
+        total += sys.getsizeof(self._doc_tokens) + sys.getsizeof(self._refs)
+        for token, keys in self._postings.items():
+            total += sys.getsizeof(token) + sys.getsizeof(keys)
+        for tokens in self._doc_tokens.values():
+            total += sys.getsizeof(tokens)
+        for doc in self._docs.values():
+            total += estimate_size(doc)
+        return total
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "building": self.building,
+            "documents": len(self._docs),
+            "tokens": len(self._tokens),
+            "memory_bytes": self.memory_bytes() if self.enabled else 0,
+            "build_seconds": self.build_seconds,
+            "built_at": self.built_at,
+        }
+
+# Singleton instance
+search_index = SearchIndex()
@@ -0,0 +1,360 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import mimetypes
+import os
+import posixpath
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from urllib.parse import quote, unquote, urlsplit
+import httpx
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Files larger than this use Supabase's TUS resumable endpoint
+STORAGE_RESUMABLE_THRESHOLD = int(os.environ.get("STORAGE_RESUMABLE_THRESHOLD", str(6 * 1024 * 1024)))
+# Supabase requires every resumable chunk but the last to be exactly 6MB
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
+STORAGE_UPLOAD_RETRIES = int(os.environ.get("STORAGE_UPLOAD_RETRIES", "3"))
+STORAGE_TIMEOUT = float(os.environ.get("STORAGE_TIMEOUT", "60"))
+# Local backend: where objects live, and the origin the API is reachable at
+# (empty gives URLs relative to the API host)
+STORAGE_LOCAL_DIR = os.environ.get("STORAGE_LOCAL_DIR", str(Path(__file__).parent.parent / "storage"))
+STORAGE_PUBLIC_URL = os.environ.get("STORAGE_PUBLIC_URL", "").rstrip("/")
+# Leftover temp files from interrupted writes are removed after this long
+LOCAL_TMP_MAX_AGE = 3600
+
+# Local objects are served with a type guessed from their extension
+for _type, _extension in (("audio/mp4", ".m4a"), ("audio/flac", ".flac"), ("application/vnd.apple.mpegurl", ".m3u8"),
+                          ("video/mp2t", ".ts"), ("image/webp", ".webp"), ("image/avif", ".avif")):
+    mimetypes.add_type(_type, _extension)
+
+# (offset, length) -> the bytes of the file being uploaded in that range
+RangeReader = Callable[[int, int], AsyncIterator[bytes]]
+
+class StorageBackend(ABC):
+    """Where StorageService keeps objects.
+
+    StorageService validates uploads, enforces size limits and names
+    objects; a backend only moves bytes and maps paths to public URLs.
+    """
+
+    name = ""
+
+    @abstractmethod
+    async def put(self, bucket: str, path: str, content_type: Optional[str], size: Optional[int],
+                  chunks: AsyncIterator[bytes], read_range: RangeReader) -> int:
+        """Store an object from ``chunks`` (or ``read_range`` for random access); returns bytes stored"""
+
+    @abstractmethod
+    def public_url(self, bucket: str, path: str) -> str:
+        """The URL clients fetch the object at"""
+
+    @abstractmethod
+    def object_path(self, url: str, bucket: str) -> Optional[str]:
+        """The object path inside ``bucket`` for one of its public URLs, else None"""
+
+    def file_path(self, bucket: str, path: str) -> Optional[Path]:
+        """Where an object lives on this machine, if the backend keeps objects locally"""
+        return None
+
+    def local_path(self, url: str) -> Optional[str]:
+        """The file on this machine holding the object at ``url``, if the backend keeps one"""
+        return None
+
+    @abstractmethod
+    async def list(self, bucket: str, prefix: str = "") -> List[Dict[str, Any]]:
+        """Every object under ``prefix`` as ``{"path", "created_at", "metadata": {"size"}}``"""
+
+    @abstractmethod
+    async def remove(self, bucket: str, paths: List[str]):
+        """Delete objects; paths that do not exist are ignored"""
+
+    async def close(self):
+        pass
+
+    def metrics(self) -> dict:
+        return {}
+
+class SupabaseStorage(StorageBackend):
+    """Supabase Storage over its REST and TUS endpoints"""
+
+    name = "supabase"
+
+    def __init__(self, url: Optional[str], key: Optional[str]):
+        if not url or not key:
+            raise Exception("Supabase configuration missing")
+        # Imported here so the local backend does not need supabase-py
+        from supabase import create_client
+        self.supabase_url = url
+        self.supabase_key = key
+        self.supabase = create_client(url, key)
+        self._http: Optional[httpx.AsyncClient] = None
+        self.resumable_uploads = 0
+
+    def _get_http(self) -> httpx.AsyncClient:
+        # Created lazily so the client belongs to the running loop
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=f"{self.supabase_url}/storage/v1",
+                headers={"Authorization": f"Bearer {self.supabase_key}", "apikey": self.supabase_key},
+                timeout=STORAGE_TIMEOUT
+            )
+        return self._http
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def put(self, bucket: str, path: str, content_type: Optional[str], size: Optional[int],
+                  chunks: AsyncIterator[bytes], read_range: RangeReader) -> int:
+        if size is not None and size > STORAGE_RESUMABLE_THRESHOLD:
+            await self._put_resumable(bucket, path, read_range, size, content_type)
+            self.resumable_uploads += 1
+            return size
+        return await self._put_stream(bucket, path, chunks, content_type)
+
+    async def _put_stream(self, bucket: str, path: str, chunks: AsyncIterator[bytes], content_type: Optional[str]) -> int:
+        """Upload an object from an async byte stream (chunked transfer encoding); returns bytes sent"""
+        sent = 0
+
+        async def counted() -> AsyncIterator[bytes]:
+            nonlocal sent
+            async for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+
+        response = await self._get_http().post(
+            f"/object/{bucket}/{path}",
+            content=counted(),
+            headers={"content-type": content_type or "application/octet-stream", "x-upsert": "true"}
+        )
+        if response.status_code not in (200, 201):
+            raise HTTPException(status_code=500, detail=f"Upload failed with status: {response.status_code}")
+        return sent
+
+    async def _put_resumable(self, bucket: str, path: str, read_range: RangeReader, size: int, content_type: Optional[str]):
+        """Upload through the TUS endpoint in 6MB parts, resuming from the server offset on errors"""
+        http = self._get_http()
+        metadata = {
+            "bucketName": bucket,
+            "objectName": path,
+            "contentType": content_type or "application/octet-stream",
+            "cacheControl": "3600",
+        }
+        response = await http.post("/upload/resumable", headers={
+            "Tus-Resumable": "1.0.0",
+            "Upload-Length": str(size),
+            "Upload-Metadata": ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in metadata.items()),
+            "x-upsert": "true",
+        })
+        if response.status_code != 201:
+            raise HTTPException(status_code=500, detail=f"Upload failed with status: {response.status_code}")
+        location = response.headers["Location"]
+
+        offset = 0
+        retries = 0
+        while offset < size:
+            length = min(RESUMABLE_CHUNK_SIZE, size - offset)
+            try:
+                # Each 6MB TUS chunk is itself streamed, so only chunk_size bytes are held at once
+                response = await http.patch(location, content=read_range(offset, length), headers={
+                    "Tus-Resumable": "1.0.0",
+                    "Upload-Offset": str(offset),
+                    "Content-Length": str(length),
+                    "Content-Type": "application/offset+octet-stream",
+                })
+                if response.status_code == 204:
+                    offset = int(response.headers["Upload-Offset"])
+                    continue
+                error = f"status {response.status_code}"
+            except httpx.HTTPError as e:
+                error = str(e)
+
+            retries += 1
+            if retries > STORAGE_UPLOAD_RETRIES:
+                raise HTTPException(status_code=500, detail=f"Upload failed: {error}")
+            logger.warning(f"Resumable upload of {bucket}/{path} failed at offset {offset} ({error}), resuming")
+            # Ask the server how much it actually stored
+            head = await http.head(location, headers={"Tus-Resumable": "1.0.0"})
+            if head.status_code == 200:
+                offset = int(head.headers["Upload-Offset"])
+
+    def public_url(self, bucket: str, path: str) -> str:
+        return self.supabase.storage.from_(bucket).get_public_url(path)
+
+    def object_path(self, url: str, bucket: str) -> Optional[str]:
+        marker = f"/storage/v1/object/public/{bucket}/"
+        path = urlsplit(url).path
+        if marker not in path:
+            return None
+        return unquote(path.split(marker, 1)[1])
+
+    async def list(self, bucket: str, prefix: str = "") -> List[Dict[str, Any]]:
+        objects: List[Dict[str, Any]] = []
+        offset = 0
+        page = 1000
+        while True:
+            entries = await asyncio.to_thread(self.supabase.storage.from_(bucket).list, prefix or None, {
+                "limit": page, "offset": offset, "sortBy": {"column": "name", "order": "asc"}
+            })
+            for entry in entries:
+                path = f"{prefix}/{entry['name']}" if prefix else entry["name"]
+                if entry.get("id") is None:
+                    # Folders are listed without an id
+                    objects.extend(await self.list(bucket, path))
+                else:
+                    objects.append({**entry, "path": path})
+            if len(entries) < page:
+                return objects
+            offset += page
+
+    async def remove(self, bucket: str, paths: List[str]):
+        await asyncio.to_thread(self.supabase.storage.from_(bucket).remove, paths)
+
+    def metrics(self) -> dict:
+        return {"resumable_uploads": self.resumable_uploads}
+
+class LocalStorage(StorageBackend):
+    """Objects as files under ``<root>/<bucket>/<shard>/<path>``, served by the API itself.
+
+    ``<shard>`` is two directory levels taken from the hash of the object
+    path, so no directory grows past a few hundred entries however large
+    the catalog. Writes go to a temp file that is fsynced and renamed into
+    place, so readers never see a partial object. The content type served
+    is guessed from the extension.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str = STORAGE_LOCAL_DIR, public_url: str = STORAGE_PUBLIC_URL):
+        self.root = Path(root)
+        self.tmp_dir = self.root / ".tmp"
+        self.url_prefix = f"{public_url}/api/storage/"
+        self._swept = False
+        self.writes = 0
+        self.bytes_written = 0
+
+    def file_path(self, bucket: str, path: str) -> Path:
+        """Where an object lives on disk; rejects paths that would leave the bucket"""
+        normal = posixpath.normpath(path)
+        if (normal != path or normal == "." or normal.startswith(("/", "..")) or "\x00" in path
+                or not bucket or bucket.startswith(".") or "/" in bucket):
+            raise HTTPException(status_code=400, detail="Invalid object path")
+        shard = hashlib.sha256(path.encode()).hexdigest()
+        return self.root / bucket / shard[:2] / shard[2:4] / path
+
+    def _sweep_tmp(self):
+        # Other worker processes may be writing, so only old files are removed
+        cutoff = time.time() - LOCAL_TMP_MAX_AGE
+        for tmp in self.tmp_dir.glob("*"):
+            try:
+                if tmp.stat().st_mtime < cutoff:
+                    tmp.unlink()
+            except OSError:
+                pass
+        self._swept = True
+
+    async def put(self, bucket: str, path: str, content_type: Optional[str], size: Optional[int],
+                  chunks: AsyncIterator[bytes], read_range: RangeReader) -> int:
+        target = self.file_path(bucket, path)
+        tmp = self.tmp_dir / uuid.uuid4().hex
+        await asyncio.to_thread(self.tmp_dir.mkdir, parents=True, exist_ok=True)
+        if not self._swept:
+            await asyncio.to_thread(self._sweep_tmp)
+        out = await asyncio.to_thread(open, tmp, "wb")
+        written = 0
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(out.write, chunk)
+                written += len(chunk)
+
+            def commit():
+                out.flush()
+                os.fsync(out.fileno())
+                out.close()
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, target)
+
+            await asyncio.to_thread(commit)
+        except BaseException:
+            out.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        self.writes += 1
+        self.bytes_written += written
+        return written
+
+    def public_url(self, bucket: str, path: str) -> str:
+        return f"{self.url_prefix}{bucket}/{quote(path)}"
+
+    def object_path(self, url: str, bucket: str) -> Optional[str]:
+        if not url.startswith(f"{self.url_prefix}{bucket}/"):
+            return None
+        return unquote(urlsplit(url[len(self.url_prefix) + len(bucket) + 1:]).path)
+
+    def local_path(self, url: str) -> Optional[str]:
+        if not url.startswith(self.url_prefix):
+            return None
+        bucket, _, path = url[len(self.url_prefix):].partition("/")
+        try:
+            return str(self.file_path(bucket, unquote(urlsplit(path).path)))
+        except HTTPException:
+            return None
+
+    async def list(self, bucket: str, prefix: str = "") -> List[Dict[str, Any]]:
+        def walk() -> List[Dict[str, Any]]:
+            objects = []
+            base = self.root / bucket
+            # <bucket>/<xx>/<yy>/<object path>
+            for shard in base.glob("*/*"):
+                for directory, _, files in os.walk(shard):
+                    for name in files:
+                        file = Path(directory) / name
+                        path = file.relative_to(shard).as_posix()
+                        if not path.startswith(prefix):
+                            continue
+                        stat = file.stat()
+                        objects.append({
+                            "path": path,
+                            "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+                            "metadata": {"size": stat.st_size},
+                        })
+            return sorted(objects, key=lambda obj: obj["path"])
+
+        return await asyncio.to_thread(walk)
+
+    async def remove(self, bucket: str, paths: List[str]):
+        def unlink():
+            for path in paths:
+                file = self.file_path(bucket, path)
+                file.unlink(missing_ok=True)
+                # Prune folders left empty, stopping at the shard directory
+                shard = file.parents[path.count("/")]
+                parent = file.parent
+                while parent != shard:
+                    try:
+                        parent.rmdir()
+                    except OSError:
+                        break
+                    parent = parent.parent
+
+        await asyncio.to_thread(unlink)
+
+    def metrics(self) -> dict:
+        return {"root": str(self.root), "writes": self.writes, "bytes_written": self.bytes_written}
+
+def create_backend(name: str) -> StorageBackend:
+    """The backend named by STORAGE_BACKEND"""
+    if name == "local":
+        return LocalStorage()
+    if name == "supabase":
+        return SupabaseStorage(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_SERVICE_ROLE_KEY"))
+    raise Exception(f"Unknown storage backend: {name}")
@@ -0,0 +1,92 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Buckets the API uploads into
+GC_BUCKETS = ("music-files", "cover-images")
+# Table -> columns holding public URLs of storage objects
+GC_REFERENCES = {
+    "songs": ("audio_url", "cover_url", "hls_url", "cover_srcset"),
+    "albums": ("cover_url", "cover_srcset"),
+    "artists": ("avatar_url", "avatar_srcset"),
+    "playlists": ("cover_url", "cover_srcset"),
+}
+# Objects created or deduplicated more recently than this are never collected:
+# an upload is stored before the row that references it is created
+GC_GRACE_SECONDS = float(os.environ.get("STORAGE_GC_GRACE_SECONDS", str(24 * 3600)))
+
+def column_urls(value: Any) -> List[str]:
+    """URLs held in a column: a plain URL, or a format -> srcset map of resized images"""
+    if isinstance(value, dict):
+        return [candidate.split()[0] for srcset in value.values() for candidate in srcset.split(",") if candidate.strip()]
+    return [value]
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+async def referenced_paths(db, storage) -> Dict[str, Set[str]]:
+    """Scan every catalog row for storage URLs; returns bucket -> referenced object paths"""
+    referenced: Dict[str, Set[str]] = {bucket: set() for bucket in GC_BUCKETS}
+    for table, columns in GC_REFERENCES.items():
+        async for rows in db.iter_table(table):
+            for row in rows:
+                for column in columns:
+                    if not row.get(column):
+                        continue
+                    for url in column_urls(row[column]):
+                        for bucket in GC_BUCKETS:
+                            path = storage.object_path(url, bucket)
+                            if path is not None:
+                                referenced[bucket].add(path)
+    return referenced
+
+async def collect_garbage(db, storage, apply: bool = False, grace_seconds: float = GC_GRACE_SECONDS) -> Dict[str, Any]:
+    """Find storage objects no catalog row references, deleting them when ``apply`` is set.
+
+    References are gathered before any bucket is listed, so an object is only
+    reported once the full scan has confirmed nothing points at it; any
+    error aborts the run before deleting.
+    """
+    referenced = await referenced_paths(db, storage)
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    report: Dict[str, Any] = {"apply": apply, "grace_seconds": grace_seconds, "buckets": {}}
+
+    for bucket in GC_BUCKETS:
+        # A referenced HLS master keeps its whole renditions/<song>/<job>/ folder
+        kept_folders = {
+            "/".join(path.split("/")[:3]) + "/" for path in referenced[bucket] if path.startswith("renditions/")
+        }
+        recently_used = {
+            row["path"] for row in await db.get_media_objects(bucket)
+            if (_timestamp(row.get("last_used_at")) or cutoff) > cutoff
+        }
+        objects = await storage.list_objects(bucket)
+        orphans = []
+        orphan_bytes = 0
+        for obj in objects:
+            if obj["path"] in referenced[bucket] or obj["path"] in recently_used:
+                continue
+            if any(obj["path"].startswith(folder) for folder in kept_folders):
+                continue
+            created = _timestamp(obj.get("created_at"))
+            if created is None or created > cutoff:
+                continue
+            orphans.append(obj["path"])
+            orphan_bytes += (obj.get("metadata") or {}).get("size") or 0
+
+        deleted = await storage.remove_objects(bucket, orphans) if apply and orphans else 0
+        logger.info(f"Storage GC {bucket}: {len(objects)} objects, {len(orphans)} unreferenced, {deleted} deleted")
+        report["buckets"][bucket] = {
+            "objects": len(objects),
+            "referenced": len(referenced[bucket]),
+            "orphaned": orphans,
+            "orphaned_bytes": orphan_bytes,
+            "deleted": deleted,
+        }
+    return report
@@ -1,50 +1,68 @@
 import os
 import uuid
-from typing import Optional
-from supabase import create_client, Client
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
 from fastapi import UploadFile, HTTPException
+from starlette.datastructures import Headers
+from services.storage_backends import StorageBackend, create_backend
+
+logger = logging.getLogger(__name__)
+
+# "supabase" or "local" (files on this machine, served by the API)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase")
+# Bytes read from the upload spool and sent per chunk
+STORAGE_CHUNK_SIZE = int(os.environ.get("STORAGE_CHUNK_SIZE", str(1024 * 1024)))
+MAX_AUDIO_UPLOAD_BYTES = int(os.environ.get("MAX_AUDIO_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+MAX_IMAGE_UPLOAD_BYTES = int(os.environ.get("MAX_IMAGE_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Set to "false" to name uploads randomly and skip the content-hash index; the
+# index is a database table, so it is off by default when none is configured
+STORAGE_DEDUP = os.environ.get("STORAGE_DEDUP", "true" if os.environ.get("SUPABASE_URL") else "false").lower() != "false"
+# Objects removed per storage delete request
+STORAGE_REMOVE_BATCH = 100
 
 class StorageService:
-    def __init__(self):
-        self.supabase_url = os.environ.get("SUPABASE_URL")
-        self.supabase_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-        
-        if not self.supabase_url or not self.supabase_key:
-            raise Exception("Supabase configuration missing")
-            
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-    
+    """Validates, sizes and names uploads, and keeps them in a StorageBackend.
+
+    The backend (Supabase or local disk) only moves bytes; content
+    addressing, limits and metrics are the same whichever one is in use.
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self.chunk_size = STORAGE_CHUNK_SIZE
+        self.dedup = STORAGE_DEDUP
+        self._index = None
+        self.uploads = 0
+        self.bytes_uploaded = 0
+        self.rejected = 0
+        # Largest chunk held in memory by any upload so far
+        self.peak_chunk_bytes = 0
+        self.dedup_hits = 0
+        self.bytes_deduplicated = 0
+        self.index_errors = 0
+
+    def _get_index(self):
+        # Imported on first use, so the local backend works without Supabase configured
+        if self._index is None:
+            from services.database_service import db_service
+            self._index = db_service
+        return self._index
+
+    async def close(self):
+        await self.backend.close()
+
     async def upload_audio_file(self, file: UploadFile) -> str:
-        """Upload an audio file to Supabase storage"""
+        """Upload an audio file to storage"""
         if not file.content_type or not file.content_type.startswith('audio/'):
             raise HTTPException(status_code=400, detail="File must be an audio file")
         
-        # Generate unique filename
         file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'mp3'
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
         
         try:
-            # Read file contents
-            file_contents = await file.read()
-            
-            # Upload to Supabase storage
-            result = self.supabase.storage.from_("music-files").upload(
-                unique_filename, 
-                file_contents,
-                {
-                    "content-type": file.content_type,
-                    "x-upsert": "true"
-                }
-            )
-            
-            # Check if upload was successful (newer Supabase client)
-            if hasattr(result, 'status_code') and result.status_code != 200:
-                raise HTTPException(status_code=500, detail=f"Upload failed with status: {result.status_code}")
-            
-            # Get public URL
-            public_url = self.supabase.storage.from_("music-files").get_public_url(unique_filename)
-            
-            return public_url
+            return await self._store(file, "music-files", file_extension, MAX_AUDIO_UPLOAD_BYTES)
             
         except Exception as e:
             if isinstance(e, HTTPException):
@@ -52,50 +70,178 @@ class StorageService:
             raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
     
     async def upload_cover_image(self, file: UploadFile) -> str:
-        """Upload a cover image to Supabase storage"""
+        """Upload a cover image to storage"""
         if not file.content_type or not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image file")
         
-        # Generate unique filename
         file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
         
         try:
-            # Read file contents
-            file_contents = await file.read()
-            
-            # Upload to Supabase storage
-            result = self.supabase.storage.from_("cover-images").upload(
-                unique_filename, 
-                file_contents,
-                {
-                    "content-type": file.content_type,
-                    "x-upsert": "true"
-                }
-            )
-            
-            # Check if upload was successful (newer Supabase client)
-            if hasattr(result, 'status_code') and result.status_code != 200:
-                raise HTTPException(status_code=500, detail=f"Upload failed with status: {result.status_code}")
-            
-            # Get public URL
-            public_url = self.supabase.storage.from_("cover-images").get_public_url(unique_filename)
-            
-            return public_url
+            return await self._store(file, "cover-images", file_extension, MAX_IMAGE_UPLOAD_BYTES)
             
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
             raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
-    
+
+    async def upload_local_file(self, path: str, filename: str, content_type: str,
+                                bucket: str = "music-files", max_bytes: int = MAX_AUDIO_UPLOAD_BYTES,
+                                object_path: Optional[str] = None) -> str:
+        """Upload a file already on local disk (e.g. an assembled resumable upload).
+
+        ``object_path`` stores it under that exact name instead of its content
+        hash, for files that reference each other by relative path (HLS).
+        """
+        file_extension = filename.split('.')[-1] if '.' in filename else 'bin'
+
+        try:
+            with open(path, "rb") as f:
+                upload = UploadFile(f, size=os.path.getsize(path), filename=filename, headers=Headers({"content-type": content_type}))
+                if object_path is not None:
+                    await self._upload(upload, bucket, object_path, max_bytes)
+                    return self.backend.public_url(bucket, object_path)
+                return await self._store(upload, bucket, file_extension, max_bytes)
+        except Exception as e:
+            if isinstance(e, HTTPException):
+                raise e
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    # Content addressing
+    async def _store(self, file: UploadFile, bucket: str, extension: str, max_bytes: int) -> str:
+        """Upload ``file`` unless identical bytes are already stored; returns the public URL"""
+        if not self.dedup:
+            path = f"{uuid.uuid4()}.{extension}"
+            await self._upload(file, bucket, path, max_bytes)
+            return self.backend.public_url(bucket, path)
+
+        # The request body is already spooled to local disk, so hashing it first
+        # costs a local read and lets a duplicate skip the network transfer entirely
+        digest, size = await self._hash(file, max_bytes)
+        now = datetime.now(timezone.utc).isoformat()
+        existing = await self._lookup(bucket, digest)
+        if existing is not None:
+            self.dedup_hits += 1
+            self.bytes_deduplicated += size
+            await self._record({**existing, "last_used_at": now})
+            return existing["url"]
+
+        path = f"{digest}.{extension}"
+        await self._upload(file, bucket, path, max_bytes)
+        url = self.backend.public_url(bucket, path)
+        await self._record({
+            "bucket": bucket, "sha256": digest, "path": path, "url": url, "size_bytes": size,
+            "content_type": file.content_type, "created_at": now, "last_used_at": now,
+        })
+        return url
+
+    async def _hash(self, file: UploadFile, max_bytes: int):
+        """SHA-256 and size of the spooled upload, read in chunks"""
+        digest = hashlib.sha256()
+        size = 0
+        async for chunk in self._chunks(file, max_bytes):
+            # hashlib releases the GIL on large buffers, so this does not stall the loop
+            await asyncio.to_thread(digest.update, chunk)
+            size += len(chunk)
+        return digest.hexdigest(), size
+
+    async def _lookup(self, bucket: str, digest: str) -> Optional[Dict[str, Any]]:
+        # The index only saves work; if it is unavailable, upload as usual
+        try:
+            return await self._get_index().get_media_object(bucket, digest)
+        except Exception as e:
+            self.index_errors += 1
+            logger.error(f"Error looking up media object {bucket}/{digest}: {e}")
+            return None
+
+    async def _record(self, row: Dict[str, Any]):
+        try:
+            await self._get_index().record_media_object(row)
+        except Exception as e:
+            self.index_errors += 1
+            logger.error(f"Error recording media object {row['bucket']}/{row['path']}: {e}")
+
+    # Streaming transfer
+    async def _upload(self, file: UploadFile, bucket: str, path: str, max_bytes: int):
+        """Send an UploadFile to the backend without reading it into memory as a whole"""
+        if file.size is not None and file.size > max_bytes:
+            self.rejected += 1
+            raise HTTPException(status_code=413, detail=f"File exceeds the {max_bytes} byte limit")
+
+        sent = await self.backend.put(
+            bucket, path, file.content_type, file.size,
+            self._chunks(file, max_bytes), lambda offset, length: self._read_range(file, offset, length)
+        )
+        self.uploads += 1
+        self.bytes_uploaded += sent
+
+    async def _chunks(self, file: UploadFile, max_bytes: int) -> AsyncIterator[bytes]:
+        """Read the upload spool in chunks, enforcing ``max_bytes`` as it goes"""
+        await file.seek(0)
+        total = 0
+        while chunk := await file.read(self.chunk_size):
+            total += len(chunk)
+            if total > max_bytes:
+                self.rejected += 1
+                raise HTTPException(status_code=413, detail=f"File exceeds the {max_bytes} byte limit")
+            self.peak_chunk_bytes = max(self.peak_chunk_bytes, len(chunk))
+            yield chunk
+
+    async def _read_range(self, file: UploadFile, offset: int, length: int) -> AsyncIterator[bytes]:
+        await file.seek(offset)
+        remaining = length
+        while remaining > 0 and (chunk := await file.read(min(self.chunk_size, remaining))):
+            remaining -= len(chunk)
+            self.peak_chunk_bytes = max(self.peak_chunk_bytes, len(chunk))
+            yield chunk
+
     async def delete_file(self, bucket_name: str, file_path: str) -> bool:
-        """Delete a file from Supabase storage"""
+        """Delete a file from storage"""
         try:
-            result = self.supabase.storage.from_(bucket_name).remove([file_path])
-            # Check if deletion was successful (newer Supabase client)
-            return not (hasattr(result, 'status_code') and result.status_code != 200)
+            await self.backend.remove(bucket_name, [file_path])
+            # A stale index row would hand out the deleted object's URL to the next duplicate
+            if self.dedup:
+                await self._get_index().delete_media_objects(bucket_name, [file_path])
+            return True
         except Exception as e:
             return False
 
+    def object_path(self, url: str, bucket: str) -> Optional[str]:
+        """The object path inside ``bucket`` for one of its public URLs, else None"""
+        return self.backend.object_path(url, bucket)
+
+    def local_path(self, url: str) -> Optional[str]:
+        """The local file behind ``url`` when the backend keeps objects on this machine"""
+        return self.backend.local_path(url)
+
+    async def list_objects(self, bucket: str, prefix: str = "") -> List[Dict[str, Any]]:
+        """Every object in ``bucket`` under ``prefix`` (recursing into folders), with its full path"""
+        return await self.backend.list(bucket, prefix)
+
+    async def remove_objects(self, bucket: str, paths: List[str]) -> int:
+        """Delete objects and their index rows in batches; returns how many were removed"""
+        removed = 0
+        for start in range(0, len(paths), STORAGE_REMOVE_BATCH):
+            batch = paths[start:start + STORAGE_REMOVE_BATCH]
+            await self.backend.remove(bucket, batch)
+            if self.dedup:
+                await self._get_index().delete_media_objects(bucket, batch)
+            removed += len(batch)
+        return removed
+
+    def metrics(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "uploads": self.uploads,
+            "bytes_uploaded": self.bytes_uploaded,
+            "rejected": self.rejected,
+            "chunk_size": self.chunk_size,
+            "peak_chunk_bytes": self.peak_chunk_bytes,
+            "dedup": self.dedup,
+            "dedup_hits": self.dedup_hits,
+            "bytes_deduplicated": self.bytes_deduplicated,
+            "index_errors": self.index_errors,
+            **self.backend.metrics(),
+        }
+
 # Create singleton instance
-storage_service = StorageService()
\ No newline at end of file
+storage_service = StorageService(create_backend(STORAGE_BACKEND))
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Set, Tuple
+from models.models import Suggestion
+from services.text_utils import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Labels only, so it is cheap enough to keep on even without the full-text index
+SUGGEST_INDEX_ENABLED = os.environ.get("SUGGEST_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+SUGGEST_INDEX_PAGE_SIZE = int(os.environ.get("SUGGEST_INDEX_PAGE_SIZE", "1000"))
+
+# Entity type -> (table, label column, columns scanned to build the index)
+SUGGEST_SOURCES = {
+    "song": ("songs", "title", "id, title, artist_id, created_at"),
+    "artist": ("artists", "name", "id, name, created_at"),
+    "album": ("albums", "title", "id, title, artist_id, created_at"),
+    "playlist": ("playlists", "name", "id, name, created_at"),
+}
+
+DocKey = Tuple[str, str]
+
+def _normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+class SuggestIndex:
+    """Sorted array of normalized labels for typeahead prefix lookups.
+
+    Every label is stored once per word start ("blinding lights" and
+    "lights"), so typing the beginning of any word finds it. A lookup is a
+    bisect plus a short forward scan. Songs and albums remember their
+    artist, so deleting an artist drops them as the database cascade does.
+    """
+
+    def __init__(self, enabled: bool = SUGGEST_INDEX_ENABLED):
+        self.enabled = enabled
+        self.ready = False
+        self.building = False
+        self.build_seconds: Optional[float] = None
+        self._entries: List[Tuple[str, str, str]] = []  # (normalized key, entity type, id)
+        # (entity type, id) -> (label, normalized label, artist id)
+        self._labels: Dict[DocKey, Tuple[str, str, Optional[str]]] = {}
+        # artist id -> songs and albums by that artist
+        self._children: Dict[str, Set[DocKey]] = {}
+        self._bulk = False
+        self._pending: Optional[List[Tuple[str, tuple]]] = None
+
+    # Building
+    async def build(self, db) -> None:
+        """(Re)build from a keyset scan of the catalog labels, then swap it in"""
+        if not self.enabled or self.building:
+            return
+        self.building = True
+        self._pending = []
+        started = time.perf_counter()
+        try:
+            fresh = SuggestIndex(enabled=True)
+            fresh._bulk = True
+            for entity_type, (table, column, columns) in SUGGEST_SOURCES.items():
+                async for rows in db.iter_table(table, page_size=SUGGEST_INDEX_PAGE_SIZE, columns=columns):
+                    for row in rows:
+                        fresh.add(entity_type, row["id"], row[column], row.get("artist_id"))
+            fresh._entries.sort()
+
+            self._entries, self._labels, self._children = fresh._entries, fresh._labels, fresh._children
+            # Replay writes that happened while the snapshot was being loaded
+            pending, self._pending = self._pending, None
+            for op, args in pending:
+                getattr(self, op)(*args)
+
+            self.build_seconds = time.perf_counter() - started
+            self.ready = True
+            logger.info(f"Suggest index built: {len(self._labels)} labels in {self.build_seconds:.2f}s")
+        except Exception as e:
+            logger.error(f"Error building suggest index: {e}")
+        finally:
+            self._pending = None
+            self.building = False
+
+    def start_background_build(self, db) -> Optional[asyncio.Task]:
+        if not self.enabled:
+            return None
+        return asyncio.create_task(self.build(db))
+
+    # Incremental updates
+    @staticmethod
+    def _keys(normalized: str) -> List[str]:
+        words = normalized.split(" ")
+        return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+    def upsert(self, entity_type: str, doc: Any):
+        """Index a catalog model as returned by DatabaseService"""
+        label = doc.name if entity_type in ("artist", "playlist") else doc.title
+        self.add(entity_type, doc.id, label, getattr(doc, "artist_id", None))
+
+    def add(self, entity_type: str, entity_id: str, label: str, artist_id: Optional[str] = None):
+        if not self.enabled:
+            return
+        if self._pending is not None:
+            self._pending.append(("add", (entity_type, entity_id, label, artist_id)))
+        self._remove((entity_type, entity_id))
+        normalized = _normalize(label or "")
+        if not normalized:
+            return
+        self._labels[(entity_type, entity_id)] = (label, normalized, artist_id)
+        if artist_id:
+            self._children.setdefault(artist_id, set()).add((entity_type, entity_id))
+        for key in self._keys(normalized):
+            entry = (key, entity_type, entity_id)
+            if self._bulk:
+                self._entries.append(entry)
+            else:
+                insort(self._entries, entry)
+
+    def remove(self, entity_type: str, entity_id: str):
+        if not self.enabled:
+            return
+        if self._pending is not None:
+            self._pending.append(("remove", (entity_type, entity_id)))
+        self._remove((entity_type, entity_id))
+        if entity_type == "artist":
+            # Albums and songs cascade-delete with their artist
+            for child in list(self._children.pop(entity_id, ())):
+                self._remove(child)
+
+    def _remove(self, doc: DocKey):
+        labels = self._labels.pop(doc, None)
+        if labels is None:
+            return
+        for key in self._keys(labels[1]):
+            entry = (key, *doc)
+            i = bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+        siblings = self._children.get(labels[2]) if labels[2] else None
+        if siblings is not None:
+            siblings.discard(doc)
+            if not siblings:
+                del self._children[labels[2]]
+
+    # Querying
+    def suggest(self, prefix: str, limit: int = 8) -> List[Suggestion]:
+        needle = _normalize(prefix)
+        if not needle:
+            return []
+        matches: Dict[DocKey, bool] = {}
+        i = bisect_left(self._entries, (needle,))
+        # Scan a bounded window so very short prefixes stay cheap
+        scan_limit = limit * 20
+        while i < len(self._entries) and scan_limit > 0 and self._entries[i][0].startswith(needle):
+            key, entity_type, entity_id = self._entries[i]
+            doc = (entity_type, entity_id)
+            whole_label = key == self._labels[doc][1]
+            matches[doc] = matches.get(doc, False) or whole_label
+            i += 1
+            scan_limit -= 1
+
+        # Labels that start with the prefix first, then shorter labels
+        ranked = sorted(matches.items(), key=lambda item: (not item[1], len(self._labels[item[0]][1]), self._labels[item[0]][1]))
+        return [
+            Suggestion(type=entity_type, id=entity_id, label=self._labels[(entity_type, entity_id)][0])
+            for (entity_type, entity_id), _ in ranked[:limit]
+        ]
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "building": self.building,
+            "labels": len(self._labels),
+            "entries": len(self._entries),
+            "build_seconds": self.build_seconds,
+        }
+
+# Singleton instance
+suggest_index = SuggestIndex()
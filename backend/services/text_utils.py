@@ -0,0 +1,15 @@
+import re
+import unicodedata
+from typing import List, Optional
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def normalize(text: str) -> str:
+    """Case-fold and strip accents so 'Beyoncé' and 'beyonce' compare equal"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(normalize(text))
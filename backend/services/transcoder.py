@@ -0,0 +1,422 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import UploadFile
+from models.models import Rendition, SongUpdate, TranscodeJob
+from services.database_service import db_service
+from services.storage_service import storage_service
+from services.waveform import WAVEFORM_SAMPLE_RATE, pcm_output_args, peaks_from_pcm, peaks_from_pcm_file
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+# "auto" transcodes only when ffmpeg is installed; "true"/"false" force it
+TRANSCODE_ENABLED = os.environ.get("TRANSCODE_ENABLED", "auto").lower()
+# ffmpeg processes running at once, each transcoding one song
+TRANSCODE_WORKERS = int(os.environ.get("TRANSCODE_WORKERS", "2"))
+TRANSCODE_QUEUE_SIZE = int(os.environ.get("TRANSCODE_QUEUE_SIZE", "100"))
+# AAC bitrates (kbps), each produced as a progressive file and an HLS variant
+TRANSCODE_BITRATES = [int(b) for b in os.environ.get("TRANSCODE_BITRATES", "64,128,256").split(",")]
+HLS_SEGMENT_SECONDS = int(os.environ.get("HLS_SEGMENT_SECONDS", "6"))
+TRANSCODE_TIMEOUT = float(os.environ.get("TRANSCODE_TIMEOUT", "900"))
+TRANSCODE_DIR = os.environ.get("TRANSCODE_DIR", str(Path(__file__).parent.parent / "transcode"))
+# Scratch entries older than this are left over from dead processes; younger ones may be in use
+TRANSCODE_DIR_MAX_AGE = float(os.environ.get("TRANSCODE_DIR_MAX_AGE", str(24 * 3600)))
+# Finished jobs kept for the status endpoint
+TRANSCODE_JOB_HISTORY = 1000
+# Output files uploaded at once per job
+TRANSCODE_UPLOAD_CONCURRENCY = 8
+
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".m4a": "audio/mp4",
+}
+
+def ffmpeg_command(source: str, out_dir: str, bitrates: List[int], segment_seconds: int = HLS_SEGMENT_SECONDS,
+                   waveform_path: Optional[str] = None) -> List[str]:
+    """One ffmpeg run that decodes once and writes every rendition.
+
+    Produces ``<kbps>k.m4a`` progressive files plus ``hls/<kbps>k.m3u8``
+    variant playlists with their segments and an ``hls/master.m3u8``, and
+    the mono PCM for the waveform when ``waveform_path`` is given.
+    """
+    command = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-nostdin", "-y", "-i", source]
+    for kbps in bitrates:
+        command += ["-map", "0:a:0", "-vn", "-c:a", "aac", "-b:a", f"{kbps}k", "-movflags", "+faststart", f"{out_dir}/{kbps}k.m4a"]
+    for _ in bitrates:
+        command += ["-map", "0:a:0"]
+    command += ["-vn", "-c:a", "aac"]
+    for index, kbps in enumerate(bitrates):
+        command += [f"-b:a:{index}", f"{kbps}k"]
+    command += [
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", f"{out_dir}/hls/%v_%03d.ts",
+        "-master_pl_name", "master.m3u8",
+        "-var_stream_map", " ".join(f"a:{index},name:{kbps}k" for index, kbps in enumerate(bitrates)),
+        f"{out_dir}/hls/%v.m3u8",
+    ]
+    if waveform_path:
+        command += pcm_output_args(waveform_path)
+    return command
+
+class Transcoder:
+    """Bounded queue of transcoding jobs run as ffmpeg subprocesses.
+
+    ``/api/songs/upload`` stages a local copy of the original (so the job
+    never downloads it back from storage) and submits a job once the song
+    row exists. ``workers`` tasks each run one ffmpeg process at a time,
+    upload its outputs to ``renditions/<song>/<job>/`` in the music bucket
+    and write ``hls_url``/``renditions`` on the song; a new folder per job
+    means a re-transcode never overwrites files a client is playing, and
+    storage GC removes the superseded folder. The same ffmpeg run decodes
+    the PCM for the song's waveform peaks. Jobs live in memory, so ones
+    queued at shutdown are lost; ``backfill`` picks those songs up again.
+    """
+
+    def __init__(self, db, workers: int = TRANSCODE_WORKERS, queue_size: int = TRANSCODE_QUEUE_SIZE,
+                 bitrates: List[int] = TRANSCODE_BITRATES, directory: str = TRANSCODE_DIR):
+        self.db = db
+        self.workers = workers
+        self.queue_size = queue_size
+        self.bitrates = bitrates
+        self.directory = Path(directory)
+        if TRANSCODE_ENABLED == "auto":
+            self.enabled = shutil.which(FFMPEG_BIN) is not None
+        else:
+            self.enabled = TRANSCODE_ENABLED == "true"
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, TranscodeJob]" = OrderedDict()
+        self._latest: Dict[str, str] = {}
+        # job id -> (source path or URL, whether the job deletes it, duration in ms)
+        self._sources: Dict[str, Tuple[str, bool, Optional[int]]] = {}
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.superseded = 0
+        self.running = 0
+        self.transcode_seconds = 0.0
+        self.audio_seconds = 0.0
+        self.bytes_published = 0
+        self.waveforms = 0
+        self.waveform_failures = 0
+
+    def _get_queue(self) -> asyncio.Queue:
+        # Created lazily so the queue belongs to the running loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    # Staging
+    async def stage_upload(self, file: UploadFile) -> Optional[str]:
+        """Copy an upload's spool to the scratch directory; None when transcoding is off"""
+        if not self.enabled:
+            return None
+        path = self.directory / f"{uuid.uuid4()}.src"
+
+        def copy():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as out:
+                shutil.copyfileobj(file.file, out, 1024 * 1024)
+
+        await file.seek(0)
+        try:
+            await asyncio.to_thread(copy)
+        finally:
+            await file.seek(0)
+        return str(path)
+
+    async def stage_path(self, source: str) -> Optional[str]:
+        """Hard-link (or copy) a local file into the scratch directory; None when transcoding is off"""
+        if not self.enabled:
+            return None
+        path = self.directory / f"{uuid.uuid4()}.src"
+
+        def link():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source, path)
+            except OSError:
+                shutil.copyfile(source, path)
+
+        await asyncio.to_thread(link)
+        return str(path)
+
+    def discard(self, staged: Optional[str]):
+        if staged:
+            Path(staged).unlink(missing_ok=True)
+
+    # Jobs
+    def submit(self, song_id: str, source: str, owned: bool = True, duration_ms: Optional[int] = None) -> Optional[TranscodeJob]:
+        """Queue a job; ``owned`` sources are deleted when it ends. None when transcoding is off"""
+        if not self.enabled:
+            if owned:
+                self.discard(source)
+            return None
+        job = self._new_job(song_id, source, owned, duration_ms)
+        try:
+            self._get_queue().put_nowait(job.id)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            self._finish(job, error="Transcode queue is full")
+            logger.warning(f"Transcode queue full, song {song_id} left untranscoded")
+            return job
+        self.submitted += 1
+        return job
+
+    def get_job(self, song_id: str) -> Optional[TranscodeJob]:
+        job_id = self._latest.get(song_id)
+        return self._jobs.get(job_id) if job_id else None
+
+    def _new_job(self, song_id: str, source: str, owned: bool, duration_ms: Optional[int]) -> TranscodeJob:
+        job = TranscodeJob(id=str(uuid.uuid4()), song_id=song_id, status="queued", created_at=datetime.now(timezone.utc))
+        self._jobs[job.id] = job
+        self._latest[song_id] = job.id
+        if not owned:
+            # A URL on the local storage backend is read straight from disk
+            source = storage_service.local_path(source) or source
+        self._sources[job.id] = (source, owned, duration_ms)
+        # Forget the oldest finished jobs
+        while len(self._jobs) > TRANSCODE_JOB_HISTORY:
+            oldest = next((j for j in self._jobs.values() if j.status in ("done", "failed")), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest.id]
+            if self._latest.get(oldest.song_id) == oldest.id:
+                del self._latest[oldest.song_id]
+        return job
+
+    def _finish(self, job: TranscodeJob, error: Optional[str] = None):
+        job.status = "failed" if error else "done"
+        job.error = error
+        job.finished_at = datetime.now(timezone.utc)
+        source, owned, _ = self._sources.pop(job.id, (None, False, None))
+        if owned:
+            self.discard(source)
+
+    def _is_current(self, job: TranscodeJob) -> bool:
+        """False once a newer job was submitted for the same song"""
+        return self._latest.get(job.song_id) == job.id
+
+    # Lifecycle
+    def _sweep(self):
+        # Other worker processes share the directory, so only old entries are removed
+        cutoff = time.time() - TRANSCODE_DIR_MAX_AGE
+        for path in self.directory.glob("*"):
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink()
+            except OSError:
+                pass
+
+    async def start(self):
+        if not self.enabled:
+            logger.info("Transcoding disabled (ffmpeg not found or TRANSCODE_ENABLED=false)")
+            return
+        # Staged sources and work directories left behind by processes that exited mid-job
+        await asyncio.to_thread(self._sweep)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        queue = self._get_queue()
+        while True:
+            job_id = await queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    await self.run(job)
+            finally:
+                queue.task_done()
+
+    async def run(self, job: TranscodeJob):
+        source, _, duration_ms = self._sources[job.id]
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        workdir = self.directory / job.id
+        # Kept outside workdir so it is not published with the renditions
+        pcm_path = self.directory / f"{job.id}.pcm"
+        started = time.perf_counter()
+        self.running += 1
+        try:
+            await asyncio.to_thread((workdir / "hls").mkdir, parents=True, exist_ok=True)
+            await self._ffmpeg(ffmpeg_command(source, str(workdir), self.bitrates, waveform_path=str(pcm_path)))
+            if self._is_current(job):
+                job.renditions, job.hls_url = await self._publish(job, workdir)
+            # Checked again after the upload, so an older job never overwrites a newer one's renditions
+            if not self._is_current(job):
+                self.superseded += 1
+                self._finish(job, error="Superseded by a newer job")
+                return
+            if await self.db.update_song(job.song_id, SongUpdate(hls_url=job.hls_url, renditions=job.renditions)) is None:
+                raise RuntimeError("Could not update the song")
+            await self._save_waveform(job.song_id, peaks_from_pcm_file, str(pcm_path))
+            self.completed += 1
+            self.transcode_seconds += time.perf_counter() - started
+            self.audio_seconds += (duration_ms or 0) / 1000
+            self._finish(job)
+        except asyncio.CancelledError:
+            self._finish(job, error="Cancelled at shutdown")
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error transcoding song {job.song_id}: {e}")
+            self._finish(job, error=str(e))
+        finally:
+            self.running -= 1
+            await asyncio.to_thread(shutil.rmtree, workdir, True)
+            pcm_path.unlink(missing_ok=True)
+
+    async def _ffmpeg(self, command: List[str], capture: bool = False) -> bytes:
+        """Run ffmpeg, returning its stdout when ``capture`` is set"""
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), TRANSCODE_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {process.returncode}: {stderr.decode(errors='replace')[-500:]}")
+        return stdout or b""
+
+    # Waveforms
+    async def _save_waveform(self, song_id: str, compute, pcm) -> bool:
+        """Reduce decoded PCM to peaks off the loop and store them; a failure does not fail the job"""
+        try:
+            peaks = await asyncio.to_thread(compute, pcm)
+            await self.db.save_waveform(song_id, peaks, WAVEFORM_SAMPLE_RATE)
+            self.waveforms += 1
+            return True
+        except Exception as e:
+            self.waveform_failures += 1
+            logger.error(f"Error saving waveform for song {song_id}: {e}")
+            return False
+
+    async def waveform(self, song_id: str, source: str) -> bool:
+        """Decode ``source`` to PCM only and store the song's peaks"""
+        source = storage_service.local_path(source) or source
+        command = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-nostdin", "-i", source] + pcm_output_args("pipe:1")
+        try:
+            pcm = await self._ffmpeg(command, capture=True)
+        except Exception as e:
+            self.waveform_failures += 1
+            logger.error(f"Error decoding song {song_id} for its waveform: {e}")
+            return False
+        return await self._save_waveform(song_id, peaks_from_pcm, pcm)
+
+    async def backfill_waveforms(self, force: bool = False, limit: Optional[int] = None) -> Dict[str, int]:
+        """Compute peaks for songs that have none (every song with ``force``) from their audio URL"""
+        semaphore = asyncio.Semaphore(self.workers)
+        counts = {"scanned": 0, "done": 0, "failed": 0}
+
+        async def one(row: Dict[str, Any]):
+            async with semaphore:
+                counts["done" if await self.waveform(row["id"], row["audio_url"]) else "failed"] += 1
+
+        async for rows in self.db.iter_table("songs", page_size=100):
+            rows = [row for row in rows if row.get("audio_url")]
+            if not force and rows:
+                existing = await self.db.get_waveform_song_ids([row["id"] for row in rows])
+                rows = [row for row in rows if row["id"] not in existing]
+            if limit is not None:
+                rows = rows[:limit - counts["scanned"]]
+            counts["scanned"] += len(rows)
+            await asyncio.gather(*(one(row) for row in rows))
+            if limit is not None and counts["scanned"] >= limit:
+                break
+        logger.info(f"Waveform backfill: {counts}")
+        return counts
+
+    async def _publish(self, job: TranscodeJob, workdir: Path) -> Tuple[List[Rendition], str]:
+        """Upload every output file; returns the renditions and the master playlist URL"""
+        prefix = f"renditions/{job.song_id}/{job.id}"
+        files = [path for path in workdir.rglob("*") if path.is_file()]
+        semaphore = asyncio.Semaphore(TRANSCODE_UPLOAD_CONCURRENCY)
+        urls: Dict[str, str] = {}
+
+        async def upload(path: Path):
+            name = path.relative_to(workdir).as_posix()
+            async with semaphore:
+                urls[name] = await storage_service.upload_local_file(
+                    str(path), path.name, CONTENT_TYPES.get(path.suffix, "application/octet-stream"),
+                    object_path=f"{prefix}/{name}"
+                )
+            self.bytes_published += path.stat().st_size
+
+        await asyncio.gather(*(upload(path) for path in files))
+        renditions = [
+            Rendition(bitrate=kbps, codec="aac", url=urls[f"{kbps}k.m4a"], playlist_url=urls.get(f"hls/{kbps}k.m3u8"))
+            for kbps in self.bitrates
+        ]
+        return renditions, urls["hls/master.m3u8"]
+
+    async def backfill(self, force: bool = False, limit: Optional[int] = None) -> Dict[str, int]:
+        """Transcode songs without renditions (every song with ``force``) straight from their audio URL"""
+        semaphore = asyncio.Semaphore(self.workers)
+        counts = {"scanned": 0, "done": 0, "failed": 0}
+
+        async def one(row: Dict[str, Any]):
+            async with semaphore:
+                job = self._new_job(row["id"], row["audio_url"], False, row.get("duration_ms"))
+                await self.run(job)
+                counts[job.status] += 1
+
+        async for rows in self.db.iter_table("songs", page_size=100, null_column=None if force else "hls_url"):
+            rows = [row for row in rows if row.get("audio_url")]
+            if limit is not None:
+                rows = rows[:limit - counts["scanned"]]
+            counts["scanned"] += len(rows)
+            await asyncio.gather(*(one(row) for row in rows))
+            if limit is not None and counts["scanned"] >= limit:
+                break
+        logger.info(f"Transcode backfill: {counts}")
+        return counts
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "superseded": self.superseded,
+            "transcode_seconds": round(self.transcode_seconds, 3),
+            "audio_seconds": round(self.audio_seconds, 3),
+            # Seconds of audio transcoded per wall-clock second of ffmpeg time
+            "realtime_factor": round(self.audio_seconds / self.transcode_seconds, 2) if self.transcode_seconds else None,
+            "bytes_published": self.bytes_published,
+            "waveforms": self.waveforms,
+            "waveform_failures": self.waveform_failures,
+        }
+
+# Singleton instance
+transcoder = Transcoder(db_service)
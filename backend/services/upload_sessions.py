@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict
+from fastapi import HTTPException
+from models.models import UploadSession, UploadSessionCreate
+from services.storage_service import storage_service
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SESSION_DIR = os.environ.get("UPLOAD_SESSION_DIR", str(Path(__file__).parent.parent / "upload_sessions"))
+# Seconds an unfinished session is kept before its partial file is deleted
+UPLOAD_SESSION_TTL = float(os.environ.get("UPLOAD_SESSION_TTL", str(24 * 3600)))
+# Resumable uploads exist for large masters, so they get their own limit
+MAX_RESUMABLE_AUDIO_BYTES = int(os.environ.get("MAX_RESUMABLE_AUDIO_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+class UploadSessionStore:
+    """TUS-style resumable audio uploads staged on local disk.
+
+    A session is a ``<id>.json`` metadata file plus a ``<id>.part`` file
+    that PATCH requests append to; the current offset is the part file's
+    size, so bytes written before a dropped connection are kept and the
+    client resumes from there. Finalizing streams the part file to storage
+    and deletes the session. Sessions survive restarts but are locked per
+    process, so run one API process per session directory.
+    """
+
+    def __init__(self, directory: str = UPLOAD_SESSION_DIR, ttl: float = UPLOAD_SESSION_TTL,
+                 max_bytes: int = MAX_RESUMABLE_AUDIO_BYTES):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _paths(self, session_id: str):
+        try:
+            session_id = str(uuid.UUID(session_id))
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return self.directory / f"{session_id}.json", self.directory / f"{session_id}.part"
+
+    def _load(self, session_id: str) -> UploadSession:
+        meta_path, part_path = self._paths(session_id)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        return UploadSession(**meta, offset=offset)
+
+    def create(self, request: UploadSessionCreate) -> UploadSession:
+        if not request.content_type.startswith('audio/'):
+            raise HTTPException(status_code=400, detail="File must be an audio file")
+        if request.length > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds the {self.max_bytes} byte limit")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.purge_expired()
+        session_id = str(uuid.uuid4())
+        meta = {
+            "id": session_id,
+            "filename": request.filename,
+            "content_type": request.content_type,
+            "length": request.length,
+            "expires_at": datetime.fromtimestamp(time.time() + self.ttl, tz=timezone.utc).isoformat(),
+        }
+        meta_path, part_path = self._paths(session_id)
+        part_path.touch()
+        meta_path.write_text(json.dumps(meta))
+        return UploadSession(**meta, offset=0)
+
+    def get(self, session_id: str) -> UploadSession:
+        return self._load(session_id)
+
+    def part_path(self, session_id: str) -> str:
+        """Local path of the bytes received so far, e.g. for probing before finalize"""
+        self._load(session_id)
+        return str(self._paths(session_id)[1])
+
+    async def append(self, session_id: str, offset: int, chunks: AsyncIterator[bytes]) -> UploadSession:
+        """Append a request body at ``offset``; bytes received before a disconnect are kept"""
+        session = self._load(session_id)
+        lock = self._locks.setdefault(session.id, asyncio.Lock())
+        if lock.locked():
+            raise HTTPException(status_code=409, detail="Another chunk is being written to this session")
+        async with lock:
+            session = self._load(session_id)
+            if offset != session.offset:
+                raise HTTPException(status_code=409, detail=f"Upload-Offset mismatch, server is at {session.offset}")
+
+            _, part_path = self._paths(session_id)
+            written = session.offset
+            f = await asyncio.to_thread(open, part_path, "ab")
+            try:
+                async for chunk in chunks:
+                    if written + len(chunk) > session.length:
+                        raise HTTPException(status_code=400, detail="Chunk exceeds the declared upload length")
+                    await asyncio.to_thread(f.write, chunk)
+                    written += len(chunk)
+            except HTTPException:
+                raise
+            except Exception as e:
+                # e.g. the client disconnected; keep what arrived so the next PATCH resumes
+                logger.warning(f"Upload session {session.id} interrupted at {written} bytes: {e}")
+            finally:
+                await asyncio.to_thread(f.close)
+            return self._load(session_id)
+
+    async def finalize(self, session_id: str) -> str:
+        """Send a complete session to storage and delete it; returns the public URL"""
+        session = self._load(session_id)
+        lock = self._locks.setdefault(session.id, asyncio.Lock())
+        if lock.locked():
+            raise HTTPException(status_code=409, detail="Upload session is busy")
+        async with lock:
+            session = self._load(session_id)
+            if session.offset != session.length:
+                raise HTTPException(status_code=409, detail=f"Upload incomplete: {session.offset} of {session.length} bytes")
+            _, part_path = self._paths(session_id)
+            url = await storage_service.upload_local_file(
+                str(part_path), session.filename, session.content_type, max_bytes=self.max_bytes
+            )
+        self.delete(session_id)
+        return url
+
+    def delete(self, session_id: str):
+        meta_path, part_path = self._paths(session_id)
+        if not meta_path.exists():
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        meta_path.unlink(missing_ok=True)
+        part_path.unlink(missing_ok=True)
+        self._locks.pop(meta_path.stem, None)
+
+    def purge_expired(self) -> int:
+        """Delete sessions past their expiry; returns how many were removed"""
+        removed = 0
+        now = datetime.now(timezone.utc)
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                expires_at = datetime.fromisoformat(json.loads(meta_path.read_text())["expires_at"])
+            except Exception:
+                continue
+            if expires_at <= now and not (meta_path.stem in self._locks and self._locks[meta_path.stem].locked()):
+                meta_path.unlink(missing_ok=True)
+                meta_path.with_suffix(".part").unlink(missing_ok=True)
+                self._locks.pop(meta_path.stem, None)
+                removed += 1
+        if removed:
+            logger.info(f"Purged {removed} expired upload sessions")
+        return removed
+
+# Singleton instance
+upload_sessions = UploadSessionStore()
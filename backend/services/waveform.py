@@ -0,0 +1,38 @@
+import hashlib
+import os
+from typing import List
+import numpy as np
+
+# Min/max pairs per song, whatever its length; the blob is 2 bytes per bucket
+WAVEFORM_BUCKETS = int(os.environ.get("WAVEFORM_BUCKETS", "1000"))
+# Mono 16-bit PCM is decoded at this rate; plenty for an amplitude envelope
+WAVEFORM_SAMPLE_RATE = int(os.environ.get("WAVEFORM_SAMPLE_RATE", "8000"))
+
+def pcm_output_args(destination: str, sample_rate: int = WAVEFORM_SAMPLE_RATE) -> List[str]:
+    """ffmpeg output options writing mono little-endian 16-bit PCM to ``destination`` (a path or pipe:1)"""
+    return ["-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-c:a", "pcm_s16le", destination]
+
+def compute_peaks(samples: np.ndarray, buckets: int = WAVEFORM_BUCKETS) -> bytes:
+    """Interleaved int8 (min, max) per bucket of 16-bit samples.
+
+    Buckets are equal runs of samples reduced with ``reduceat``, so the
+    whole song is summarised without a Python-level loop.
+    """
+    if samples.size == 0:
+        return b""
+    buckets = min(buckets, samples.size)
+    starts = np.linspace(0, samples.size, buckets + 1).astype(np.int64)[:-1]
+    peaks = np.empty(buckets * 2, dtype=np.int8)
+    # An arithmetic shift maps the int16 range exactly onto int8
+    peaks[0::2] = np.minimum.reduceat(samples, starts) >> 8
+    peaks[1::2] = np.maximum.reduceat(samples, starts) >> 8
+    return peaks.tobytes()
+
+def peaks_from_pcm(pcm: bytes, buckets: int = WAVEFORM_BUCKETS) -> bytes:
+    return compute_peaks(np.frombuffer(pcm, dtype="<i2"), buckets)
+
+def peaks_from_pcm_file(path: str, buckets: int = WAVEFORM_BUCKETS) -> bytes:
+    return compute_peaks(np.fromfile(path, dtype="<i2"), buckets)
+
+def waveform_etag(peaks: bytes) -> str:
+    return f'"{hashlib.sha256(peaks).hexdigest()[:32]}"'
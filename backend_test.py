@@ -6,7 +6,12 @@ Tests all backend endpoints comprehensively
 
 import requests
 import json
+import gzip
+import io
+import wave
 import uuid
+import struct
+import zlib
 from datetime import datetime, date
 import os
 from dotenv import load_dotenv
@@ -280,6 +285,303 @@ class YantraTuneAPITester:
             self.log_test("GET /songs/search", False, f"Error: {str(e)}")
             return False
 
+    def test_batch_endpoints(self):
+        """Test batched multi-get endpoints"""
+        if not self.created_entities['songs']:
+            self.log_test("POST /songs/batch", False, "Need a song for testing")
+            return False
+        try:
+            fake_id = str(uuid.uuid4())
+            ids = [self.created_entities['songs'][0], fake_id]
+            response = requests.post(f"{self.base_url}/songs/batch", json={"ids": ids})
+            if response.status_code == 200:
+                result = response.json()
+                found_ids = [song['id'] for song in result.get('songs', [])]
+                if found_ids == ids[:1] and result.get('missing') == [fake_id]:
+                    self.log_test("POST /songs/batch", True, "Returned requested song and reported missing id")
+                    return True
+                self.log_test("POST /songs/batch", False, f"Unexpected response: {result}")
+                return False
+            else:
+                self.log_test("POST /songs/batch", False, f"Status: {response.status_code}")
+                return False
+        except Exception as e:
+            self.log_test("POST /songs/batch", False, f"Error: {str(e)}")
+            return False
+
+    def test_bulk_import(self):
+        """Test NDJSON bulk import with natural-key resolution and per-row errors"""
+        try:
+            artist_name = f"Import Test Artist {uuid.uuid4().hex[:8]}"
+            body = "\n".join([
+                json.dumps({"name": artist_name, "bio": "Imported"}),
+                json.dumps({"bio": "Missing name"}),
+            ])
+            response = requests.post(
+                f"{self.base_url}/admin/import?entity=artists",
+                data=body.encode(),
+                headers={"Content-Type": "application/x-ndjson"}
+            )
+            if response.status_code != 200:
+                self.log_test("POST /admin/import", False, f"Status: {response.status_code}")
+                return False
+            result = response.json()
+            if result.get('inserted') != 1 or result.get('failed') != 1 or result['errors'][0]['line'] != 2:
+                self.log_test("POST /admin/import", False, f"Unexpected response: {result}")
+                return False
+
+            # Albums reference the imported artist by name
+            body = json.dumps({"title": "Imported Album", "artist": artist_name})
+            response = requests.post(
+                f"{self.base_url}/admin/import?entity=albums",
+                data=body.encode(),
+                headers={"Content-Type": "application/x-ndjson"}
+            )
+            if response.status_code == 200 and response.json().get('inserted') == 1:
+                self.log_test("POST /admin/import", True, "Imported rows, resolved artist by name, reported bad row")
+                return True
+            self.log_test("POST /admin/import", False, f"Album import failed: {response.text}")
+            return False
+        except Exception as e:
+            self.log_test("POST /admin/import", False, f"Error: {str(e)}")
+            return False
+
+    def test_catalog_export(self):
+        """Test streaming NDJSON and gzipped CSV export"""
+        try:
+            response = requests.get(f"{self.base_url}/admin/export/artists", stream=True)
+            if response.status_code != 200:
+                self.log_test("GET /admin/export/artists", False, f"Status: {response.status_code}")
+                return False
+            rows = [json.loads(line) for line in response.iter_lines() if line]
+            if not all('id' in row and 'name' in row for row in rows):
+                self.log_test("GET /admin/export/artists", False, "Rows missing id/name")
+                return False
+
+            response = requests.get(f"{self.base_url}/admin/export/songs?format=csv&gzip=true")
+            if response.status_code == 200 and gzip.decompress(response.content).startswith(b"id,"):
+                self.log_test("GET /admin/export/{entity}", True, f"Exported {len(rows)} artists as NDJSON and songs as gzipped CSV")
+                return True
+            self.log_test("GET /admin/export/{entity}", False, f"CSV export failed: status {response.status_code}")
+            return False
+        except Exception as e:
+            self.log_test("GET /admin/export/{entity}", False, f"Error: {str(e)}")
+            return False
+
+    def test_resumable_upload(self):
+        """Test resumable upload sessions: create, PATCH in pieces, resume offset, finalize"""
+        try:
+            audio = b"ID3" + b"\x00" * 4093
+            response = requests.post(f"{self.base_url}/uploads/sessions", json={
+                "filename": "resumable.mp3", "content_type": "audio/mpeg", "length": len(audio)
+            })
+            if response.status_code != 201:
+                self.log_test("Resumable Upload", False, f"Create status: {response.status_code}")
+                return False
+            session_url = f"{self.base_url}/uploads/sessions/{response.json()['id']}"
+
+            requests.patch(session_url, data=audio[:2048], headers={"Upload-Offset": "0"})
+            offset = int(requests.head(session_url).headers.get("Upload-Offset", -1))
+            if offset != 2048:
+                self.log_test("Resumable Upload", False, f"Expected offset 2048, got {offset}")
+                return False
+            requests.patch(session_url, data=audio[offset:], headers={"Upload-Offset": str(offset)})
+
+            response = requests.post(f"{session_url}/finalize")
+            if response.status_code == 200 and response.json().get('url'):
+                self.log_test("Resumable Upload", True, "Uploaded in two pieces and finalized")
+                return True
+            self.log_test("Resumable Upload", False, f"Finalize status: {response.status_code}")
+            return False
+        except Exception as e:
+            self.log_test("Resumable Upload", False, f"Error: {str(e)}")
+            return False
+
+    def test_upload_dedup(self):
+        """Test that uploading identical bytes twice returns the same content-addressed URL"""
+        try:
+            image = b"\x89PNG\r\n\x1a\n" + os.urandom(1024)
+            urls = []
+            for name in ("first.png", "second.png"):
+                response = requests.post(f"{self.base_url}/uploads/image", files={"file": (name, image, "image/png")})
+                if response.status_code != 200:
+                    self.log_test("Upload Dedup", False, f"Status: {response.status_code}")
+                    return False
+                urls.append(response.json().get('url'))
+            if urls[0] and urls[0] == urls[1]:
+                self.log_test("Upload Dedup", True, "Duplicate upload reused the stored object")
+                return True
+            self.log_test("Upload Dedup", False, f"Different URLs: {urls}")
+            return False
+        except Exception as e:
+            self.log_test("Upload Dedup", False, f"Error: {str(e)}")
+            return False
+
+    def test_local_storage(self):
+        """Test that objects kept by the local storage backend are served with Range support"""
+        try:
+            image = b"\x89PNG\r\n\x1a\n" + os.urandom(256)
+            response = requests.post(f"{self.base_url}/uploads/image", files={"file": ("local.png", image, "image/png")})
+            if response.status_code != 200:
+                self.log_test("Local Storage", False, f"Status: {response.status_code}")
+                return False
+            url = response.json().get('url', '')
+            if not url.startswith("/api/storage/"):
+                self.log_test("Local Storage", True, "Storage backend is not local, skipped")
+                return True
+
+            response = requests.get(f"{BACKEND_URL}{url}", headers={"Range": "bytes=0-7"})
+            if response.status_code == 206 and response.content == image[:8]:
+                self.log_test("Local Storage", True, f"Served {url} from disk")
+                return True
+            self.log_test("Local Storage", False, f"Range status: {response.status_code}")
+            return False
+        except Exception as e:
+            self.log_test("Local Storage", False, f"Error: {str(e)}")
+            return False
+
+    def test_audio_probe(self):
+        """Test that audio uploads report the probed duration and stream properties"""
+        try:
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(8000)
+                w.writeframes(b"\x00\x00" * 8000 * 2)
+            response = requests.post(f"{self.base_url}/uploads/audio", files={"file": ("probe.wav", buffer.getvalue(), "audio/wav")})
+            if response.status_code != 200:
+                self.log_test("Audio Probe", False, f"Status: {response.status_code}")
+                return False
+            audio = response.json().get('audio') or {}
+            if audio.get('duration_ms') == 2000 and audio.get('sample_rate') == 8000:
+                self.log_test("Audio Probe", True, f"Probed {audio.get('container')}/{audio.get('codec')}, {audio['duration_ms']}ms")
+                return True
+            self.log_test("Audio Probe", False, f"Unexpected probe result: {audio}")
+            return False
+        except Exception as e:
+            self.log_test("Audio Probe", False, f"Error: {str(e)}")
+            return False
+
+    def test_cover_image_variants(self):
+        """Test POST /uploads/image returns resized variants as srcsets and a blurhash"""
+        try:
+            # A real 640x480 gradient PNG, so the server can decode it
+            width, height = 640, 480
+            rows = b"".join(
+                b"\x00" + b"".join(bytes((x % 256, y % 256, 128)) for x in range(width)) for y in range(height)
+            )
+
+            def chunk(kind, data):
+                return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+            png = (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+                   + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+            response = requests.post(f"{self.base_url}/uploads/image", files={"file": ("gradient.png", png, "image/png")})
+            if response.status_code != 200:
+                self.log_test("Cover Image Variants", False, f"Status: {response.status_code}, Response: {response.text}")
+                return False
+            image = response.json().get('image')
+            if not image:
+                self.log_test("Cover Image Variants", False, "No image variants in the upload response")
+                return False
+            if image['width'] == width and image['height'] == height and image['blurhash'] and image['srcset']:
+                self.log_test("Cover Image Variants", True, f"Formats: {sorted(image['srcset'])}, blurhash {image['blurhash']}")
+                return True
+            self.log_test("Cover Image Variants", False, f"Unexpected variants: {image}")
+            return False
+        except Exception as e:
+            self.log_test("Cover Image Variants", False, f"Error: {str(e)}")
+            return False
+
+    def test_transcode_status(self):
+        """Test the transcoding job status endpoint and metrics"""
+        try:
+            response = requests.get(f"{self.base_url}/songs/{uuid.uuid4()}/transcode")
+            if response.status_code != 404:
+                self.log_test("Transcode Status", False, f"Expected 404 for an unknown song, got {response.status_code}")
+                return False
+            metrics = requests.get(f"{self.base_url}/admin/metrics").json().get('transcoder', {})
+            if 'enabled' in metrics and 'realtime_factor' in metrics:
+                self.log_test("Transcode Status", True, f"Transcoding enabled: {metrics['enabled']}, completed: {metrics['completed']}")
+                return True
+            self.log_test("Transcode Status", False, f"Missing transcoder metrics: {metrics}")
+            return False
+        except Exception as e:
+            self.log_test("Transcode Status", False, f"Error: {str(e)}")
+            return False
+
+    def test_song_waveform(self):
+        """Test GET /songs/{id}/waveform: min/max byte pairs with a long-lived, revalidatable cache"""
+        try:
+            songs = requests.get(f"{self.base_url}/songs/", params={"limit": 50}).json()
+            for song in songs:
+                response = requests.get(f"{self.base_url}/songs/{song['id']}/waveform")
+                if response.status_code == 404:
+                    continue
+                if response.status_code != 200 or len(response.content) % 2 or 'max-age' not in response.headers.get('Cache-Control', ''):
+                    self.log_test("Song Waveform", False, f"Status: {response.status_code}, {len(response.content)} bytes")
+                    return False
+                etag = response.headers.get('ETag')
+                response = requests.get(f"{self.base_url}/songs/{song['id']}/waveform", headers={"If-None-Match": etag})
+                if response.status_code == 304:
+                    self.log_test("Song Waveform", True, f"Waveform with ETag {etag} revalidated")
+                    return True
+                self.log_test("Song Waveform", False, f"If-None-Match status: {response.status_code}")
+                return False
+            self.log_test("Song Waveform", True, "No song has a waveform yet, skipped")
+            return True
+        except Exception as e:
+            self.log_test("Song Waveform", False, f"Error: {str(e)}")
+            return False
+
+    def test_song_streaming(self):
+        """Test GET /songs/{id}/stream: Range requests return 206 and a matching ETag returns 304"""
+        try:
+            songs = requests.get(f"{self.base_url}/songs/", params={"limit": 50}).json()
+            song = next((s for s in songs if s.get('audio_url')), None)
+            if not song:
+                self.log_test("Song Streaming", True, "No song with audio to stream, skipped")
+                return True
+            stream_url = f"{self.base_url}/songs/{song['id']}/stream"
+
+            response = requests.get(stream_url, headers={"Range": "bytes=0-15"}, allow_redirects=False)
+            if response.status_code == 307:
+                self.log_test("Song Streaming", True, "Audio too large for the media cache, redirected to storage")
+                return True
+            if response.status_code != 206 or len(response.content) != 16 or not response.headers.get('Content-Range'):
+                self.log_test("Song Streaming", False, f"Range status: {response.status_code}, {len(response.content)} bytes")
+                return False
+
+            etag = response.headers.get('ETag')
+            response = requests.get(stream_url, headers={"If-None-Match": etag})
+            if response.status_code == 304:
+                self.log_test("Song Streaming", True, f"Partial content and 304 for ETag {etag}")
+                return True
+            self.log_test("Song Streaming", False, f"If-None-Match status: {response.status_code}")
+            return False
+        except Exception as e:
+            self.log_test("Song Streaming", False, f"Error: {str(e)}")
+            return False
+
+    def test_search_suggestions(self):
+        """Test typeahead suggestions"""
+        try:
+            response = requests.get(f"{self.base_url}/search/suggest?q=Bl&limit=5")
+            if response.status_code == 200:
+                suggestions = response.json()
+                if all({'type', 'id', 'label'} <= set(item.keys()) for item in suggestions) and len(suggestions) <= 5:
+                    self.log_test("GET /search/suggest", True, f"Returned {len(suggestions)} suggestions")
+                    return True
+                self.log_test("GET /search/suggest", False, f"Unexpected response: {suggestions}")
+                return False
+            else:
+                self.log_test("GET /search/suggest", False, f"Status: {response.status_code}")
+                return False
+        except Exception as e:
+            self.log_test("GET /search/suggest", False, f"Error: {str(e)}")
+            return False
+
     def test_admin_endpoints(self):
         """Test admin endpoints"""
         # Test admin stats
@@ -402,6 +704,37 @@ class YantraTuneAPITester:
             self.log_test("Featured Playlists", False, f"Error: {str(e)}")
             return False
 
+    def test_cursor_pagination(self):
+        """Test keyset pagination with opaque cursors"""
+        try:
+            response = requests.get(f"{self.base_url}/songs?limit=1&after=")
+            if response.status_code != 200:
+                self.log_test("Cursor Pagination", False, f"Status: {response.status_code}")
+                return False
+            first_page = response.json()
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                self.log_test("Cursor Pagination", True, f"Single page of {len(first_page)} songs, no next cursor")
+                return True
+
+            response = requests.get(f"{self.base_url}/songs?limit=1&after={cursor}")
+            second_page = response.json()
+            if response.status_code == 200 and (not second_page or second_page[0]['id'] != first_page[0]['id']):
+                self.log_test("Cursor Pagination", True, "Next page continues after the cursor")
+            else:
+                self.log_test("Cursor Pagination", False, f"Status: {response.status_code}, Response: {second_page}")
+                return False
+
+            response = requests.get(f"{self.base_url}/songs?after=not-a-cursor")
+            if response.status_code == 400:
+                self.log_test("Invalid Cursor", True, "Properly returns 400 for malformed cursor")
+                return True
+            self.log_test("Invalid Cursor", False, f"Expected 400, got {response.status_code}")
+            return False
+        except Exception as e:
+            self.log_test("Cursor Pagination", False, f"Error: {str(e)}")
+            return False
+
     def test_file_upload_endpoints(self):
         """Test file upload endpoints"""
         # Create mock audio file
@@ -700,12 +1033,25 @@ class YantraTuneAPITester:
             ("Albums CRUD", self.test_albums_crud),
             ("Songs CRUD", self.test_songs_crud),
             ("Playlists CRUD", self.test_playlists_crud),
+            ("Batch Endpoints", self.test_batch_endpoints),
             ("File Upload Endpoints", self.test_file_upload_endpoints),
+            ("Resumable Upload", self.test_resumable_upload),
+            ("Upload Dedup", self.test_upload_dedup),
+            ("Local Storage", self.test_local_storage),
+            ("Audio Probe", self.test_audio_probe),
+            ("Song Streaming", self.test_song_streaming),
+            ("Transcode Status", self.test_transcode_status),
+            ("Cover Image Variants", self.test_cover_image_variants),
+            ("Song Waveform", self.test_song_waveform),
             ("Enhanced Song Creation", self.test_enhanced_song_creation),
             ("User Preferences API", self.test_user_preferences_api),
             ("Search Functionality", self.test_search_functionality),
+            ("Search Suggestions", self.test_search_suggestions),
             ("Admin Endpoints", self.test_admin_endpoints),
+            ("Bulk Import", self.test_bulk_import),
+            ("Catalog Export", self.test_catalog_export),
             ("Query Parameters", self.test_query_parameters),
+            ("Cursor Pagination", self.test_cursor_pagination),
             ("Playlist Song Operations", self.test_playlist_song_operations),
             ("Error Handling", self.test_error_handling),
         ]
@@ -70,6 +70,20 @@ CREATE TABLE IF NOT EXISTS admin_logs (
     timestamp TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Content-addressed storage index: one row per distinct uploaded file (SHA-256) per bucket
+CREATE TABLE IF NOT EXISTS media_objects (
+    bucket VARCHAR(100) NOT NULL,
+    sha256 CHAR(64) NOT NULL,
+    path TEXT NOT NULL,
+    url TEXT NOT NULL,
+    size_bytes BIGINT,
+    content_type VARCHAR(255),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    -- Bumped on every deduplicated upload so garbage collection leaves the object alone
+    last_used_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (bucket, sha256)
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_songs_artist_id ON songs(artist_id);
 CREATE INDEX IF NOT EXISTS idx_songs_album_id ON songs(album_id);
@@ -78,6 +92,256 @@ CREATE INDEX IF NOT EXISTS idx_albums_artist_id ON albums(artist_id);
 CREATE INDEX IF NOT EXISTS idx_playlist_songs_playlist_id ON playlist_songs(playlist_id);
 CREATE INDEX IF NOT EXISTS idx_playlist_songs_song_id ON playlist_songs(song_id);
 CREATE INDEX IF NOT EXISTS idx_admin_logs_timestamp ON admin_logs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_media_objects_path ON media_objects(bucket, path);
+
+-- Composite indexes for keyset (cursor) pagination: ORDER BY <column> DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_songs_created_at_id ON songs(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_songs_genre_created_at_id ON songs(genre, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_artists_created_at_id ON artists(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_albums_created_at_id ON albums(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_playlists_created_at_id ON playlists(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_admin_logs_timestamp_id ON admin_logs(timestamp DESC, id DESC);
+
+-- Full-text and trigram search
+-- Trigram GIN indexes let ILIKE '%q%' use an index; the tsvector indexes back word matches
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_songs_fts ON songs USING GIN (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(genre, '')));
+CREATE INDEX IF NOT EXISTS idx_songs_title_trgm ON songs USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_songs_genre_trgm ON songs USING GIN (genre gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_artists_fts ON artists USING GIN (to_tsvector('simple', coalesce(name, '')));
+CREATE INDEX IF NOT EXISTS idx_artists_name_trgm ON artists USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_albums_fts ON albums USING GIN (to_tsvector('simple', coalesce(title, '')));
+CREATE INDEX IF NOT EXISTS idx_albums_title_trgm ON albums USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_playlists_fts ON playlists USING GIN (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')));
+CREATE INDEX IF NOT EXISTS idx_playlists_name_trgm ON playlists USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_playlists_description_trgm ON playlists USING GIN (description gin_trgm_ops);
+
+-- Ranked search across all four entity types in a single round trip
+CREATE OR REPLACE FUNCTION search_catalog(search_query TEXT, result_limit INTEGER DEFAULT 50)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+WITH q AS (
+    SELECT search_query AS raw,
+           '%' || search_query || '%' AS pattern,
+           websearch_to_tsquery('simple', search_query) AS ts
+)
+SELECT jsonb_build_object(
+    'songs', COALESCE((
+        SELECT jsonb_agg(r.doc ORDER BY r.rank DESC)
+        FROM (
+            SELECT to_jsonb(s) || jsonb_build_object('artist', to_jsonb(a), 'album', to_jsonb(al)) AS doc,
+                   ts_rank(to_tsvector('simple', coalesce(s.title, '') || ' ' || coalesce(s.genre, '')), q.ts)
+                       + similarity(s.title, q.raw) AS rank
+            FROM songs s
+            CROSS JOIN q
+            LEFT JOIN artists a ON a.id = s.artist_id
+            LEFT JOIN albums al ON al.id = s.album_id
+            WHERE to_tsvector('simple', coalesce(s.title, '') || ' ' || coalesce(s.genre, '')) @@ q.ts
+               OR s.title ILIKE q.pattern
+               OR s.genre ILIKE q.pattern
+            ORDER BY rank DESC
+            LIMIT result_limit
+        ) r
+    ), '[]'::jsonb),
+    'artists', COALESCE((
+        SELECT jsonb_agg(r.doc ORDER BY r.rank DESC)
+        FROM (
+            SELECT to_jsonb(a) AS doc,
+                   ts_rank(to_tsvector('simple', coalesce(a.name, '')), q.ts) + similarity(a.name, q.raw) AS rank
+            FROM artists a
+            CROSS JOIN q
+            WHERE to_tsvector('simple', coalesce(a.name, '')) @@ q.ts
+               OR a.name ILIKE q.pattern
+            ORDER BY rank DESC
+            LIMIT result_limit
+        ) r
+    ), '[]'::jsonb),
+    'albums', COALESCE((
+        SELECT jsonb_agg(r.doc ORDER BY r.rank DESC)
+        FROM (
+            SELECT to_jsonb(al) || jsonb_build_object('artist', to_jsonb(a)) AS doc,
+                   ts_rank(to_tsvector('simple', coalesce(al.title, '')), q.ts) + similarity(al.title, q.raw) AS rank
+            FROM albums al
+            CROSS JOIN q
+            LEFT JOIN artists a ON a.id = al.artist_id
+            WHERE to_tsvector('simple', coalesce(al.title, '')) @@ q.ts
+               OR al.title ILIKE q.pattern
+            ORDER BY rank DESC
+            LIMIT result_limit
+        ) r
+    ), '[]'::jsonb),
+    'playlists', COALESCE((
+        SELECT jsonb_agg(r.doc ORDER BY r.rank DESC)
+        FROM (
+            SELECT to_jsonb(p) AS doc,
+                   ts_rank(to_tsvector('simple', coalesce(p.name, '') || ' ' || coalesce(p.description, '')), q.ts)
+                       + similarity(p.name, q.raw) AS rank
+            FROM playlists p
+            CROSS JOIN q
+            WHERE to_tsvector('simple', coalesce(p.name, '') || ' ' || coalesce(p.description, '')) @@ q.ts
+               OR p.name ILIKE q.pattern
+               OR p.description ILIKE q.pattern
+            ORDER BY rank DESC
+            LIMIT result_limit
+        ) r
+    ), '[]'::jsonb)
+)
+FROM q;
+$$;
+
+-- Hydrated JSON for one catalog row, shaped like the API models
+CREATE OR REPLACE FUNCTION catalog_entity_json(p_entity TEXT, p_id UUID)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+SELECT CASE p_entity
+    WHEN 'artist' THEN (
+        SELECT to_jsonb(a) FROM artists a WHERE a.id = p_id
+    )
+    WHEN 'album' THEN (
+        SELECT to_jsonb(al) || jsonb_build_object('artist', to_jsonb(a))
+        FROM albums al
+        LEFT JOIN artists a ON a.id = al.artist_id
+        WHERE al.id = p_id
+    )
+    WHEN 'song' THEN (
+        SELECT to_jsonb(s) || jsonb_build_object('artist', to_jsonb(a), 'album', to_jsonb(al))
+        FROM songs s
+        LEFT JOIN artists a ON a.id = s.artist_id
+        LEFT JOIN albums al ON al.id = s.album_id
+        WHERE s.id = p_id
+    )
+    WHEN 'playlist' THEN (
+        SELECT to_jsonb(p) || jsonb_build_object('songs', COALESCE(t.songs, '[]'::jsonb), 'song_count', t.song_count)
+        FROM playlists p
+        CROSS JOIN LATERAL (
+            SELECT jsonb_agg(to_jsonb(s) || jsonb_build_object('artist', to_jsonb(a), 'album', to_jsonb(al)) ORDER BY ps.order_index) AS songs,
+                   count(s.id) AS song_count
+            FROM playlist_songs ps
+            JOIN songs s ON s.id = ps.song_id
+            LEFT JOIN artists a ON a.id = s.artist_id
+            LEFT JOIN albums al ON al.id = s.album_id
+            WHERE ps.playlist_id = p.id
+        ) t
+        WHERE p.id = p_id
+    )
+END;
+$$;
+
+-- Admin update/delete with its audit log entry in one transaction.
+-- The row is locked before it is changed, so the existence check cannot race the write.
+-- Returns {"old": ..., "new": ...} (new is null for deletes), or NULL when the row does not exist.
+CREATE OR REPLACE FUNCTION admin_write(
+    p_entity TEXT,
+    p_action TEXT,
+    p_id UUID,
+    p_changes JSONB DEFAULT '{}'::jsonb,
+    p_admin_name TEXT DEFAULT 'Admin'
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_table TEXT := CASE p_entity
+        WHEN 'artist' THEN 'artists'
+        WHEN 'album' THEN 'albums'
+        WHEN 'song' THEN 'songs'
+        WHEN 'playlist' THEN 'playlists'
+    END;
+    v_label TEXT := CASE WHEN p_entity IN ('artist', 'playlist') THEN 'name' ELSE 'title' END;
+    v_image TEXT := CASE WHEN p_entity = 'artist' THEN 'avatar' ELSE 'cover' END;
+    v_locked UUID;
+    v_set TEXT;
+    v_old JSONB;
+    v_new JSONB;
+BEGIN
+    IF v_table IS NULL OR p_action NOT IN ('update', 'delete') THEN
+        RAISE EXCEPTION 'Unsupported admin write: % %', p_action, p_entity;
+    END IF;
+
+    EXECUTE format('SELECT id FROM %I WHERE id = $1 FOR UPDATE', v_table) INTO v_locked USING p_id;
+    IF v_locked IS NULL THEN
+        RETURN NULL;
+    END IF;
+    v_old := catalog_entity_json(p_entity, p_id);
+
+    IF p_action = 'update' THEN
+        -- A new audio file voids what was derived from the old one, unless the request resends it
+        IF p_entity = 'song' AND p_changes ? 'audio_url'
+           AND p_changes ->> 'audio_url' IS DISTINCT FROM v_old ->> 'audio_url' THEN
+            p_changes := jsonb_build_object(
+                'duration_ms', NULL, 'container', NULL, 'codec', NULL, 'bitrate', NULL,
+                'sample_rate', NULL, 'channels', NULL, 'hls_url', NULL, 'renditions', NULL
+            ) || p_changes;
+        END IF;
+        -- Likewise a new image URL voids the old image's variants; `maintenance.py covers` fills them again
+        IF p_changes ? (v_image || '_url')
+           AND p_changes ->> (v_image || '_url') IS DISTINCT FROM v_old ->> (v_image || '_url') THEN
+            p_changes := jsonb_build_object(v_image || '_srcset', NULL, v_image || '_blurhash', NULL) || p_changes;
+        END IF;
+
+        -- Only existing, non-key columns are assignable; jsonb_populate_record casts the values
+        SELECT string_agg(format('%I = r.%I', c.column_name, c.column_name), ', ')
+        INTO v_set
+        FROM information_schema.columns c
+        WHERE c.table_schema = current_schema()
+          AND c.table_name = v_table
+          AND c.column_name IN (SELECT jsonb_object_keys(p_changes))
+          AND c.column_name NOT IN ('id', 'created_at', 'updated_at');
+
+        EXECUTE format(
+            'UPDATE %I t SET %s updated_at = NOW() FROM jsonb_populate_record(NULL::%I, $1) r WHERE t.id = $2',
+            v_table, COALESCE(v_set || ',', ''), v_table
+        ) USING p_changes, p_id;
+        v_new := catalog_entity_json(p_entity, p_id);
+    ELSE
+        EXECUTE format('DELETE FROM %I WHERE id = $1', v_table) USING p_id;
+    END IF;
+
+    INSERT INTO admin_logs (admin_name, action, entity_type, entity_id, entity_name)
+    VALUES (p_admin_name, p_action, p_entity, p_id, COALESCE(v_new, v_old) ->> v_label);
+
+    RETURN jsonb_build_object('old', v_old, 'new', v_new);
+END;
+$$;
+
+-- Admin-only: the backend calls it with the service role, API clients never may
+REVOKE EXECUTE ON FUNCTION admin_write(TEXT, TEXT, UUID, JSONB, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION admin_write(TEXT, TEXT, UUID, JSONB, TEXT) TO service_role;
+
+-- Audio stream properties probed at upload time; duration remains the display string
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS duration_ms INTEGER;
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS container VARCHAR(32);
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS codec VARCHAR(32);
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS bitrate INTEGER;
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS sample_rate INTEGER;
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS channels SMALLINT;
+CREATE INDEX IF NOT EXISTS idx_songs_duration_ms ON songs(duration_ms);
+
+-- Transcoded renditions: HLS master playlist plus [{bitrate, codec, url, playlist_url}]
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS hls_url TEXT;
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS renditions JSONB;
+
+-- Precomputed waveform per song: interleaved int8 (min, max) pairs, 2 bytes per bucket
+CREATE TABLE IF NOT EXISTS song_waveforms (
+    song_id UUID PRIMARY KEY REFERENCES songs(id) ON DELETE CASCADE,
+    peaks BYTEA NOT NULL,
+    buckets INTEGER NOT NULL,
+    sample_rate INTEGER,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Responsive cover derivatives: format -> srcset string, plus a blurhash placeholder
+ALTER TABLE albums ADD COLUMN IF NOT EXISTS cover_srcset JSONB;
+ALTER TABLE albums ADD COLUMN IF NOT EXISTS cover_blurhash TEXT;
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS cover_srcset JSONB;
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS cover_blurhash TEXT;
+ALTER TABLE playlists ADD COLUMN IF NOT EXISTS cover_srcset JSONB;
+ALTER TABLE playlists ADD COLUMN IF NOT EXISTS cover_blurhash TEXT;
+ALTER TABLE artists ADD COLUMN IF NOT EXISTS avatar_srcset JSONB;
+ALTER TABLE artists ADD COLUMN IF NOT EXISTS avatar_blurhash TEXT;
 
 -- Insert sample data
 INSERT INTO artists (name, bio, avatar_url) VALUES 
@@ -0,0 +1,53 @@
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# The backend imports its modules as top-level packages (services.*, models.*)
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Clients are built at import time but never connect: tests stub the backend call
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+
+class FakeExecute:
+    """Stands in for DatabaseService._execute: records each query and answers with canned rows.
+
+    Counts round trips the way the real method does, so tests can assert
+    how many backend calls an operation makes.
+    """
+
+    def __init__(self, db, *responses):
+        self.db = db
+        self.responses = list(responses)
+        self.queries = []
+
+    async def __call__(self, query):
+        self.db.round_trips += 1
+        self.queries.append(query)
+        response = self.responses.pop(0) if self.responses else []
+        if isinstance(response, Exception):
+            raise response
+        return SimpleNamespace(data=response, count=None)
+
+@pytest.fixture
+def db():
+    from services.cache_service import TTLCache
+    from services.database_service import DatabaseService
+
+    service = DatabaseService(cache=TTLCache())
+    yield service
+    service.close()
+
+@pytest.fixture
+def fake_execute(db):
+    """Install a FakeExecute on ``db``; call it with the responses to return, in order"""
+    def install(*responses):
+        fake = FakeExecute(db, *responses)
+        db._execute = fake
+        return fake
+    return install
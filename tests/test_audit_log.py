@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+from services.audit_log import AuditLogWriter
+
+def rows(*ids):
+    return [{"action": "update", "entity_type": "song", "entity_id": i} for i in ids]
+
+def write_ndjson(path, batch):
+    path.write_text("".join(json.dumps(row) + "\n" for row in batch), encoding="utf-8")
+
+def test_replay_retries_files_left_by_an_interrupted_replay(tmp_path):
+    spill = tmp_path / "audit_log_spill.ndjson"
+    # A replay file from a run that crashed before finishing, plus a fresh spill
+    write_ndjson(tmp_path / "audit_log_spill.ndjson.replay", rows("a", "b"))
+    write_ndjson(spill, rows("c"))
+    inserted = []
+
+    async def insert(batch):
+        inserted.extend(row["entity_id"] for row in batch)
+
+    writer = AuditLogWriter(insert, spill_path=str(spill))
+    asyncio.run(writer._replay_spill())
+
+    assert sorted(inserted) == ["a", "b", "c"]
+    assert writer.replayed == 3
+    assert list(tmp_path.iterdir()) == []
+
+def test_failed_replay_is_spilled_again(tmp_path):
+    spill = tmp_path / "audit_log_spill.ndjson"
+    write_ndjson(spill, rows("a", "b"))
+
+    async def insert(batch):
+        raise RuntimeError("database unavailable")
+
+    writer = AuditLogWriter(insert, spill_path=str(spill))
+    asyncio.run(writer._replay_spill())
+
+    assert [row["entity_id"] for row in map(json.loads, spill.read_text().splitlines())] == ["a", "b"]
+    assert [path.name for path in tmp_path.iterdir()] == [spill.name]
@@ -0,0 +1,46 @@
+import asyncio
+import uuid
+
+import pytest
+
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+def artist_row(artist_id):
+    return {"id": artist_id, "name": f"Artist {artist_id[:8]}", "created_at": TIMESTAMP, "updated_at": TIMESTAMP}
+
+def test_ids_are_matched_in_canonical_form(db, fake_execute):
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    fake = fake_execute([artist_row(first), artist_row(second)])
+    requested = [first.upper(), "{" + second + "}", first, "not-a-uuid"]
+
+    artists, missing = asyncio.run(db.get_artists_by_ids(requested))
+
+    assert [a.id for a in artists] == [first, second]
+    assert missing == ["not-a-uuid"]
+    assert db.round_trips == 1
+    assert fake.queries[0].request.params["id"] == f"in.({first},{second})"
+
+def test_missing_ids_are_reported_as_requested(db, fake_execute):
+    absent = str(uuid.uuid4()).upper()
+    fake_execute([])
+
+    artists, missing = asyncio.run(db.get_artists_by_ids([absent]))
+
+    assert artists == []
+    assert missing == [absent]
+
+def test_cached_rows_skip_the_query(db, fake_execute):
+    artist_id = str(uuid.uuid4())
+    fake_execute([artist_row(artist_id)])
+    asyncio.run(db.get_artists_by_ids([artist_id]))
+
+    artists, missing = asyncio.run(db.get_artists_by_ids([artist_id.upper()]))
+
+    assert [a.id for a in artists] == [artist_id]
+    assert db.round_trips == 1
+
+def test_database_errors_propagate(db, fake_execute):
+    fake_execute(RuntimeError("database unavailable"))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(db.get_songs_by_ids([str(uuid.uuid4())]))
@@ -0,0 +1,35 @@
+from PIL import Image
+
+from services.image_variants import render_variants
+
+def save_jpeg(path, size, orientation=None):
+    image = Image.new("RGB", size, (200, 40, 40))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(path, "JPEG", quality=80, exif=exif)
+    return str(path)
+
+def test_reports_original_size_of_draft_decoded_jpeg(tmp_path):
+    source = save_jpeg(tmp_path / "cover.jpg", (4000, 3000))
+
+    result = render_variants(source, str(tmp_path / "out"), widths=[320, 640], formats=["jpeg"])
+
+    assert (result["width"], result["height"]) == (4000, 3000)
+    assert [(width, Image.open(path).size) for _, width, path in result["files"]] == [(320, (320, 240)), (640, (640, 480))]
+
+def test_reported_size_follows_exif_rotation(tmp_path):
+    source = save_jpeg(tmp_path / "rotated.jpg", (4000, 3000), orientation=6)
+
+    result = render_variants(source, str(tmp_path / "out"), widths=[320], formats=["jpeg"])
+
+    assert (result["width"], result["height"]) == (3000, 4000)
+    assert Image.open(result["files"][0][2]).size == (320, 427)
+
+def test_small_image_keeps_its_own_width(tmp_path):
+    source = save_jpeg(tmp_path / "small.jpg", (500, 500))
+
+    result = render_variants(source, str(tmp_path / "out"), widths=[320, 640], formats=["jpeg"])
+
+    assert (result["width"], result["height"]) == (500, 500)
+    assert [width for _, width, _ in result["files"]] == [320, 500]
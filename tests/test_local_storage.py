@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from services.storage_backends import LocalStorage, StorageBackend
+
+async def stream(*parts):
+    for part in parts:
+        yield part
+
+def put(storage, bucket, path, *parts):
+    data = b"".join(parts)
+
+    async def read_range(offset, length):
+        yield data[offset:offset + length]
+
+    return asyncio.run(storage.put(bucket, path, "audio/mpeg", len(data), stream(*parts), read_range))
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path), public_url="")
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+def test_put_writes_sharded_file_and_leaves_no_temp_files(storage):
+    assert put(storage, "music-files", "song.mp3", b"abc", b"def") == 6
+
+    target = storage.file_path("music-files", "song.mp3")
+    assert target.read_bytes() == b"abcdef"
+    # <root>/<bucket>/<xx>/<yy>/<path>
+    assert target.relative_to(storage.root).parts[0] == "music-files" and len(target.parts[-3]) == 2
+    assert list(storage.tmp_dir.iterdir()) == []
+    assert storage.metrics()["bytes_written"] == 6
+
+def test_put_replaces_an_object_only_once_it_is_complete(storage):
+    put(storage, "music-files", "song.mp3", b"old")
+    target = storage.file_path("music-files", "song.mp3")
+    seen = []
+
+    async def chunks():
+        yield b"new"
+        # Readers still get the previous complete object while the write is in progress
+        seen.append(target.read_bytes())
+        yield b" data"
+
+    async def read_range(offset, length):
+        yield b""
+
+    asyncio.run(storage.put("music-files", "song.mp3", "audio/mpeg", None, chunks(), read_range))
+
+    assert seen == [b"old"]
+    assert target.read_bytes() == b"new data"
+
+def test_failed_put_keeps_the_old_object_and_removes_the_temp_file(storage):
+    put(storage, "music-files", "song.mp3", b"old")
+
+    async def chunks():
+        yield b"partial"
+        raise HTTPException(status_code=413, detail="too large")
+
+    async def read_range(offset, length):
+        yield b""
+
+    with pytest.raises(HTTPException):
+        asyncio.run(storage.put("music-files", "song.mp3", "audio/mpeg", None, chunks(), read_range))
+
+    assert storage.file_path("music-files", "song.mp3").read_bytes() == b"old"
+    assert list(storage.tmp_dir.iterdir()) == []
+
+@pytest.mark.parametrize("bucket, path", [
+    ("music-files", "../secret"),
+    ("music-files", "a/../../secret"),
+    ("music-files", "a/./b"),
+    ("music-files", "/etc/passwd"),
+    ("music-files", "."),
+    ("music-files", ""),
+    ("music-files", "a\x00b"),
+    ("music-files", "a//b"),
+    ("", "song.mp3"),
+    (".tmp", "song.mp3"),
+    ("..", "song.mp3"),
+    ("music/files", "song.mp3"),
+])
+def test_file_path_rejects_paths_outside_the_bucket(storage, bucket, path):
+    with pytest.raises(HTTPException) as error:
+        storage.file_path(bucket, path)
+    assert error.value.status_code == 400
+
+def test_urls_map_back_to_paths_and_files(storage):
+    url = storage.public_url("cover-images", "covers/my cover.jpg")
+
+    assert url == "/api/storage/cover-images/covers/my%20cover.jpg"
+    assert storage.object_path(url, "cover-images") == "covers/my cover.jpg"
+    assert storage.object_path(url, "music-files") is None
+    assert storage.local_path(url) == str(storage.file_path("cover-images", "covers/my cover.jpg"))
+    assert storage.local_path("/api/storage/cover-images/../x") is None
+    assert storage.local_path("https://elsewhere.example/x.jpg") is None
+
+def test_list_and_remove(storage):
+    for path in ("renditions/song/job/128k.m4a", "renditions/song/job/hls/master.m3u8", "other.mp3"):
+        put(storage, "music-files", path, b"x" * 10)
+
+    listed = asyncio.run(storage.list("music-files", "renditions/"))
+    assert [obj["path"] for obj in listed] == ["renditions/song/job/128k.m4a", "renditions/song/job/hls/master.m3u8"]
+    assert all(obj["metadata"]["size"] == 10 and obj["created_at"] for obj in listed)
+
+    asyncio.run(storage.remove("music-files", ["renditions/song/job/hls/master.m3u8", "missing.mp3"]))
+
+    assert [obj["path"] for obj in asyncio.run(storage.list("music-files"))] == ["other.mp3", "renditions/song/job/128k.m4a"]
+    removed = storage.file_path("music-files", "renditions/song/job/hls/master.m3u8")
+    # Empty folders are pruned down to the shard directory
+    assert not removed.parent.exists()
+    assert removed.parents[4].exists()
@@ -0,0 +1,38 @@
+import asyncio
+import uuid
+
+def playlist_row(song_count):
+    return {
+        "id": str(uuid.uuid4()),
+        "name": f"Playlist with {song_count} songs",
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-01T00:00:00+00:00",
+        "playlist_songs": [{"count": song_count}],
+    }
+
+def test_playlist_page_is_one_round_trip(db, fake_execute):
+    rows = [playlist_row(n) for n in range(50)]
+    fake = fake_execute(rows)
+
+    playlists = asyncio.run(db.get_playlists(limit=50))
+
+    assert db.round_trips == 1
+    assert "playlist_songs(count)" in fake.queries[0].request.params["select"]
+    assert [p.song_count for p in playlists] == list(range(50))
+
+def test_round_trips_do_not_grow_with_page_size(db, fake_execute):
+    for size in (1, 10, 100):
+        fake_execute([playlist_row(3) for _ in range(size)])
+        db.cache.clear()
+        before = db.round_trips
+        asyncio.run(db.get_playlists(limit=size))
+        assert db.round_trips - before == 1
+
+def test_playlist_without_songs_counts_zero(db, fake_execute):
+    row = playlist_row(0)
+    row["playlist_songs"] = []
+    fake_execute([row])
+
+    playlists = asyncio.run(db.get_playlists())
+
+    assert playlists[0].song_count == 0
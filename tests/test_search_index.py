@@ -0,0 +1,36 @@
+import asyncio
+import uuid
+
+from services.search_index import SearchIndex
+
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+def artist_row(name):
+    return {"id": str(uuid.uuid4()), "name": name, "created_at": TIMESTAMP, "updated_at": TIMESTAMP}
+
+def test_build_scans_catalog_by_keyset(db, fake_execute, monkeypatch):
+    monkeypatch.setattr("services.search_index.SEARCH_INDEX_PAGE_SIZE", 2)
+    artists = [artist_row("Daft Punk"), artist_row("Dua Lipa"), artist_row("Queen")]
+    # No songs, two artist pages, then no albums or playlists
+    fake = fake_execute([], artists[:2], artists[2:], [], [])
+    index = SearchIndex(enabled=True)
+
+    asyncio.run(index.build(db))
+
+    assert index.ready
+    assert index.metrics()["documents"] == 3
+    assert [a.name for a in index.search("qu").artists] == ["Queen"]
+    assert "order=created_at.desc%2Cid.desc" in str(fake.queries[1].request.params)
+    # The second page continues after the last row of the first instead of using an offset
+    assert "or=" in str(fake.queries[2].request.params)
+    assert db.cache.metrics()["entries"] == 0
+
+def test_failed_build_leaves_index_not_ready(db, fake_execute):
+    fake_execute(RuntimeError("database unavailable"))
+    index = SearchIndex(enabled=True)
+
+    asyncio.run(index.build(db))
+
+    assert not index.ready
+    assert not index.building
+    assert index.metrics()["documents"] == 0
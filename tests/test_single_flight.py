@@ -0,0 +1,50 @@
+import asyncio
+
+def test_concurrent_misses_share_one_load(db):
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ["value"]
+
+    async def main():
+        return await asyncio.gather(*(db._read("artists:page", "artist", loader, list_page=True) for _ in range(10)))
+
+    results = asyncio.run(main())
+
+    assert calls == 1
+    assert all(result == ["value"] for result in results)
+    assert db.cache.get("artists:page") == (True, ["value"])
+
+def test_reader_after_write_does_not_join_stale_flight(db):
+    stored = {"value": ["old"]}
+    started = 0
+    loading = None
+
+    async def loader():
+        nonlocal started
+        started += 1
+        value = stored["value"]
+        loading.set()
+        await asyncio.sleep(0.02)
+        return value
+
+    async def main():
+        nonlocal loading
+        loading = asyncio.Event()
+        first = asyncio.ensure_future(db._read("artists:page", "artist", loader, list_page=True))
+        await loading.wait()
+        # A write lands while the first load is in flight
+        stored["value"] = ["new"]
+        db.cache.invalidate_tags("list:artist")
+        second = await db._read("artists:page", "artist", loader, list_page=True)
+        return await first, second
+
+    first, second = asyncio.run(main())
+
+    assert started == 2
+    assert first == ["old"]
+    assert second == ["new"]
+    assert db.cache.get("artists:page") == (True, ["new"])
@@ -0,0 +1,73 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from models.models import Song, SongUpdate
+from routes import songs
+
+SONG_ID = str(uuid.uuid4())
+# Cleared by admin_write when audio_url changes
+DERIVED_AUDIO_FIELDS = ("duration_ms", "container", "codec", "bitrate", "sample_rate", "channels", "hls_url", "renditions")
+
+def song(**fields):
+    now = datetime.now(timezone.utc)
+    base = {"id": SONG_ID, "title": "Track", "artist_id": str(uuid.uuid4()), "created_at": now, "updated_at": now,
+            "audio_url": "https://cdn.example/old.mp3", "duration_ms": 200000, "codec": "mp3",
+            "hls_url": "https://cdn.example/renditions/old/hls/master.m3u8"}
+    return Song(**{**base, **fields})
+
+class Recorder:
+    """Stands in for admin_write, applying the changes the way the SQL function does"""
+
+    def __init__(self, monkeypatch, current):
+        self.changes = None
+        self.deleted_waveforms = []
+        self.submitted = []
+
+        async def get_song_by_id(song_id):
+            raise AssertionError("update_song must not read the song before writing it")
+
+        async def admin_write(entity_type, action, entity_id, changes):
+            self.changes = changes
+            applied = dict(changes)
+            if applied.get("audio_url", current.audio_url) != current.audio_url:
+                applied = {**dict.fromkeys(DERIVED_AUDIO_FIELDS), **applied}
+            return current, current.model_copy(update=applied)
+
+        async def delete_waveform(song_id):
+            self.deleted_waveforms.append(song_id)
+
+        def submit(song_id, source, owned=True, duration_ms=None):
+            self.submitted.append((song_id, source, owned, duration_ms))
+
+        monkeypatch.setattr(songs.db_service, "get_song_by_id", get_song_by_id)
+        monkeypatch.setattr(songs.db_service, "admin_write", admin_write)
+        monkeypatch.setattr(songs.db_service, "delete_waveform", delete_waveform)
+        monkeypatch.setattr(songs.transcoder, "submit", submit)
+        monkeypatch.setattr(songs.transcoder, "enabled", True)
+
+@pytest.fixture
+def recorder(monkeypatch):
+    return Recorder(monkeypatch, song())
+
+def test_new_audio_is_retranscoded(recorder):
+    updated = asyncio.run(songs.update_song(SONG_ID, SongUpdate(audio_url="https://cdn.example/new.mp3")))
+
+    assert recorder.changes == {"audio_url": "https://cdn.example/new.mp3"}
+    assert updated.hls_url is None
+    assert recorder.deleted_waveforms == [SONG_ID]
+    assert recorder.submitted == [(SONG_ID, "https://cdn.example/new.mp3", False, None)]
+
+def test_values_sent_with_the_new_audio_are_passed_on(recorder):
+    asyncio.run(songs.update_song(SONG_ID, SongUpdate(audio_url="https://cdn.example/new.mp3", duration_ms=1000)))
+
+    assert recorder.submitted == [(SONG_ID, "https://cdn.example/new.mp3", False, 1000)]
+
+def test_unchanged_audio_is_left_alone(recorder):
+    asyncio.run(songs.update_song(SONG_ID, SongUpdate(title="Renamed", audio_url="https://cdn.example/old.mp3")))
+
+    assert recorder.changes == {"title": "Renamed", "audio_url": "https://cdn.example/old.mp3"}
+    assert recorder.deleted_waveforms == []
+    assert recorder.submitted == []
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import tempfile
+import tracemalloc
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from services.storage_service import STORAGE_CHUNK_SIZE, StorageService
+
+UPLOAD_BYTES = 32 * 1024 * 1024
+
+class RecordingBackend:
+    """Consumes uploads chunk by chunk, like a network backend, keeping only a count"""
+    name = "recording"
+
+    def __init__(self):
+        self.received = 0
+
+    async def put(self, bucket, path, content_type, size, chunks, read_range):
+        async for chunk in chunks:
+            self.received += len(chunk)
+        return self.received
+
+    def public_url(self, bucket, path):
+        return f"memory://{bucket}/{path}"
+
+    def metrics(self):
+        return {}
+
+def spooled_upload(size: int) -> UploadFile:
+    # Starlette spools request bodies over 1 MiB to disk the same way
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = os.urandom(1024 * 1024)
+    for _ in range(size // len(block)):
+        spool.write(block)
+    spool.seek(0)
+    return UploadFile(spool, size=size, filename="large.mp3", headers=Headers({"content-type": "audio/mpeg"}))
+
+@pytest.fixture
+def service():
+    service = StorageService(RecordingBackend())
+    service.dedup = False
+    return service
+
+def test_large_upload_holds_one_chunk_at_a_time(service, record_property):
+    upload = spooled_upload(UPLOAD_BYTES)
+
+    tracemalloc.start()
+    try:
+        url = asyncio.run(service.upload_audio_file(upload))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    record_property("peak_traced_bytes", peak)
+    assert url.startswith("memory://music-files/")
+    assert service.backend.received == UPLOAD_BYTES
+    assert service.peak_chunk_bytes <= STORAGE_CHUNK_SIZE
+    # A few chunks in flight at most, never the whole file
+    assert peak < 4 * STORAGE_CHUNK_SIZE
+
+def test_oversized_upload_is_rejected_while_streaming(service, monkeypatch):
+    monkeypatch.setattr("services.storage_service.MAX_AUDIO_UPLOAD_BYTES", 4 * 1024 * 1024)
+    upload = spooled_upload(8 * 1024 * 1024)
+    # Unknown size, so the limit can only be enforced as bytes arrive
+    upload.size = None
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.upload_audio_file(upload))
+
+    assert error.value.status_code == 413
+    assert service.backend.received <= 4 * 1024 * 1024
+    assert service.rejected == 1
@@ -0,0 +1,64 @@
+import asyncio
+import uuid
+
+from services.suggest_index import SUGGEST_SOURCES, SuggestIndex
+
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+ARTIST_ID = str(uuid.uuid4())
+
+# Rows per entity type, in SUGGEST_SOURCES order
+CATALOG = {
+    "song": [
+        {"id": str(uuid.uuid4()), "title": "Blinding Lights", "artist_id": ARTIST_ID},
+        {"id": str(uuid.uuid4()), "title": "Northern Lights", "artist_id": ARTIST_ID},
+        {"id": str(uuid.uuid4()), "title": "Starlight", "artist_id": ARTIST_ID},
+    ],
+    "artist": [{"id": ARTIST_ID, "name": "The Weeknd"}],
+    "album": [{"id": str(uuid.uuid4()), "title": "After Hours", "artist_id": ARTIST_ID}],
+    "playlist": [{"id": str(uuid.uuid4()), "name": "Late Night Lights"}],
+}
+
+def scan_responses():
+    return [[{**row, "created_at": TIMESTAMP} for row in CATALOG[entity]] for entity in SUGGEST_SOURCES]
+
+def build(db, fake_execute) -> SuggestIndex:
+    fake_execute(*scan_responses())
+    index = SuggestIndex(enabled=True)
+    asyncio.run(index.build(db))
+    return index
+
+def test_build_matches_the_start_of_any_word(db, fake_execute):
+    index = build(db, fake_execute)
+
+    assert index.ready
+    labels = [s.label for s in index.suggest("li")]
+    assert labels == ["Blinding Lights", "Northern Lights", "Late Night Lights"]
+    # Labels that start with the prefix rank first
+    assert [s.label for s in index.suggest("l")][0] == "Late Night Lights"
+    assert index.suggest("light")[0].label == "Blinding Lights"
+    assert index.suggest("starl")[0].label == "Starlight"
+
+def test_database_fallback_agrees_with_index(db, fake_execute):
+    index = build(db, fake_execute)
+
+    for prefix in ("li", "l", "the w", "weeknd", "hours", "st", "zz"):
+        # The ILIKE pre-filter may return extra candidates; matching happens in memory
+        fake_execute(*[[{k: v for k, v in row.items() if k != "created_at"} for row in rows] for rows in scan_responses()])
+        assert asyncio.run(db.suggest(prefix)) == index.suggest(prefix), prefix
+
+def test_deleting_an_artist_drops_their_songs_and_albums(db, fake_execute):
+    index = build(db, fake_execute)
+
+    index.remove("artist", ARTIST_ID)
+
+    assert [s.type for s in index.suggest("l")] == ["playlist"]
+    assert index.suggest("after") == []
+    assert len(index) == 1
+
+def test_failed_build_is_not_ready(db, fake_execute):
+    fake_execute(RuntimeError("database unavailable"))
+    index = SuggestIndex(enabled=True)
+
+    asyncio.run(index.build(db))
+
+    assert not index.ready
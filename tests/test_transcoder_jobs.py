@@ -0,0 +1,62 @@
+import asyncio
+import os
+import time
+import uuid
+
+from services.transcoder import TRANSCODE_DIR_MAX_AGE, Transcoder
+
+class SongWrites:
+    def __init__(self):
+        self.updates = []
+        self.waveforms = []
+
+    async def update_song(self, song_id, update):
+        self.updates.append((song_id, update))
+        return update
+
+    async def save_waveform(self, song_id, peaks, sample_rate):
+        self.waveforms.append(song_id)
+
+def test_superseded_job_does_not_write_the_song(tmp_path, monkeypatch):
+    db = SongWrites()
+    transcoder = Transcoder(db, directory=str(tmp_path))
+    song_id = str(uuid.uuid4())
+    old = transcoder._new_job(song_id, "https://cdn.example/old.mp3", False, None)
+    newer = []
+
+    async def ffmpeg(command, capture=False):
+        return b""
+
+    async def publish(job, workdir):
+        # The audio is replaced while this job's outputs are uploading
+        newer.append(transcoder._new_job(song_id, "https://cdn.example/new.mp3", False, None))
+        return [], "https://cdn.example/old/hls/master.m3u8"
+
+    monkeypatch.setattr(transcoder, "_ffmpeg", ffmpeg)
+    monkeypatch.setattr(transcoder, "_publish", publish)
+
+    asyncio.run(transcoder.run(old))
+
+    assert old.status == "failed" and old.error == "Superseded by a newer job"
+    assert db.updates == [] and db.waveforms == []
+    assert transcoder.superseded == 1 and transcoder.failed == 0
+    assert transcoder.get_job(song_id) is newer[0]
+
+def test_start_removes_only_stale_scratch_entries(tmp_path):
+    transcoder = Transcoder(SongWrites(), workers=0, directory=str(tmp_path))
+    transcoder.enabled = True
+    stale_source = tmp_path / "stale.src"
+    stale_workdir = tmp_path / "stale-job"
+    fresh_source = tmp_path / "fresh.src"
+    fresh_workdir = tmp_path / "fresh-job"
+    stale_source.write_bytes(b"audio")
+    (stale_workdir / "hls").mkdir(parents=True)
+    fresh_source.write_bytes(b"audio")
+    (fresh_workdir / "hls").mkdir(parents=True)
+    past = time.time() - TRANSCODE_DIR_MAX_AGE - 60
+    for path in (stale_source, stale_workdir):
+        os.utime(path, (past, past))
+
+    asyncio.run(transcoder.start())
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["fresh-job", "fresh.src"]
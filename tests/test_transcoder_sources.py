@@ -0,0 +1,33 @@
+import asyncio
+import uuid
+
+from services.storage_backends import LocalStorage
+from services.storage_service import storage_service
+from services.transcoder import Transcoder
+
+class SongsTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def iter_table(self, table, page_size=1000, column="created_at", null_column=None, columns="*"):
+        yield self.rows
+
+def test_backfill_reads_local_backend_objects_from_disk(tmp_path, monkeypatch):
+    local = LocalStorage(str(tmp_path), public_url="")
+    monkeypatch.setattr(storage_service, "backend", local)
+    local_url = local.public_url("music-files", "song.mp3")
+    remote_url = "https://cdn.example/music-files/other.mp3"
+    rows = [{"id": str(uuid.uuid4()), "audio_url": local_url}, {"id": str(uuid.uuid4()), "audio_url": remote_url}]
+    transcoder = Transcoder(SongsTable(rows), directory=str(tmp_path / "transcode"))
+    sources = []
+
+    async def run(job):
+        sources.append(transcoder._sources[job.id][0])
+        transcoder._finish(job)
+
+    monkeypatch.setattr(transcoder, "run", run)
+
+    counts = asyncio.run(transcoder.backfill())
+
+    assert counts == {"scanned": 2, "done": 2, "failed": 0}
+    assert sorted(sources) == sorted([str(local.file_path("music-files", "song.mp3")), remote_url])
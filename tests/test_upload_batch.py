@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import UploadFile
+
+from routes import uploads
+
+DELAY = 0.05
+FILES = 12
+
+def make_files(count):
+    return [UploadFile(file=None, filename=f"track-{i}.mp3") for i in range(count)]
+
+class SlowUpload:
+    """Stub upload callable that takes DELAY seconds and tracks how many run at once"""
+
+    def __init__(self, fail=(), stall=()):
+        self.fail = set(fail)
+        self.stall = set(stall)
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, file):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(DELAY * 10 if file.filename in self.stall else DELAY)
+            if file.filename in self.fail:
+                raise RuntimeError("storage unavailable")
+            return {"url": f"https://cdn.example/{file.filename}"}
+        finally:
+            self.active -= 1
+
+@pytest.mark.parametrize("concurrency", [1, 4, FILES])
+def test_wall_time_scales_with_concurrency(monkeypatch, record_property, concurrency):
+    monkeypatch.setattr(uploads, "UPLOAD_CONCURRENCY", concurrency)
+    upload = SlowUpload()
+
+    started = time.perf_counter()
+    results = asyncio.run(uploads._upload_batch(make_files(FILES), upload, "Audio file"))
+    elapsed = time.perf_counter() - started
+
+    waves = -(-FILES // concurrency)
+    record_property("elapsed_seconds", round(elapsed, 3))
+    assert upload.peak == concurrency
+    # Only the lower bound is exact; a loaded machine can take arbitrarily longer
+    assert elapsed >= waves * DELAY
+    assert [r.url for r in results] == [f"https://cdn.example/track-{i}.mp3" for i in range(FILES)]
+
+def test_failures_and_timeouts_keep_request_order(monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_TIMEOUT", DELAY * 2)
+    upload = SlowUpload(fail={"track-1.mp3"}, stall={"track-2.mp3"})
+
+    results = asyncio.run(uploads._upload_batch(make_files(4), upload, "Audio file"))
+
+    assert [r.filename for r in results] == [f"track-{i}.mp3" for i in range(4)]
+    assert [bool(r.url) for r in results] == [True, False, False, True]
+    assert "storage unavailable" in results[1].message
+    assert "timed out" in results[2].message
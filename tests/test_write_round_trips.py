@@ -0,0 +1,51 @@
+import asyncio
+import uuid
+
+import pytest
+
+from models.models import (
+    AlbumCreate, AlbumUpdate, ArtistCreate, ArtistUpdate,
+    PlaylistCreate, PlaylistUpdate, SongCreate, SongUpdate,
+)
+
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+ARTIST_ID = str(uuid.uuid4())
+ALBUM_ID = str(uuid.uuid4())
+
+def row(**fields):
+    return {"id": str(uuid.uuid4()), "created_at": TIMESTAMP, "updated_at": TIMESTAMP, **fields}
+
+ARTIST = row(name="Queen")
+ALBUM = row(title="A Night at the Opera", artist_id=ARTIST_ID, artist={**ARTIST, "id": ARTIST_ID})
+SONG = row(title="Bohemian Rhapsody", artist_id=ARTIST_ID, album_id=ALBUM_ID, artist={**ARTIST, "id": ARTIST_ID})
+PLAYLIST = row(name="Classics", playlist_songs=[{"order_index": 0, "song": {**SONG}}])
+
+WRITES = [
+    ("create_artist", (ArtistCreate(name="Queen"),), ARTIST),
+    ("update_artist", (ARTIST["id"], ArtistUpdate(bio="British rock band")), ARTIST),
+    ("create_album", (AlbumCreate(title="A Night at the Opera", artist_id=ARTIST_ID),), ALBUM),
+    ("update_album", (ALBUM["id"], AlbumUpdate(title="A Night at the Opera")), ALBUM),
+    ("create_song", (SongCreate(title="Bohemian Rhapsody", artist_id=ARTIST_ID),), SONG),
+    ("update_song", (SONG["id"], SongUpdate(genre="Rock")), SONG),
+    ("create_playlist", (PlaylistCreate(name="Classics"),), PLAYLIST),
+    ("update_playlist", (PLAYLIST["id"], PlaylistUpdate(description="Old favourites")), PLAYLIST),
+]
+
+@pytest.mark.parametrize("method, args, returned", WRITES, ids=[w[0] for w in WRITES])
+def test_write_returns_hydrated_row_in_one_round_trip(db, fake_execute, method, args, returned):
+    fake = fake_execute([{**returned}])
+
+    value = asyncio.run(getattr(db, method)(*args))
+
+    assert db.round_trips == 1
+    assert value is not None and value.id == returned["id"]
+    # The row comes back from the write itself (return=representation), not a follow-up read
+    assert "return=representation" in fake.queries[0].request.headers.get("Prefer", "")
+
+def test_created_playlist_is_hydrated_with_its_songs(db, fake_execute):
+    fake_execute([{**PLAYLIST, "playlist_songs": list(PLAYLIST["playlist_songs"])}])
+
+    playlist = asyncio.run(db.create_playlist(PlaylistCreate(name="Classics")))
+
+    assert playlist.song_count == 1
+    assert playlist.songs[0].title == "Bohemian Rhapsody"